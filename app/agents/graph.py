@@ -1,25 +1,49 @@
-from langgraph.graph import StateGraph, END
-from app.agents.nodes import GraphState, retrieve_documents, check_relevance, generate_answer
+import threading
+from app.agents.nodes import (
+    GraphState, retrieve_documents, rerank_documents, assemble_context, check_relevance, generate_answer,
+    speculate_answer, is_relevant
+)
+from app.config import get_settings
+
+settings = get_settings()
 
 def should_continue(state: GraphState) -> str:
     """Determine if we should continue or end"""
-    if state["relevance_score"] > 0.5:
+    if is_relevant(state):
         return "generate"
     else:
         return "end"
 
 def create_workflow():
     """Create the LangGraph workflow"""
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(GraphState)
     
-    # Add nodes
+    # Retrieval, optionally followed by reranking and context packing
     workflow.add_node("retrieve", retrieve_documents)
+    workflow.set_entry_point("retrieve")
+    last_retrieval_node = "retrieve"
+    if settings.rerank_enabled:
+        workflow.add_node("rerank", rerank_documents)
+        workflow.add_edge("retrieve", "rerank")
+        last_retrieval_node = "rerank"
+    if settings.context_packing_enabled:
+        workflow.add_node("pack", assemble_context)
+        workflow.add_edge(last_retrieval_node, "pack")
+        last_retrieval_node = "pack"
+    
+    if settings.speculative_generation:
+        # Relevance check and generation run concurrently inside one node
+        workflow.add_node("speculate", speculate_answer)
+        workflow.add_edge(last_retrieval_node, "speculate")
+        workflow.add_edge("speculate", END)
+        return workflow.compile()
+    
+    # Relevance check, then generation only for relevant context
     workflow.add_node("check_relevance", check_relevance)
     workflow.add_node("generate", generate_answer)
-    
-    # Add edges
-    workflow.set_entry_point("retrieve")
-    workflow.add_edge("retrieve", "check_relevance")
+    workflow.add_edge(last_retrieval_node, "check_relevance")
     workflow.add_conditional_edges(
         "check_relevance",
         should_continue,
@@ -32,5 +56,13 @@ def create_workflow():
     
     return workflow.compile()
 
-# Create compiled graph
-app_graph = create_workflow()
+_app_graph = None
+_app_graph_lock = threading.Lock()
+
+def get_app_graph():
+    """Return the compiled workflow, compiling it on first use"""
+    global _app_graph
+    with _app_graph_lock:
+        if _app_graph is None:
+            _app_graph = create_workflow()
+        return _app_graph
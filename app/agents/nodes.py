@@ -1,35 +1,220 @@
-from typing import TypedDict, List
-from langchain_ollama import OllamaLLM
-from langchain.prompts import PromptTemplate
+import asyncio
+import math
+import re
+import time
+from contextlib import suppress
+from dataclasses import dataclass, asdict
+from typing import TypedDict, Dict, List, Optional
+from langchain_core.prompts import PromptTemplate
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
 from app.config import get_settings
-from app.utils.vectorstore import get_vectorstore
+from app.utils.resources import get_resources
+from app.utils.executor import run_in_executor, run_limited, StageLimit
+from app.utils.fusion import chunk_key, reciprocal_rank_fusion, weighted_fusion
+from app.utils.relevance import similarity_relevance, cross_encoder_scores
+from app.utils.context_packing import pack_documents, estimate_tokens
+from app.utils.metrics import instrument_node, track, PROMPT_TOKENS, GENERATED_TOKENS
+from app.utils.filters import SearchFilter
+from app.utils.vectorstore import DEFAULT_COLLECTION
 
 settings = get_settings()
 
+# Tag of the LLM run that generates the answer, as reported by astream_events
+ANSWER_TAG = "answer"
+
 class GraphState(TypedDict):
     """State of the graph"""
     question: str
     context: List[str]
     answer: str
     relevance_score: float
+    question_embedding: Optional[List[float]]
+    documents: List[Document]
+    similarities: Dict[str, float]
+    rerank_scores: Optional[List[float]]
+    collection: str
+    filters: Optional[SearchFilter]
+
+def initial_state(question: str, question_embedding: Optional[List[float]] = None,
+                  collection: str = DEFAULT_COLLECTION, filters: Optional[SearchFilter] = None) -> GraphState:
+    """Build the input state for a new question"""
+    return {
+        "question": question,
+        "context": [],
+        "answer": "",
+        "relevance_score": 0.0,
+        "question_embedding": question_embedding,
+        "documents": [],
+        "similarities": {},
+        "rerank_scores": None,
+        "collection": collection,
+        "filters": filters
+    }
+
+def _vector_search(vectorstore, question: str, k: int, question_embedding=None, **kwargs):
+    """Similarity search, reusing the question embedding when one is available"""
+    if question_embedding is not None:
+        kwargs["vector"] = question_embedding
+    return vectorstore.similarity_search_with_score(question, k=k, **kwargs)
+
+async def _run_tracked(operation: str, func, *args, limit: Optional[StageLimit] = None, **kwargs):
+    """Run a blocking call on the executor, within ``limit`` if given, and record its latency"""
+    with track(operation):
+        if limit is not None:
+            return await run_limited(limit, func, *args, **kwargs)
+        return await run_in_executor(func, *args, **kwargs)
+
+def _budget(milliseconds: int) -> Optional[float]:
+    """Convert a per-stage latency budget to a timeout (0 means unlimited)"""
+    return milliseconds / 1000 if milliseconds > 0 else None
+
+# Searches and reranking that ran over budget keep their executor thread until they return
+_search_calls = StageLimit("search", settings.stage_max_in_flight)
+_rerank_calls = StageLimit("rerank", settings.stage_max_in_flight)
+
+async def _search(question: str, k: int, question_embedding=None, collection: str = DEFAULT_COLLECTION,
+                  filters: Optional[SearchFilter] = None):
+    """Vector or hybrid search returning up to k (document, score) pairs.
+
+    Also returns the question similarity of every chunk the vector search
+    found, keyed by ``chunk_key``, so relevance can be scored without
+    embedding the chunks again.
+    """
+    vectorstore = await get_resources().aget_vectorstore(collection)
+    
+    # Searches are CPU-bound or blocking, so keep them off the event loop.
+    # alpha=1 makes Weaviate's search purely vector-based so its scores are cosine
+    # similarities; in hybrid mode keywords are fused below
+    if settings.hybrid_search_enabled:
+        candidates = max(settings.hybrid_candidates, k)
+        vector_results, keyword_results = await asyncio.gather(
+            _run_tracked(
+                "vector_search", _vector_search, vectorstore, question, candidates, question_embedding,
+                alpha=1.0, filters=filters, limit=_search_calls
+            ),
+            _run_tracked(
+                "keyword_search", vectorstore.keyword_search, question, candidates, filters, limit=_search_calls
+            )
+        )
+        if settings.hybrid_fusion == "weighted":
+            results = weighted_fusion(vector_results, keyword_results, settings.hybrid_vector_weight)
+        else:
+            results = reciprocal_rank_fusion([vector_results, keyword_results], settings.hybrid_rrf_k)
+    else:
+        results = vector_results = await _run_tracked(
+            "vector_search", _vector_search, vectorstore, question, k, question_embedding,
+            alpha=1.0, filters=filters, limit=_search_calls
+        )
+    
+    return results[:k], {chunk_key(doc): score for doc, score in vector_results}
 
-def retrieve_documents(state: GraphState) -> GraphState:
+@instrument_node("retrieve")
+async def retrieve_documents(state: GraphState) -> GraphState:
     """Retrieve relevant documents from vector store"""
-    question = state["question"]
-    vectorstore = get_vectorstore()
+    # Over-fetch when a reranking stage will pick the best chunks afterwards
+    k = settings.rerank_candidates if settings.rerank_enabled else settings.retrieval_k
+    try:
+        results, similarities = await asyncio.wait_for(
+            _search(state["question"], k, state.get("question_embedding"), state["collection"], state.get("filters")),
+            timeout=_budget(settings.retrieve_budget_ms)
+        )
+    except TimeoutError:
+        raise TimeoutError(f"Retrieval exceeded its {settings.retrieve_budget_ms} ms budget")
     
-    # Perform similarity search
-    docs = vectorstore.similarity_search(question, k=4)
-    context = [doc.page_content for doc in docs]
+    documents = [doc for doc, _ in results]
+    context = [doc.page_content for doc in documents[:settings.retrieval_k]]
     
+    return {**state, "documents": documents, "context": context, "similarities": similarities}
+
+@instrument_node("rerank")
+async def rerank_documents(state: GraphState) -> GraphState:
+    """Rerank the retrieved candidates with the cross-encoder and keep the best"""
+    reranker = await get_resources().aget("reranker")
+    timeout = _budget(settings.rerank_budget_ms)
+    # The reranker stops between batches at the deadline; the timeout covers an overrunning batch
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        ranked = await asyncio.wait_for(
+            run_limited(
+                _rerank_calls, reranker.rerank, state["question"], state["documents"], settings.rerank_top_n, deadline
+            ),
+            timeout=timeout
+        )
+    except TimeoutError:
+        # Over budget or saturated: keep the retrieval order; scores computed meanwhile still land in the cache
+        documents = state["documents"][:settings.rerank_top_n]
+        return {**state, "documents": documents, "context": [doc.page_content for doc in documents]}
+    
+    documents = [doc for doc, _ in ranked]
+    return {
+        **state,
+        "documents": documents,
+        "context": [doc.page_content for doc in documents],
+        "rerank_scores": [score for _, score in ranked]
+    }
+
+@instrument_node("pack")
+async def assemble_context(state: GraphState) -> GraphState:
+    """Merge overlapping chunks, drop repeated text and fit the context to the token budget"""
+    context = pack_documents(
+        state["documents"],
+        token_budget=settings.context_token_budget,
+        chars_per_token=settings.context_chars_per_token,
+        max_overlap=_max_chunk_overlap()
+    )
     return {**state, "context": context}
 
-def check_relevance(state: GraphState) -> GraphState:
+def _max_chunk_overlap() -> int:
+    """Longest text neighbouring chunks may share, in characters"""
+    if settings.text_splitter == "offset" and settings.chunk_length_unit == "tokens":
+        overlap = math.ceil(settings.chunk_overlap_tokens * settings.context_chars_per_token)
+    else:
+        overlap = settings.chunk_overlap
+    # Chunk boundaries snap to whitespace and tokens vary in length, so leave slack
+    return overlap * 2
+
+def is_relevant(state: GraphState) -> bool:
+    """Whether the relevance score clears the configured threshold"""
+    return state["relevance_score"] > settings.relevance_threshold
+
+@instrument_node("check_relevance")
+async def check_relevance(state: GraphState) -> GraphState:
     """Check if retrieved documents are relevant"""
-    llm = OllamaLLM(
-        model=settings.llm_model,
-        base_url=settings.ollama_base_url
+    if settings.relevance_mode == "score":
+        relevance_score = await _score_relevance(state)
+    elif settings.relevance_mode == "cross_encoder":
+        relevance_score = await _cross_encoder_relevance(state)
+    elif settings.relevance_mode == "llm":
+        relevance_score = await _llm_relevance(state)
+    else:
+        raise ValueError(f"Unsupported relevance mode: {settings.relevance_mode}")
+    
+    return {**state, "relevance_score": relevance_score}
+
+async def _score_relevance(state: GraphState) -> float:
+    """Relevance from the vector search similarity of the chunks kept for the answer"""
+    similarities = state.get("similarities") or {}
+    # Chunks found only by keyword search have no similarity and are skipped
+    kept = [similarities[key] for key in map(chunk_key, state["documents"]) if key in similarities]
+    return similarity_relevance(
+        kept,
+        settings.relevance_similarity_floor,
+        settings.relevance_similarity_ceiling
     )
+
+async def _cross_encoder_relevance(state: GraphState) -> float:
+    """Relevance as the best cross-encoder score over the retrieved chunks"""
+    # The reranker already scored these chunks with the same model
+    if state.get("rerank_scores"):
+        return max(state["rerank_scores"])
+    cross_encoder = await get_resources().aget("cross_encoder")
+    scores = await _run_tracked("cross_encoder", cross_encoder_scores, cross_encoder, state["question"], state["context"])
+    return max(scores, default=0.0)
+
+async def _llm_relevance(state: GraphState) -> float:
+    """Ask the LLM to rate relevance of the whole context"""
+    llm = await get_resources().aget("relevance_llm")
     
     prompt = PromptTemplate(
         template="""You are a relevance checker. Determine if the context is relevant to answer the question.
@@ -43,24 +228,23 @@ Relevance score:""",
     )
     
     chain = prompt | llm
-    result = chain.invoke({
+    inputs = {
         "question": state["question"],
         "context": "\n\n".join(state["context"])
-    })
-    
-    try:
-        relevance_score = float(result.strip())
-    except:
-        relevance_score = 0.5
+    }
+    PROMPT_TOKENS.labels("check_relevance").observe(estimate_tokens(prompt.format(**inputs)))
+    result = await chain.ainvoke(inputs)
     
-    return {**state, "relevance_score": relevance_score}
+    # Models sometimes wrap the number in words; take the first number they give
+    match = re.search(r"\d*\.?\d+", result)
+    if match is None:
+        return 0.5
+    return min(max(float(match.group()), 0.0), 1.0)
 
-def generate_answer(state: GraphState) -> GraphState:
+@instrument_node("generate")
+async def generate_answer(state: GraphState) -> GraphState:
     """Generate answer using LLM"""
-    llm = OllamaLLM(
-        model=settings.llm_model,
-        base_url=settings.ollama_base_url
-    )
+    llm = await get_resources().aget("llm")
     
     prompt = PromptTemplate(
         template="""You are a helpful assistant. Answer the question based on the provided context.
@@ -75,10 +259,67 @@ Answer:""",
         input_variables=["context", "question"]
     )
     
-    chain = prompt | llm
-    answer = chain.invoke({
+    # Tagged so streaming callers can tell answer tokens from the relevance check's
+    chain = (prompt | llm).with_config(tags=[ANSWER_TAG])
+    
+    inputs = {
         "context": "\n\n".join(state["context"]),
         "question": state["question"]
-    })
+    }
+    PROMPT_TOKENS.labels("generate").observe(estimate_tokens(prompt.format(**inputs)))
+    
+    # Stream the completion so callers using astream_events see tokens as they arrive
+    answer = ""
+    tokens = 0
+    try:
+        async for token in chain.astream(inputs):
+            answer += token
+            tokens += 1
+    finally:
+        GENERATED_TOKENS.labels("generate").inc(tokens)
     
     return {**state, "answer": answer}
+
+@dataclass
+class SpeculationStats:
+    """How often speculative generation paid off"""
+    started: int = 0
+    used: int = 0
+    wasted: int = 0
+
+    def to_dict(self) -> dict:
+        finished = self.used + self.wasted
+        return {**asdict(self), "waste_rate": self.wasted / finished if finished else 0.0}
+
+speculation_stats = SpeculationStats()
+
+# Named runnables so astream_events reports both steps as in the sequential graph
+_check_relevance_step = RunnableLambda(check_relevance, name="check_relevance")
+_generate_step = RunnableLambda(generate_answer, name="generate")
+
+@instrument_node("speculate")
+async def speculate_answer(state: GraphState) -> GraphState:
+    """Check relevance while the answer is already being generated.
+
+    Generation starts immediately; if the context turns out to be
+    irrelevant the generation task is cancelled, which closes the streaming
+    request and stops Ollama.
+    """
+    generation = asyncio.create_task(_generate_step.ainvoke(state))
+    speculation_stats.started += 1
+    try:
+        checked = await _check_relevance_step.ainvoke(state)
+    except BaseException:
+        generation.cancel()
+        raise
+    
+    if is_relevant(checked):
+        answered = await generation
+        speculation_stats.used += 1
+        return {**checked, "answer": answered["answer"]}
+    
+    generation.cancel()
+    with suppress(asyncio.CancelledError):
+        await generation
+    speculation_stats.wasted += 1
+    return checked
@@ -2,15 +2,88 @@ from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 class Settings(BaseSettings):
+    vector_backend: str = "weaviate"
     weaviate_url: str = "http://localhost:8080"
+    local_index_dir: str = "data/local_index"
+    local_index_mode: str = "exact"
+    local_index_nlist: int = 256
+    local_index_nprobe: int = 8
+    local_index_ivf_min_rows: int = 10000
     ollama_base_url: str = "http://localhost:11434"
     llm_model: str = "llama3.2"
     embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
+    embedding_bucket_by_length: bool = True
+    embedding_processes: int = 0
+    embedding_backend: str = "torch"
+    embedding_max_seq_length: int = 256
+    onnx_model_dir: str = "data/onnx"
+    onnx_quantize: bool = True
+    onnx_intra_op_threads: int = 0
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    text_splitter: str = "recursive"
+    chunk_length_unit: str = "chars"
+    chunk_size_tokens: int = 200
+    chunk_overlap_tokens: int = 40
+    retrieval_k: int = 4
+    hybrid_search_enabled: bool = False
+    hybrid_candidates: int = 20
+    hybrid_fusion: str = "rrf"
+    hybrid_vector_weight: float = 0.5
+    hybrid_rrf_k: int = 60
+    rerank_enabled: bool = False
+    rerank_candidates: int = 40
+    rerank_top_n: int = 4
+    rerank_batch_size: int = 32
+    rerank_cache_size: int = 10000
+    context_packing_enabled: bool = False
+    context_token_budget: int = 1500
+    context_chars_per_token: float = 4.0
+    retrieve_budget_ms: int = 2000
+    rerank_budget_ms: int = 1000
+    stage_max_in_flight: int = 8
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    relevance_mode: str = "llm"
+    relevance_threshold: float = 0.5
+    relevance_similarity_floor: float = 0.2
+    relevance_similarity_ceiling: float = 0.6
+    relevance_cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    relevance_max_tokens: int = 8
+    speculative_generation: bool = False
+    batch_max_questions: int = 1000
+    batch_concurrency: int = 4
+    coalesce_requests: bool = False
+    warmup_on_startup: bool = True
+    executor_max_workers: int = 4
+    answer_cache_enabled: bool = True
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_max_entries: int = 1000
+    answer_cache_max_bytes: int = 64 * 1024 * 1024
+    answer_cache_ttl_seconds: float = 3600
+    embedding_cache_enabled: bool = True
+    embedding_cache_dir: str = "data/embedding_cache"
+    pdf_parse_workers: int = 4
+    pdf_parallel_min_pages: int = 64
+    pdf_pages_per_task: int = 16
+    ingest_workers: int = 1
+    ingest_batch_size: int = 64
+    ingest_stage_queue_size: int = 4
+    ingest_job_history: int = 1000
+    document_registry_path: str = "data/documents.json"
+    upload_staging_dir: str = "data/uploads"
+    upload_part_size: int = 8 * 1024 * 1024
+    upload_max_bytes: int = 4 * 1024 * 1024 * 1024
+    upload_session_ttl_seconds: float = 24 * 3600
+    upload_expiry_interval_seconds: float = 60
+    upload_stream_ingest: bool = True
+    upload_segment_bytes: int = 256 * 1024
     
     class Config:
         env_file = ".env"
+        # .env also configures the deployment (API keys, log level) beyond these settings
+        extra = "ignore"
 
 @lru_cache()
 def get_settings():
@@ -1,16 +1,62 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from app.agents.graph import app_graph
-from app.utils.document_loader import load_and_split_document
-from app.utils.vectorstore import get_vectorstore
-import shutil
+from pydantic import BaseModel, Field
+from app.agents.graph import get_app_graph, should_continue
+from app.agents.nodes import initial_state, speculation_stats, ANSWER_TAG
+from app.utils.answer_cache import get_answer_cache
+from app.utils.jobs import get_ingestion_queue
+from app.utils.documents import get_document_registry, save_and_hash
+from app.utils.uploads import get_upload_manager, READ_BLOCK_SIZE
+from app.utils.coalescing import get_question_flights, question_key
+from app.utils.filters import SearchFilter
+from app.utils.vectorstore import DEFAULT_COLLECTION, COLLECTION_NAME_PATTERN
+from app.utils.metrics import REQUEST_SECONDS, track, start_server_timing, server_timing_header
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from app.utils.document_loader import shutdown_pdf_pool
+from app.utils.resources import get_resources
+from app.utils.executor import run_in_executor, shutdown_executor
+from app.utils.startup import get_startup_state, start_startup
+from app.config import get_settings
+from contextlib import asynccontextmanager
+import asyncio
+import json
+from functools import partial
+import time
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 import uuid
 
-app = FastAPI(title="Document QA Agent", version="1.0.0")
+settings = get_settings()
+
+NO_ANSWER_MESSAGE = "I couldn't find relevant information to answer your question."
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the startup phase in the background and close shared clients on shutdown.
+
+    The server accepts connections (and answers liveness probes) while the
+    workflow is compiled and models are loaded; readiness reports when
+    that has finished.
+    """
+    resources = get_resources()
+    startup_state = get_startup_state()
+    start_startup(startup_state)
+    ingestion_queue = get_ingestion_queue()
+    await ingestion_queue.start()
+    upload_manager = get_upload_manager()
+    await upload_manager.start()
+    yield
+    startup_state.cancel()
+    await upload_manager.stop()
+    await ingestion_queue.stop()
+    shutdown_pdf_pool()
+    await resources.aclose()
+    shutdown_executor()
+
+app = FastAPI(title="Document QA Agent", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,8 +65,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Record request latency and report per-stage timings in a Server-Timing header"""
+    timings = start_server_timing()
+    start = time.perf_counter()
+    response = await call_next(request)
+    # For streaming responses this is the time until the headers are sent
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(request.method, route.path if route else "unmatched", response.status_code).observe(elapsed)
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
 # Mount static files only if directory exists
 static_dir = Path("static")
 if static_dir.exists() and static_dir.is_dir():
@@ -37,76 +97,506 @@ else:
             "status": "running",
             "endpoints": {
                 "upload": "/upload-document/",
+                "chunked_upload": "/uploads",
+                "jobs": "/jobs/{job_id}",
+                "documents": "/documents",
+                "collections": "/collections",
                 "ask": "/ask/",
+                "ask_stream": "/ask/stream",
+                "ask_batch": "/ask/batch",
                 "health": "/health",
+                "liveness": "/health/live",
+                "readiness": "/health/ready",
+                "metrics": "/metrics",
                 "docs": "/docs"
             }
         }
 
 # Request/Response models
+class SearchFilters(BaseModel):
+    document_ids: Optional[List[str]] = None
+    page_from: Optional[int] = Field(None, ge=0)
+    page_to: Optional[int] = Field(None, ge=0)
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+
+    def to_search_filter(self) -> SearchFilter:
+        return SearchFilter(
+            document_ids=self.document_ids,
+            page_from=self.page_from,
+            page_to=self.page_to,
+            uploaded_after=self.uploaded_after.timestamp() if self.uploaded_after else None,
+            uploaded_before=self.uploaded_before.timestamp() if self.uploaded_before else None
+        )
+
 class QuestionRequest(BaseModel):
     question: str
+    collection: str = DEFAULT_COLLECTION
+    filters: Optional[SearchFilters] = None
 
 class QuestionResponse(BaseModel):
     question: str
     answer: str
     relevance_score: float
 
-@app.post("/upload-document/")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and ingest a document into the vector store"""
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+    collection: str = DEFAULT_COLLECTION
+    filters: Optional[SearchFilters] = None
+    stream: bool = False
+
+class BatchAnswer(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    relevance_score: Optional[float] = None
+    error: Optional[str] = None
+
+class CollectionRequest(BaseModel):
+    name: str
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    size: int = Field(..., ge=0)
+    document_id: Optional[str] = None
+    collection: str = DEFAULT_COLLECTION
+    sha256: Optional[str] = None
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = None
+
+def _require_collection(collection: str):
+    if not get_document_registry().has_collection(collection):
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+
+@app.post("/collections", status_code=201)
+async def create_collection(request: CollectionRequest):
+    """Create a named collection with its own vector index"""
+    if not COLLECTION_NAME_PATTERN.match(request.name):
+        raise HTTPException(
+            status_code=400,
+            detail="Collection names use lowercase letters, digits and underscores and start with a letter"
+        )
+    registry = get_document_registry()
+    if not registry.create_collection(request.name):
+        raise HTTPException(status_code=409, detail=f"Collection '{request.name}' already exists")
+    try:
+        # Create the index now so the first upload does not pay for it
+        await run_in_executor(get_resources().get_vectorstore, request.name)
+    except Exception as e:
+        registry.drop_collection(request.name)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"name": request.name}
+
+@app.get("/collections")
+async def list_collections():
+    """List collections with their document and chunk counts"""
+    return {"collections": get_document_registry().list_collections()}
+
+@app.delete("/collections/{name}")
+async def drop_collection(name: str):
+    """Delete a collection, its index and all of its documents"""
+    if name == DEFAULT_COLLECTION:
+        raise HTTPException(status_code=400, detail="The default collection cannot be dropped")
+    _require_collection(name)
+    try:
+        await get_ingestion_queue().drop_collection(name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"name": name, "dropped": True}
+
+@app.post("/upload-document/", status_code=202)
+async def upload_document(file: UploadFile = File(...), document_id: Optional[str] = Form(None),
+                          collection: str = Form(DEFAULT_COLLECTION)):
+    """Upload a document and queue it for ingestion into a collection.
+
+    Uploading again under the same document id (the filename by default)
+    replaces the previous version.
+    """
+    _require_collection(collection)
     try:
         file_id = str(uuid.uuid4())
         file_path = f"/tmp/{file_id}_{file.filename}"
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_hash = await run_in_executor(save_and_hash, file.file, file_path)
         
-        splits = load_and_split_document(file_path)
-        vectorstore = get_vectorstore()
-        vectorstore.add_documents(splits)
-        Path(file_path).unlink()
+        document_id = document_id or file.filename
+        job = get_ingestion_queue().submit(file_path, file.filename, document_id, content_hash, collection)
         
-        return JSONResponse(content={
-            "message": f"Document '{file.filename}' ingested successfully",
-            "chunks": len(splits)
+        return JSONResponse(status_code=202, content={
+            "message": f"Document '{file.filename}' queued for ingestion",
+            "document_id": document_id,
+            "collection": collection,
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}"
         })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _require_upload(upload_id: str):
+    upload = get_upload_manager().get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail=f"Upload '{upload_id}' not found")
+    return upload
+
+@app.post("/uploads", status_code=201)
+async def start_upload(request: UploadInitRequest):
+    """Start a resumable upload sent as numbered parts of ``part_size`` bytes.
+
+    Text and markdown files are split and embedded into the embedding
+    cache while their parts arrive; every file is only stored and made
+    searchable once the upload is completed.
+    """
+    if request.size > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {settings.upload_max_bytes} bytes")
+    _require_collection(request.collection)
+    try:
+        upload = await run_in_executor(
+            get_upload_manager().create,
+            request.filename,
+            request.size,
+            request.document_id or request.filename,
+            request.collection,
+            request.sha256
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Embedding ahead only pays off if the vectors are kept for the ingestion that follows
+    streaming = settings.upload_stream_ingest and settings.embedding_cache_enabled
+    if streaming and Path(request.filename).suffix.lower() in (".txt", ".md"):
+        upload.job_id = get_ingestion_queue().start_streaming(upload).id
+    return {
+        **upload.to_dict(),
+        "status_url": f"/jobs/{upload.job_id}" if upload.job_id else None
+    }
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Report which parts of an upload have arrived, to resume it"""
+    upload = _require_upload(upload_id)
+    return {**upload.to_dict(), "missing_parts": upload.missing_parts()}
+
+@app.put("/uploads/{upload_id}/parts/{index}")
+async def put_upload_part(upload_id: str, index: int, request: Request):
+    """Write one part of an upload straight into its staging file.
+
+    An ``X-Part-SHA256`` header is checked against the received bytes.
+    Sending a part again is safe, so a failed request can simply be retried.
+    """
+    upload = _require_upload(upload_id)
+    try:
+        writer = upload.open_part(index)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        buffer = bytearray()
+        async for data in request.stream():
+            buffer += data
+            if len(buffer) >= READ_BLOCK_SIZE:
+                await run_in_executor(writer.write, bytes(buffer))
+                buffer.clear()
+        await run_in_executor(writer.write, bytes(buffer))
+        sha256 = await run_in_executor(writer.commit, request.headers.get("x-part-sha256"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        writer.close()
+    return {"upload_id": upload_id, "index": index, "size": writer.written, "sha256": sha256}
+
+@app.post("/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload(upload_id: str, request: Optional[UploadCompleteRequest] = None):
+    """Verify that every part arrived and hand the file to ingestion"""
+    upload = _require_upload(upload_id)
+    try:
+        content_hash = upload.complete(request.sha256 if request else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    manager = get_upload_manager()
+    if upload.job_id is None:
+        job = get_ingestion_queue().submit(
+            str(upload.path), upload.filename, upload.document_id, content_hash, upload.collection
+        )
+        upload.job_id = job.id
+    manager.release(upload_id)
+    return JSONResponse(status_code=202, content={
+        "message": f"Document '{upload.filename}' queued for ingestion",
+        "document_id": upload.document_id,
+        "collection": upload.collection,
+        "content_hash": content_hash,
+        "job_id": upload.job_id,
+        "status_url": f"/jobs/{upload.job_id}"
+    })
+
+@app.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abort an upload and delete its staging file"""
+    if not get_upload_manager().abort(upload_id):
+        raise HTTPException(status_code=404, detail=f"Upload '{upload_id}' not found")
+    return {"upload_id": upload_id, "aborted": True}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report the progress of an ingestion job"""
+    job = get_ingestion_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+@app.get("/documents")
+async def list_documents(collection: str = DEFAULT_COLLECTION):
+    """List a collection's documents with their content hash and chunk count"""
+    _require_collection(collection)
+    return {"documents": get_document_registry().list(collection)}
+
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str, collection: str = DEFAULT_COLLECTION):
+    """Delete a document and all of its chunks from the vector store"""
+    _require_collection(collection)
+    try:
+        result = await get_ingestion_queue().delete_document(collection, document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    return result
+
+def _answer_cache(collection: str, filters: Optional[SearchFilter]):
+    """Answer cache for a question; filtered questions are never cached"""
+    return None if filters is not None else get_answer_cache(collection)
+
+async def _lookup_cached_answer(question: str, collection: str, filters: Optional[SearchFilter]):
+    """Embed the question and look it up in the answer cache.
+
+    Returns ``(question_embedding, cache_version, cached_result)``; the
+    embedding is reused for retrieval on a miss.
+    """
+    cache = _answer_cache(collection, filters)
+    if cache is None:
+        return None, None, None
+    
+    with track("embed_question"):
+        embeddings = await get_resources().aget("embeddings")
+        question_embedding = await run_in_executor(embeddings.embed_query, question)
+    version = cache.version
+    return question_embedding, version, cache.lookup(question_embedding)
+
+def _store_cached_answer(question_embedding, version, answer: str, relevance_score: float,
+                         collection: str, filters: Optional[SearchFilter]):
+    """Remember an answer for semantically similar questions"""
+    cache = _answer_cache(collection, filters)
+    if cache is not None and question_embedding is not None:
+        cache.store(question_embedding, {"answer": answer, "relevance_score": relevance_score}, version)
+
+async def _run_graph(question: str, question_embedding, version, collection: str,
+                     filters: Optional[SearchFilter]) -> dict:
+    """Answer a question with the workflow and remember the answer"""
+    result = await get_app_graph().ainvoke(initial_state(question, question_embedding, collection, filters))
+    
+    if should_continue(result) == "generate":
+        answer = result["answer"]
+    else:
+        answer = NO_ANSWER_MESSAGE
+    _store_cached_answer(question_embedding, version, answer, result["relevance_score"], collection, filters)
+    
+    return {"answer": answer, "relevance_score": result["relevance_score"]}
+
+async def _answer(question: str, collection: str, filters: Optional[SearchFilter]) -> dict:
+    """Answer a question from the answer cache or the workflow"""
+    question_embedding, version, cached = await _lookup_cached_answer(question, collection, filters)
+    if cached is not None:
+        return cached
+    return await _run_graph(question, question_embedding, version, collection, filters)
+
 @app.post("/ask/", response_model=QuestionResponse)
 async def ask_question(request: QuestionRequest):
-    """Ask a question about ingested documents"""
+    """Ask a question about the documents of a collection.
+
+    With ``coalesce_requests`` set, concurrent requests for the same
+    question (ignoring case and whitespace) against the same corpus version
+    share one workflow run.
+    """
+    _require_collection(request.collection)
+    filters = request.filters.to_search_filter() if request.filters else None
     try:
-        result = app_graph.invoke({
-            "question": request.question,
-            "context": [],
-            "answer": "",
-            "relevance_score": 0.0
-        })
-        
-        if result["relevance_score"] <= 0.5:
-            return QuestionResponse(
-                question=request.question,
-                answer="I couldn't find relevant information to answer your question.",
-                relevance_score=result["relevance_score"]
-            )
-        
-        return QuestionResponse(
-            question=request.question,
-            answer=result["answer"],
-            relevance_score=result["relevance_score"]
-        )
+        answer = partial(_answer, request.question, request.collection, filters)
+        if settings.coalesce_requests:
+            version = get_document_registry().version(request.collection)
+            key = question_key(request.question, request.collection, version, filters)
+            result = await get_question_flights().run(key, answer)
+        else:
+            result = await answer()
+        return QuestionResponse(question=request.question, **result)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/ask/batch")
+async def ask_batch(request: BatchQuestionRequest):
+    """Answer many questions at once, in input order.
+
+    All questions are embedded in one batched pass and at most
+    ``batch_concurrency`` workflows run against Ollama at a time. With
+    ``stream`` set, answers are sent as NDJSON lines as soon as they and all
+    earlier answers are ready. A failed question reports its own error.
+    """
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_max_questions} questions per batch"
+        )
+    _require_collection(request.collection)
+    filters = request.filters.to_search_filter() if request.filters else None
+    try:
+        with track("embed_questions"):
+            embeddings = await get_resources().aget("embeddings")
+            question_embeddings = await run_in_executor(embeddings.embed_queries, request.questions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    cache = _answer_cache(request.collection, filters)
+    version = cache.version if cache is not None else None
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+    
+    async def answer(question: str, question_embedding) -> dict:
+        try:
+            cached = cache.lookup(question_embedding) if cache is not None else None
+            if cached is not None:
+                return BatchAnswer(question=question, **cached).model_dump()
+            async with semaphore:
+                result = await _run_graph(question, question_embedding, version, request.collection, filters)
+            return BatchAnswer(question=question, **result).model_dump()
+        except Exception as e:
+            return BatchAnswer(question=question, error=str(e)).model_dump()
+    
+    tasks = [
+        asyncio.create_task(answer(question, question_embedding))
+        for question, question_embedding in zip(request.questions, question_embeddings)
+    ]
+    
+    if not request.stream:
+        return {"results": await asyncio.gather(*tasks)}
+    
+    async def ndjson():
+        try:
+            for task in tasks:
+                yield json.dumps(await task) + "\n"
+        finally:
+            # Stop outstanding work if the client goes away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+def _sse(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Ask a question and stream the relevance verdict followed by answer tokens (SSE)"""
+    _require_collection(request.collection)
+    filters = request.filters.to_search_filter() if request.filters else None
+    
+    async def event_stream():
+        try:
+            question_embedding, version, cached = await _lookup_cached_answer(request.question, request.collection, filters)
+            if cached is not None:
+                yield _sse("relevance", {
+                    "relevance_score": cached["relevance_score"],
+                    "relevant": cached["answer"] != NO_ANSWER_MESSAGE
+                })
+                yield _sse("token", {"text": cached["answer"]})
+                yield _sse("done", {"cached": True})
+                return
+            
+            relevance_score = 0.0
+            relevant = None
+            tokens = []
+            state = initial_state(request.question, question_embedding, request.collection, filters)
+            async for event in get_app_graph().astream_events(state, version="v2"):
+                if event["event"] == "on_chain_end" and event["name"] == "check_relevance":
+                    output = event["data"]["output"]
+                    relevance_score = output["relevance_score"]
+                    relevant = should_continue(output) == "generate"
+                    yield _sse("relevance", {
+                        "relevance_score": relevance_score,
+                        "relevant": relevant
+                    })
+                    if relevant:
+                        # Flush tokens generated speculatively before the verdict
+                        for text in tokens:
+                            yield _sse("token", {"text": text})
+                    else:
+                        tokens = [NO_ANSWER_MESSAGE]
+                        yield _sse("token", {"text": NO_ANSWER_MESSAGE})
+                
+                # Speculative generation runs the relevance LLM in the same node, so
+                # answer tokens are picked by the tag of the generating chain
+                elif event["event"] == "on_llm_stream" and ANSWER_TAG in event.get("tags", []):
+                    text = event["data"]["chunk"].text
+                    if relevant is None:
+                        tokens.append(text)
+                    elif relevant:
+                        tokens.append(text)
+                        yield _sse("token", {"text": text})
+            
+            _store_cached_answer(
+                question_embedding, version, "".join(tokens), relevance_score, request.collection, filters
+            )
+            yield _sse("done", {"cached": False})
+        
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/cache/stats")
+async def cache_stats(collection: str = DEFAULT_COLLECTION):
+    """Answer cache hit/miss counters of a collection"""
+    _require_collection(collection)
+    cache = get_answer_cache(collection)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/speculation/stats")
+async def speculation_statistics():
+    """How often speculative generation was used or cancelled"""
+    return {"enabled": settings.speculative_generation, **speculation_stats.to_dict()}
+
+@app.get("/coalescing/stats")
+async def coalescing_statistics():
+    """How many /ask/ requests joined an identical in-flight request"""
+    return {"enabled": settings.coalesce_requests, **get_question_flights().stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 until the startup phase has finished, with its profile"""
+    state = get_startup_state().to_dict()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from app.config import get_settings
+from app.utils.vectorstore import DEFAULT_COLLECTION
+from app.utils.metrics import record_cache_lookups
+
+settings = get_settings()
+
+@dataclass
+class CacheEntry:
+    """A cached graph result and the normalized embedding of its question"""
+    embedding: np.ndarray
+    result: dict
+    created_at: float
+    size: int
+
+class SemanticAnswerCache:
+    """Answer cache keyed by question embedding.
+
+    A lookup returns the entry whose question embedding has the highest
+    cosine similarity with the query, provided it reaches
+    ``similarity_threshold``. Entries are evicted least recently used first
+    once ``max_entries`` or ``max_bytes`` is exceeded, and expire after
+    ``ttl_seconds``. ``invalidate`` drops everything and bumps ``version``
+    so results computed against an older corpus are never stored.
+    """
+
+    def __init__(self, similarity_threshold: float, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._bytes = 0
+        # Stacked embeddings of all entries, rebuilt lazily after changes
+        self._keys = []
+        self._matrix = None
+
+    def lookup(self, embedding) -> Optional[dict]:
+        """Return the cached result for the nearest question, or None on a miss"""
+        query = _normalize(embedding)
+        with self._lock:
+            self._expire(time.monotonic())
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[key].embedding for key in self._keys])
+                scores = self._matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key = self._keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    record_cache_lookups("answer", 1, 0)
+                    return self._entries[key].result
+            self.misses += 1
+            record_cache_lookups("answer", 0, 1)
+            return None
+
+    def store(self, embedding, result: dict, version: int):
+        """Cache a result computed while the corpus was at ``version``"""
+        entry_embedding = _normalize(embedding)
+        size = entry_embedding.nbytes + sum(len(str(value)) for value in result.values())
+        with self._lock:
+            if version != self.version or size > self.max_bytes:
+                return
+            self._entries[self._next_key] = CacheEntry(entry_embedding, result, time.monotonic(), size)
+            self._next_key += 1
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop_oldest()
+                self.evictions += 1
+            self._matrix = None
+
+    def invalidate(self):
+        """Drop every entry because the document corpus changed"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+
+    def stats(self) -> dict:
+        """Counters used to tune the threshold and size limits"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "version": self.version
+            }
+
+    def _expire(self, now: float):
+        """Remove entries older than the TTL (oldest-inserted are checked first)"""
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            self._bytes -= self._entries.pop(key).size
+        if expired:
+            self._matrix = None
+
+    def _pop_oldest(self):
+        _, entry = self._entries.popitem(last=False)
+        self._bytes -= entry.size
+
+def _normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+_answer_caches = {}
+
+def get_answer_cache(collection: str = DEFAULT_COLLECTION) -> Optional[SemanticAnswerCache]:
+    """Return the process-wide answer cache of a collection, or None when caching is disabled"""
+    if not settings.answer_cache_enabled:
+        return None
+    if collection not in _answer_caches:
+        _answer_caches[collection] = SemanticAnswerCache(
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            max_entries=settings.answer_cache_max_entries,
+            max_bytes=settings.answer_cache_max_bytes,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
+    return _answer_caches[collection]
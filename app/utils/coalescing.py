@@ -0,0 +1,70 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+from app.utils.filters import SearchFilter
+from app.utils.metrics import COALESCED_REQUESTS
+
+def question_key(question: str, collection: str, corpus_version: int,
+                 filters: Optional[SearchFilter] = None) -> tuple:
+    """Requests with the same key get the same answer: case and whitespace are ignored"""
+    return (collection, corpus_version, repr(filters), " ".join(question.lower().split()))
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Runs at most one coroutine per key at a time; concurrent callers share its result.
+
+    The shared work runs in its own task, so one caller disconnecting does
+    not cancel it for the others; it is cancelled only when every caller
+    waiting for it has gone. Failures are propagated to all callers.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable]):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Later callers must start afresh rather than join a cancelled flight
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict:
+        requests = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / requests if requests else 0.0
+        }
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        # A newer flight may already use the key if this one was cancelled
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+_question_flights = SingleFlight()
+
+def get_question_flights() -> SingleFlight:
+    """Return the process-wide single-flight group of /ask/ requests"""
+    return _question_flights
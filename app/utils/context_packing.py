@@ -0,0 +1,107 @@
+import math
+import re
+from typing import List, Optional
+from langchain_core.documents import Document
+
+# Captures the whitespace after each sentence so line breaks survive packing
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])(\s+)")
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Cheap token estimate used to fit the prompt into the context window"""
+    return math.ceil(len(text) / chars_per_token)
+
+def _overlap(left: str, right: str, max_overlap: int, min_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    for size in range(min(len(left), len(right), max_overlap), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+class _Segment:
+    """Contiguous text from one source built from one or more chunks"""
+
+    def __init__(self, doc: Document, rank: int):
+        self.source = doc.metadata.get("source")
+        self.text = doc.page_content
+        self.rank = rank
+
+    def absorb(self, doc: Document, max_overlap: int, min_overlap: int) -> bool:
+        """Merge a chunk that overlaps either end of the segment"""
+        text = doc.page_content
+        if doc.metadata.get("source") != self.source:
+            return False
+        if text in self.text:
+            return True
+        if self.text in text:
+            self.text = text
+            return True
+        size = _overlap(self.text, text, max_overlap, min_overlap)
+        if size:
+            self.text += text[size:]
+            return True
+        size = _overlap(text, self.text, max_overlap, min_overlap)
+        if size:
+            self.text = text + self.text[size:]
+            return True
+        return False
+
+def pack_documents(documents: List[Document], token_budget: int, chars_per_token: float = 4.0,
+                   max_overlap: int = 400, min_overlap: int = 20) -> List[str]:
+    """Assemble ranked chunks into non-redundant context that fits a token budget.
+
+    Chunks from the same source whose ends overlap (as neighbouring splitter
+    chunks do) are merged into one passage, chunks contained in another are
+    dropped, and sentences already emitted by a better-ranked passage are
+    skipped. Passages are then added best-ranked first until the budget is
+    spent; the last one is cut at a sentence boundary if it does not fit.
+    """
+    segments = []
+    for rank, doc in enumerate(documents):
+        if not any(segment.absorb(doc, max_overlap, min_overlap) for segment in segments):
+            segments.append(_Segment(doc, rank))
+    
+    # A merge can make two segments overlap each other; fold those together too
+    merged = True
+    while merged:
+        merged = False
+        for i, segment in enumerate(segments):
+            for other in segments[i + 1:]:
+                if segment.absorb(Document(page_content=other.text, metadata={"source": other.source}),
+                                  max_overlap, min_overlap):
+                    segment.rank = min(segment.rank, other.rank)
+                    segments.remove(other)
+                    merged = True
+                    break
+            if merged:
+                break
+    
+    packed = []
+    seen = set()
+    remaining = token_budget
+    for segment in sorted(segments, key=lambda s: s.rank):
+        parts = SENTENCE_PATTERN.split(segment.text)
+        sentences = []
+        for sentence, separator in zip(parts[::2], parts[1::2] + [""]):
+            key = " ".join(sentence.lower().split())
+            # Short fragments such as headings are allowed to repeat
+            if len(key) > 30 and key in seen:
+                continue
+            seen.add(key)
+            sentences.append(sentence + separator)
+        
+        text = _fit(sentences, remaining, chars_per_token)
+        if text:
+            packed.append(text)
+            remaining -= estimate_tokens(text, chars_per_token)
+        if remaining <= 0:
+            break
+    return packed
+
+def _fit(sentences: List[str], budget: int, chars_per_token: float) -> Optional[str]:
+    """Join as many leading sentences as fit into ``budget`` tokens"""
+    text = ""
+    for sentence in sentences:
+        if estimate_tokens((text + sentence).strip(), chars_per_token) > budget:
+            break
+        text += sentence
+    return text.strip() or None
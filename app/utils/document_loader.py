@@ -1,31 +1,180 @@
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
 from app.config import get_settings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
+import multiprocessing
 
 settings = get_settings()
 
-def load_and_split_document(file_path: str) -> List:
-    """Load and split document into chunks"""
+_pdf_pool = None
+
+def get_loader(file_path: str):
+    """Pick a document loader based on the file extension"""
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
     file_extension = Path(file_path).suffix.lower()
     
     # Load document based on type
     if file_extension == '.pdf':
-        loader = PyPDFLoader(file_path)
+        return PyPDFLoader(file_path)
     elif file_extension in ['.txt', '.md']:
-        loader = TextLoader(file_path)
+        return TextLoader(file_path)
     else:
         raise ValueError(f"Unsupported file type: {file_extension}")
+
+class PerPageSplitter:
+    """Gives a LangChain splitter, which splits each page on its own, the streaming interface"""
+
+    def __init__(self, splitter):
+        self.splitter = splitter
+
+    def stream(self):
+        return self
+
+    def add(self, page: Document) -> List[Document]:
+        return self.splitter.split_documents([page])
+
+    def finish(self) -> List[Document]:
+        return []
+
+    def split_pages(self, pages: Iterable[Document]) -> Iterator[Document]:
+        for page in pages:
+            yield from self.add(page)
+
+def get_text_splitter():
+    """Create the splitter used for every ingested document.
+
+    Every splitter has ``stream()``, whose ``add(page)`` returns the chunks
+    completed by a page and ``finish()`` the rest, and ``split_pages``.
+    """
+    if settings.text_splitter == "recursive":
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        return PerPageSplitter(RecursiveCharacterTextSplitter(
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            length_function=len
+        ))
+    if settings.text_splitter != "offset":
+        raise ValueError(f"Unsupported text splitter: {settings.text_splitter}")
     
-    documents = loader.load()
+    from app.utils.text_splitter import OffsetTextSplitter
+
+    if settings.chunk_length_unit == "tokens":
+        from app.utils.resources import get_resources
+
+        return OffsetTextSplitter(
+            settings.chunk_size_tokens, settings.chunk_overlap_tokens, tokenizer=get_resources().tokenizer
+        )
+    if settings.chunk_length_unit != "chars":
+        raise ValueError(f"Unsupported chunk length unit: {settings.chunk_length_unit}")
+    return OffsetTextSplitter(settings.chunk_size, settings.chunk_overlap)
+
+def _get_pdf_pool():
+    """Return the process pool used to extract text from large PDFs"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        # Spawn rather than fork: the parent process runs event loop and client threads
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+def shutdown_pdf_pool():
+    """Stop the PDF extraction processes"""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[Document]:
+    """Extract pages [start, end) of a PDF; runs in a worker process"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    # Stripped like PyPDFLoader does, so both paths give the same chunks
+    return [
+        Document(page_content=reader.pages[page].extract_text().strip(), metadata={"source": file_path, "page": page})
+        for page in range(start, end)
+    ]
+
+def _iter_pdf_pages_parallel(file_path: str, num_pages: int) -> Iterator[Document]:
+    """Yield PDF pages in order while later page ranges are extracted in parallel"""
+    pool = _get_pdf_pool()
+    step = settings.pdf_pages_per_task
+    ranges = iter(range(0, num_pages, step))
+    # Bound the number of ranges in flight so memory stays flat for huge files
+    max_in_flight = settings.pdf_parse_workers * 2
+    pending = deque()
+    
+    for start in ranges:
+        pending.append(pool.submit(_extract_pdf_pages, file_path, start, min(start + step, num_pages)))
+        if len(pending) >= max_in_flight:
+            break
     
-    # Split documents
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
-        length_function=len
-    )
+    while pending:
+        pages = pending.popleft().result()
+        start = next(ranges, None)
+        if start is not None:
+            pending.append(pool.submit(_extract_pdf_pages, file_path, start, min(start + step, num_pages)))
+        yield from pages
+
+def iter_document_pages(file_path: str) -> Iterator[Document]:
+    """Yield the pages of a document one at a time"""
+    if Path(file_path).suffix.lower() == '.pdf' and settings.pdf_parse_workers > 1:
+        from pypdf import PdfReader
+
+        num_pages = len(PdfReader(file_path).pages)
+        if num_pages >= settings.pdf_parallel_min_pages:
+            return _iter_pdf_pages_parallel(file_path, num_pages)
     
-    splits = text_splitter.split_documents(documents)
-    return splits
+    return get_loader(file_path).lazy_load()
+
+def iter_text_segments(blocks: Iterable[bytes], source: str, segment_bytes: int) -> Iterator[Document]:
+    """Cut a stream of UTF-8 text into page-like segments at blank lines.
+
+    A segment ends at the first blank line after ``segment_bytes``. Text
+    without one is cut by ``2 * segment_bytes`` at the last line break, or
+    else the last space, so the buffer stays bounded. The cuts depend only on
+    the text and not on how it was delivered; a document uploaded twice in
+    differently sized parts gives the same chunks.
+    """
+    limit = 2 * segment_bytes
+    buffer = bytearray()
+    searched = 0
+    for block in blocks:
+        buffer += block
+        while len(buffer) > segment_bytes:
+            cut = buffer.find(b"\n\n", max(segment_bytes, searched), limit)
+            if cut != -1:
+                end = cut + 2
+            elif len(buffer) <= limit:
+                # Resume the search where it stopped, keeping a byte for a split separator
+                searched = len(buffer) - 1
+                break
+            else:
+                end = _fallback_cut(buffer, segment_bytes, limit)
+            yield Document(page_content=buffer[:end].decode("utf-8"), metadata={"source": source})
+            del buffer[:end]
+            searched = 0
+    if buffer:
+        yield Document(page_content=buffer.decode("utf-8"), metadata={"source": source})
+
+def _fallback_cut(buffer: bytearray, start: int, end: int) -> int:
+    """End of a segment without a blank line: after the last line break or space in [start, end)"""
+    for separator in (b"\n", b" ", b"\t"):
+        position = buffer.rfind(separator, start, end)
+        if position != -1:
+            return position + 1
+    # One long word: cut on a character boundary, never inside a multi-byte sequence
+    while end > start and buffer[end] & 0xC0 == 0x80:
+        end -= 1
+    return end
+
+def load_and_split_document(file_path: str) -> List:
+    """Load and split document into chunks"""
+    # Split as pages are read so the whole document is never held in memory twice
+    return list(get_text_splitter().split_pages(iter_document_pages(file_path)))
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+from langchain_core.documents import Document
+from app.config import get_settings
+from app.utils.vectorstore import DEFAULT_COLLECTION
+
+settings = get_settings()
+
+# Namespace for deterministic chunk ids
+CHUNK_NAMESPACE = uuid.UUID("6f1c8f0e-4d3a-4c55-9a57-0d5e2b9a7c11")
+
+# Chunk metadata that locates a chunk in its document rather than describing it
+POSITION_KEYS = ("start_index", "end_index")
+
+def save_and_hash(source: BinaryIO, path: str, block_size: int = 1024 * 1024) -> str:
+    """Copy an uploaded file to ``path`` and return the SHA-256 of its contents"""
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        while block := source.read(block_size):
+            digest.update(block)
+            f.write(block)
+    return digest.hexdigest()
+
+def chunk_id(document_id: str, chunk: Document, occurrence: int = 0) -> str:
+    """Stable id for a chunk, so an unchanged chunk keeps its id across uploads.
+
+    ``occurrence`` tells apart identical chunks within one document. The
+    character span is left out, so an edit early in a document does not
+    change the id of every chunk after it.
+    """
+    metadata = {k: v for k, v in chunk.metadata.items() if k not in POSITION_KEYS}
+    key = json.dumps([document_id, chunk.page_content, metadata, occurrence], sort_keys=True, default=str)
+    return str(uuid.uuid5(CHUNK_NAMESPACE, key))
+
+class DocumentRegistry:
+    """Collections and their uploaded documents, kept in a JSON file.
+
+    Each document record holds its content hash and chunk ids. The default
+    collection always exists. Each collection also has an in-memory corpus
+    version, bumped whenever its chunks change.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._collections = {}
+        self._versions = defaultdict(int)
+        if self.path.exists():
+            self._collections = json.loads(self.path.read_text())["collections"]
+        self._collections.setdefault(DEFAULT_COLLECTION, {"created_at": time.time(), "documents": {}})
+
+    def has_collection(self, collection: str) -> bool:
+        with self._lock:
+            return collection in self._collections
+
+    def create_collection(self, collection: str) -> bool:
+        """Register a new collection; False if it already exists"""
+        with self._lock:
+            if collection in self._collections:
+                return False
+            self._collections[collection] = {"created_at": time.time(), "documents": {}}
+            self._save()
+            return True
+
+    def drop_collection(self, collection: str):
+        with self._lock:
+            self._collections.pop(collection, None)
+            self._save()
+
+    def list_collections(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "created_at": entry["created_at"],
+                    "documents": len(entry["documents"]),
+                    "chunks": sum(len(record["chunk_ids"]) for record in entry["documents"].values())
+                }
+                for name, entry in self._collections.items()
+            ]
+
+    def version(self, collection: str) -> int:
+        with self._lock:
+            return self._versions[collection]
+
+    def bump_version(self, collection: str):
+        with self._lock:
+            self._versions[collection] += 1
+
+    def get(self, collection: str, document_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._collections[collection]["documents"].get(document_id)
+
+    def list(self, collection: str) -> List[dict]:
+        with self._lock:
+            return [
+                {**{k: v for k, v in record.items() if k != "chunk_ids"}, "chunks": len(record["chunk_ids"])}
+                for record in self._collections[collection]["documents"].values()
+            ]
+
+    def put(self, collection: str, document_id: str, filename: str, content_hash: str, chunk_ids: List[str]):
+        with self._lock:
+            self._collections[collection]["documents"][document_id] = {
+                "document_id": document_id,
+                "filename": filename,
+                "content_hash": content_hash,
+                "chunk_ids": chunk_ids,
+                "updated_at": time.time()
+            }
+            self._save()
+
+    def remove(self, collection: str, document_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._collections[collection]["documents"].pop(document_id, None)
+            if record is not None:
+                self._save()
+            return record
+
+    def _save(self):
+        # Write to a temporary file first so a crash never leaves a truncated registry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"collections": self._collections}))
+        os.replace(tmp_path, self.path)
+
+_document_registry = None
+
+def get_document_registry() -> DocumentRegistry:
+    """Return the process-wide document registry"""
+    global _document_registry
+    if _document_registry is None:
+        _document_registry = DocumentRegistry(settings.document_registry_path)
+    return _document_registry
+
+def assign_chunk_ids(document_id: str, chunks: List[Document], occurrences: Dict[str, int]) -> List[str]:
+    """Tag chunks with their document id and return their stable ids.
+
+    ``occurrences`` counts chunks already seen for this document and is
+    updated in place, so it must be shared across the batches of one upload.
+    """
+    ids = []
+    for chunk in chunks:
+        key = chunk_id(document_id, chunk)
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        ids.append(chunk_id(document_id, chunk, occurrence) if occurrence else key)
+        chunk.metadata["document_id"] = document_id
+    return ids
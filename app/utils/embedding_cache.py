@@ -0,0 +1,182 @@
+import fcntl
+import hashlib
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.utils.metrics import record_cache_lookups
+
+KEY_SIZE = 16
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so cosmetic whitespace changes still hit the cache"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """Content address of an embedding: hash of (model name, normalized text)"""
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.digest()
+
+class EmbeddingStore:
+    """Append-only on-disk embedding store, shared by every worker process.
+
+    Vectors live in ``vectors.f32`` as a row-major float32 matrix that is
+    memory-mapped for reads; ``keys.bin`` holds the 16-byte key of each row
+    in the same order and is loaded into an in-memory index, and ``dim``
+    records the vector dimension. Appends hold an exclusive ``flock`` on
+    ``lock`` and first read the keys other processes appended, so row
+    numbers always come from the files rather than from this process's
+    view of them. Rows are written before their keys, so a crash mid-append
+    can only leave unreferenced trailing rows or a torn trailing key, which
+    are truncated by the next writer.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.f32"
+        self._keys_path = self.directory / "keys.bin"
+        self._dim_path = self.directory / "dim"
+        self._lock_path = self.directory / "lock"
+        self._lock = threading.Lock()
+        self._index = {}
+        self._rows = 0
+        self._dim = None
+        self._matrix = None
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._repair()
+            self._refresh()
+
+    def __len__(self):
+        return len(self._index)
+
+    def get_many(self, keys: List[bytes]) -> List:
+        """Return the stored vector for each key, or None where it is missing"""
+        with self._lock:
+            if any(key not in self._index for key in keys):
+                # Other workers may have stored them since the last read
+                with self._file_lock(fcntl.LOCK_SH):
+                    self._refresh()
+            rows = [self._index.get(key) for key in keys]
+            return [None if row is None else self._matrix[row].tolist() for row in rows]
+
+    def put_many(self, keys: List[bytes], vectors: List[List[float]]):
+        """Append vectors for keys that are not stored yet"""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._repair()
+            self._refresh()
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._index and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+            
+            array = np.asarray(list(new.values()), dtype=np.float32)
+            if self._dim is None:
+                self._dim = array.shape[1]
+                self._dim_path.write_text(str(self._dim))
+            elif array.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match cache dimension {self._dim}")
+            
+            with open(self._vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new))
+            self._refresh()
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _repair(self):
+        """Drop the remains of an interrupted append; needs the exclusive file lock"""
+        if not self._dim_path.exists() or not self._keys_path.exists():
+            return
+        dim = int(self._dim_path.read_text())
+        keys_size = self._keys_path.stat().st_size
+        if keys_size % KEY_SIZE:
+            # A torn key would misalign every key appended after it
+            with open(self._keys_path, "r+b") as f:
+                f.truncate(keys_size - keys_size % KEY_SIZE)
+        # Rows from an append whose keys were never written
+        size = keys_size // KEY_SIZE * dim * 4
+        if self._vectors_path.exists() and self._vectors_path.stat().st_size > size:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(size)
+
+    def _refresh(self):
+        """Index the keys appended since the last read; row numbers are positions in ``keys.bin``"""
+        if not self._dim_path.exists() or not self._keys_path.exists():
+            return
+        if self._dim is None:
+            self._dim = int(self._dim_path.read_text())
+        known = self._rows
+        with open(self._keys_path, "rb") as f:
+            f.seek(known * KEY_SIZE)
+            raw = f.read()
+        rows = known + len(raw) // KEY_SIZE
+        if rows == known:
+            return
+        for row in range(known, rows):
+            offset = (row - known) * KEY_SIZE
+            self._index.setdefault(raw[offset:offset + KEY_SIZE], row)
+        self._rows = rows
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document embeddings from an EmbeddingStore.
+
+    Only chunks missing from the store are sent to the wrapped model; query
+    embeddings are passed through uncached.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model_name: str):
+        self.embeddings = embeddings
+        self.store = store
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.model_name, text) for text in texts]
+        vectors = self.store.get_many(keys)
+        
+        # Embed each missing text once, even if it appears several times
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+        hits = len(texts) - sum(vector is None for vector in vectors)
+        self.hits += hits
+        self.misses += len(missing)
+        record_cache_lookups("embedding", hits, len(missing))
+        
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            self.store.put_many(list(missing), computed)
+            by_key = dict(zip(missing, computed))
+            vectors = [by_key[keys[i]] if vector is None else vector for i, vector in enumerate(vectors)]
+        
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_queries(texts)
+
+    def close(self):
+        self.embeddings.close()
@@ -0,0 +1,93 @@
+import threading
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingEngine(Embeddings):
+    """Sentence-transformers embeddings tuned for bulk ingestion.
+
+    Texts are sorted by length before encoding so each batch holds chunks
+    of similar size and little compute is spent on padding; results are
+    returned in the original order. With ``num_processes > 1`` large
+    inputs are spread over a pool of CPU worker processes, which is
+    started on first use and stopped by ``close``.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, bucket_by_length: bool = True,
+                 num_processes: int = 0, device: str = "cpu", normalize: bool = True):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.bucket_by_length = bucket_by_length
+        self.num_processes = num_processes
+        self.device = device
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._model = None
+        self._pool = None
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+            return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        
+        order = np.arange(len(texts))
+        if self.bucket_by_length:
+            order = np.argsort([len(text) for text in texts], kind="stable")
+        ordered = [texts[i] for i in order]
+        
+        # Only worth the inter-process overhead when every worker gets several batches
+        if self.num_processes > 1 and len(texts) >= self.batch_size * self.num_processes:
+            vectors = self.model.encode_multi_process(
+                ordered,
+                self._get_pool(),
+                batch_size=self.batch_size,
+                chunk_size=self.batch_size * 4,
+                normalize_embeddings=self.normalize
+            )
+        else:
+            vectors = self.model.encode(
+                ordered,
+                batch_size=self.batch_size,
+                normalize_embeddings=self.normalize,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(
+            text,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many questions in one batched pass"""
+        # The model is symmetric, so questions are encoded exactly like documents
+        return self.embed_documents(texts)
+
+    def close(self):
+        """Stop the worker processes, if any were started"""
+        with self._lock:
+            if self._pool is not None:
+                self._model.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+    def _get_pool(self):
+        model = self.model
+        with self._lock:
+            if self._pool is None:
+                self._pool = model.start_multi_process_pool(["cpu"] * self.num_processes)
+            return self._pool
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.config import get_settings
+
+settings = get_settings()
+
+_executor = None
+
+def get_executor():
+    """Return the bounded thread pool used for blocking work"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.executor_max_workers,
+            thread_name_prefix="docqa-worker"
+        )
+    return _executor
+
+async def run_in_executor(func, *args, **kwargs):
+    """Run a blocking function on the shared executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+class StageLimit:
+    """Caps how many calls of one latency-budgeted stage may occupy executor threads.
+
+    A budget stops the caller from waiting but cannot stop a thread that is
+    already running, so each call keeps its slot until its thread returns.
+    Calls abandoned after their budget thus cannot pile up on the shared
+    executor; once every slot is taken new calls fail at once.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                raise TimeoutError(f"Too many {self.name} calls still running")
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+async def run_limited(limit: StageLimit, func, *args, **kwargs):
+    """``run_in_executor`` holding a slot of ``limit`` until the call has returned.
+
+    Cancelling the caller (for example when its budget runs out) drops a
+    call that has not started yet; a running call finishes in the background.
+    """
+    limit.acquire()
+    try:
+        future = get_executor().submit(partial(func, *args, **kwargs))
+    except BaseException:
+        limit.release()
+        raise
+    future.add_done_callback(lambda _: limit.release())
+    # Cancelling the wrapper cancels the call only if no thread has picked it up yet
+    return await asyncio.wrap_future(future)
+
+def shutdown_executor():
+    """Wait for queued work to finish and release the worker threads"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
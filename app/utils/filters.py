@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+@dataclass
+class SearchFilter:
+    """Metadata conditions applied inside vector and keyword queries.
+
+    Pages are the loader's page numbers and ``uploaded_*`` bounds are Unix
+    timestamps compared with the time a chunk was first uploaded. Chunks
+    without a page number never match a page range.
+    """
+    document_ids: Optional[List[str]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    uploaded_after: Optional[float] = None
+    uploaded_before: Optional[float] = None
+
+    def to_weaviate(self):
+        """Equivalent Weaviate filter, or None when there are no conditions"""
+        from weaviate.classes.query import Filter
+
+        conditions = []
+        if self.document_ids is not None:
+            # Exact matches because collections tokenize document_id as a whole field
+            conditions.append(Filter.by_property("document_id").contains_any(self.document_ids))
+        if self.page_from is not None:
+            conditions.append(Filter.by_property("page").greater_or_equal(self.page_from))
+        if self.page_to is not None:
+            conditions.append(Filter.by_property("page").less_or_equal(self.page_to))
+        if self.uploaded_after is not None:
+            conditions.append(Filter.by_property("uploaded_at").greater_or_equal(self.uploaded_after))
+        if self.uploaded_before is not None:
+            conditions.append(Filter.by_property("uploaded_at").less_or_equal(self.uploaded_before))
+
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else Filter.all_of(conditions)
@@ -0,0 +1,32 @@
+from typing import List, Tuple
+from langchain_core.documents import Document
+
+def chunk_key(doc: Document) -> str:
+    """Identity of a chunk across the result lists of one store"""
+    # Both result lists come from the same store, so identical text means the same chunk
+    return doc.id or doc.page_content
+
+def reciprocal_rank_fusion(result_lists: List[List[Tuple[Document, float]]], rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank) for each document"""
+    fused = {}
+    for results in result_lists:
+        for rank, (doc, _) in enumerate(results, start=1):
+            key = chunk_key(doc)
+            entry = fused.setdefault(key, [doc, 0.0])
+            entry[1] += 1.0 / (rrf_k + rank)
+    return sorted(((doc, score) for doc, score in fused.values()), key=lambda item: item[1], reverse=True)
+
+def weighted_fusion(vector_results: List[Tuple[Document, float]], keyword_results: List[Tuple[Document, float]],
+                    vector_weight: float = 0.5) -> List[Tuple[Document, float]]:
+    """Merge two result lists by a weighted sum of min-max normalized scores"""
+    fused = {}
+    for results, weight in ((vector_results, vector_weight), (keyword_results, 1 - vector_weight)):
+        if not results:
+            continue
+        scores = [score for _, score in results]
+        low, high = min(scores), max(scores)
+        for doc, score in results:
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            entry = fused.setdefault(chunk_key(doc), [doc, 0.0])
+            entry[1] += weight * normalized
+    return sorted(((doc, score) for doc, score in fused.values()), key=lambda item: item[1], reverse=True)
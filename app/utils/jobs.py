@@ -0,0 +1,430 @@
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+from app.config import get_settings
+from app.utils.document_loader import iter_document_pages, iter_text_segments, get_text_splitter
+from app.utils.resources import get_resources
+from app.utils.answer_cache import get_answer_cache
+from app.utils.documents import get_document_registry, assign_chunk_ids
+from app.utils.metrics import INGEST_STAGE_SECONDS, INGEST_ERRORS, INGESTED_CHUNKS
+from app.utils.uploads import UploadSession
+
+settings = get_settings()
+
+# Marks the end of a stage's output
+_DONE = object()
+
+@dataclass
+class IngestionJob:
+    """Progress of one uploaded document through the ingestion pipeline"""
+    id: str
+    filename: str
+    file_path: str
+    document_id: str
+    content_hash: Optional[str]
+    collection: str
+    upload: Optional[UploadSession] = None
+    status: str = "queued"
+    pages_parsed: int = 0
+    chunks_split: int = 0
+    chunks_prefetched: int = 0
+    chunks_unchanged: int = 0
+    chunks_embedded: int = 0
+    chunks_inserted: int = 0
+    chunks_deleted: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "document_id": self.document_id,
+            "collection": self.collection,
+            "status": self.status,
+            "pages_parsed": self.pages_parsed,
+            "chunks_split": self.chunks_split,
+            "chunks_prefetched": self.chunks_prefetched,
+            "chunks_unchanged": self.chunks_unchanged,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_inserted": self.chunks_inserted,
+            "chunks_deleted": self.chunks_deleted,
+            "elapsed_seconds": elapsed,
+            "chunks_per_second": self.chunks_inserted / elapsed if elapsed else 0.0,
+            "errors": self.errors
+        }
+
+class IngestionQueue:
+    """Queue of uploaded files processed by a pool of background workers.
+
+    Each job runs parse -> split -> embed -> insert as concurrent stages
+    connected by bounded queues, so a batch is embedded while the previous
+    one is written to the vector store and the next pages are parsed.
+
+    Chunks get stable ids derived from their document id and content, so
+    re-uploading a document only embeds and inserts the chunks that changed
+    and deletes the ones that disappeared; an identical upload is skipped.
+    Jobs for the same document run one at a time.
+
+    Text uploaded in parts can be embedded while it is still arriving: such
+    a streaming job splits and embeds the upload's contiguous prefix into
+    the embedding cache, outside the worker pool and without the document
+    lock, so a slow client never holds either. Chunks are only stored once
+    the upload is complete and its checksum verified, by the regular
+    pipeline, which then finds the vectors in the cache.
+    """
+
+    def __init__(self, workers: int, batch_size: int, stage_queue_size: int, history: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.stage_queue_size = stage_queue_size
+        self.history = history
+        self._jobs = OrderedDict()
+        self._queue = None
+        self._tasks = []
+        self._streams = set()
+        self._executor = None
+        self._document_locks = defaultdict(asyncio.Lock)
+
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._queue = asyncio.Queue()
+        # Each running job keeps up to three stages busy at once
+        self._executor = ThreadPoolExecutor(max_workers=self.workers * 3, thread_name_prefix="docqa-ingest")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers and release their threads"""
+        tasks = self._tasks + list(self._streams)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._streams = set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, file_path: str, filename: str, document_id: str, content_hash: str,
+               collection: str) -> IngestionJob:
+        """Queue a saved file for ingestion into a collection and return its job"""
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            filename=filename,
+            file_path=file_path,
+            document_id=document_id,
+            content_hash=content_hash,
+            collection=collection
+        )
+        self._jobs[job.id] = job
+        self._forget_finished_jobs()
+        self._queue.put_nowait(job)
+        return job
+
+    def start_streaming(self, upload: UploadSession) -> IngestionJob:
+        """Start embedding a text upload while its parts are still arriving"""
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            filename=upload.filename,
+            file_path=str(upload.path),
+            document_id=upload.document_id,
+            content_hash=None,
+            collection=upload.collection,
+            upload=upload
+        )
+        self._jobs[job.id] = job
+        self._forget_finished_jobs()
+        task = asyncio.create_task(self._stream(job))
+        self._streams.add(task)
+        task.add_done_callback(self._streams.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    async def delete_document(self, collection: str, document_id: str) -> Optional[dict]:
+        """Remove a document and all of its chunks; None if it is unknown"""
+        registry = get_document_registry()
+        async with self._document_locks[(collection, document_id)]:
+            record = registry.get(collection, document_id)
+            if record is None:
+                return None
+            vectorstore = await get_resources().aget_vectorstore(collection)
+            deleted = await self._call(vectorstore.delete_document, document_id)
+            registry.remove(collection, document_id)
+        _corpus_changed(collection)
+        return {"document_id": document_id, "filename": record["filename"], "chunks_deleted": deleted}
+
+    async def drop_collection(self, collection: str):
+        """Delete a collection with all of its documents"""
+        await self._call(get_resources().drop_vectorstore, collection)
+        get_document_registry().drop_collection(collection)
+        _corpus_changed(collection)
+
+    def _forget_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        async with self._document_locks[(job.collection, job.document_id)]:
+            await self._ingest(job)
+
+    async def _stream(self, job: IngestionJob):
+        """Embed a text upload as it arrives, then ingest it once it is complete"""
+        try:
+            await self._prefetch(job)
+        except BaseException as e:
+            # Stop accepting parts for an upload whose job has failed
+            job.upload.abort()
+            job.status = "failed" if isinstance(e, Exception) else "cancelled"
+            job.errors.append(str(e) or type(e).__name__)
+            job.finished_at = time.time()
+            Path(job.file_path).unlink(missing_ok=True)
+            if not isinstance(e, Exception):
+                raise
+            return
+        job.content_hash = job.upload.content_hash
+        await self._run(job)
+
+    async def _prefetch(self, job: IngestionJob):
+        """Split and embed an upload's chunks as its parts arrive, without storing them.
+
+        Returns once the upload is complete; raises if it is aborted or
+        expires first.
+        """
+        job.status = "receiving"
+        embeddings = await get_resources().aget("embeddings")
+        splitter = (await self._call(get_text_splitter)).stream()
+        stop = threading.Event()
+
+        def produce():
+            segments = iter_text_segments(job.upload.iter_blocks(stop), job.file_path, settings.upload_segment_bytes)
+            texts = []
+            for segment in itertools.chain(segments, [None]):
+                if stop.is_set():
+                    return
+                chunks = splitter.finish() if segment is None else splitter.add(segment)
+                texts.extend(chunk.page_content for chunk in chunks)
+                while texts and (len(texts) >= self.batch_size or segment is None):
+                    batch, texts = texts[:self.batch_size], texts[self.batch_size:]
+                    # Only warms the embedding cache for the ingestion that follows
+                    embeddings.embed_documents(batch)
+                    job.chunks_prefetched += len(batch)
+
+        try:
+            # Waits for parts for as long as the client takes, so keep it off the stage threads
+            await asyncio.to_thread(produce)
+        finally:
+            stop.set()
+
+    async def _ingest(self, job: IngestionJob):
+        job.status = "running"
+        job.started_at = time.time()
+        registry = get_document_registry()
+        if not registry.has_collection(job.collection):
+            job.status = "failed"
+            job.errors.append(f"Collection '{job.collection}' no longer exists")
+            job.finished_at = time.time()
+            Path(job.file_path).unlink(missing_ok=True)
+            return
+        previous = registry.get(job.collection, job.document_id)
+        if previous is not None and previous["content_hash"] == job.content_hash:
+            job.status = "unchanged"
+            job.finished_at = time.time()
+            Path(job.file_path).unlink(missing_ok=True)
+            return
+        
+        existing = set(previous["chunk_ids"]) if previous else set()
+        chunk_ids = []
+        inserted = []
+        pages = asyncio.Queue(maxsize=self.stage_queue_size)
+        batches = asyncio.Queue(maxsize=self.stage_queue_size)
+        embedded = asyncio.Queue(maxsize=self.stage_queue_size)
+        stop = threading.Event()
+        stages = [
+            asyncio.create_task(self._stage("parse", self._parse(job, pages, stop))),
+            asyncio.create_task(self._stage("split", self._split(job, pages, batches, existing, chunk_ids))),
+            asyncio.create_task(self._stage("embed", self._embed(job, batches, embedded))),
+            asyncio.create_task(self._stage("insert", self._insert(job, embedded, inserted)))
+        ]
+        try:
+            await asyncio.gather(*stages)
+            # Chunks of the previous version that no longer occur
+            stale = list(existing.difference(chunk_ids))
+            if stale:
+                vectorstore = await get_resources().aget_vectorstore(job.collection)
+                await self._call(vectorstore.delete, stale)
+                job.chunks_deleted = len(stale)
+            registry.put(job.collection, job.document_id, job.filename, job.content_hash, chunk_ids)
+            job.status = "completed"
+        except BaseException as e:
+            for stage in stages:
+                stage.cancel()
+            # Let the parsing thread notice the failure if it is blocked on a full queue
+            stop.set()
+            while not pages.empty():
+                pages.get_nowait()
+            if not isinstance(e, Exception):
+                job.status = "cancelled"
+                raise
+            job.status = "failed"
+            job.errors.append(str(e))
+            # Roll back so the store keeps matching the registered version
+            if inserted:
+                try:
+                    vectorstore = await get_resources().aget_vectorstore(job.collection)
+                    await self._call(vectorstore.delete, inserted)
+                except Exception as rollback_error:
+                    job.errors.append(f"Rollback failed: {rollback_error}")
+        finally:
+            job.finished_at = time.time()
+            Path(job.file_path).unlink(missing_ok=True)
+            # Cached answers may be stale once any chunk has been written
+            if job.chunks_inserted or job.chunks_deleted:
+                _corpus_changed(job.collection)
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _stage(self, name: str, coroutine):
+        """Run a pipeline stage, counting its failures"""
+        try:
+            await coroutine
+        except Exception:
+            INGEST_ERRORS.labels(name).inc()
+            raise
+
+    async def _parse(self, job: IngestionJob, pages: asyncio.Queue, stop: threading.Event):
+        """Stage 1: read pages lazily on a worker thread"""
+        loop = asyncio.get_running_loop()
+
+        def produce():
+            if job.upload is not None:
+                document_pages = iter_text_segments(
+                    job.upload.iter_blocks(stop), job.file_path, settings.upload_segment_bytes
+                )
+            else:
+                document_pages = iter_document_pages(job.file_path)
+            while True:
+                with INGEST_STAGE_SECONDS.labels("parse").time():
+                    page = next(document_pages, None)
+                if page is None or stop.is_set():
+                    return
+                # Blocks the parsing thread while the split stage is behind
+                asyncio.run_coroutine_threadsafe(pages.put(page), loop).result()
+
+        await self._call(produce)
+        await pages.put(_DONE)
+
+    async def _split(self, job: IngestionJob, pages: asyncio.Queue, batches: asyncio.Queue,
+                     existing: set, chunk_ids: List[str]):
+        """Stage 2: split pages into chunks and group the new ones into embedding batches"""
+        splitter = (await self._call(get_text_splitter)).stream()
+        occurrences = {}
+        batch = []
+
+        def split(page):
+            # Splitting and tokenizing are CPU-bound, so they run on a stage thread
+            with INGEST_STAGE_SECONDS.labels("split").time():
+                chunks = splitter.finish() if page is _DONE else splitter.add(page)
+            for chunk in chunks:
+                # The temporary upload path changes on every upload
+                chunk.metadata["source"] = job.filename
+            ids = assign_chunk_ids(job.document_id, chunks, occurrences)
+            for chunk in chunks:
+                # Added after the ids are assigned so unchanged chunks keep their id on re-upload
+                chunk.metadata["uploaded_at"] = job.created_at
+            return chunks, ids
+
+        while True:
+            page = await pages.get()
+            if page is not _DONE:
+                job.pages_parsed += 1
+            chunks, ids = await self._call(split, page)
+            job.chunks_split += len(chunks)
+            chunk_ids.extend(ids)
+            for chunk, id_ in zip(chunks, ids):
+                if id_ in existing:
+                    job.chunks_unchanged += 1
+                else:
+                    batch.append((chunk, id_))
+            while len(batch) >= self.batch_size:
+                await batches.put(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+            if page is _DONE:
+                break
+        if batch:
+            await batches.put(batch)
+        await batches.put(_DONE)
+
+    async def _embed(self, job: IngestionJob, batches: asyncio.Queue, embedded: asyncio.Queue):
+        """Stage 3: embed each batch of chunks"""
+        embeddings = await get_resources().aget("embeddings")
+        while (batch := await batches.get()) is not _DONE:
+            with INGEST_STAGE_SECONDS.labels("embed").time():
+                vectors = await self._call(embeddings.embed_documents, [doc.page_content for doc, _ in batch])
+            job.chunks_embedded += len(batch)
+            await embedded.put((batch, vectors))
+        await embedded.put(_DONE)
+
+    async def _insert(self, job: IngestionJob, embedded: asyncio.Queue, inserted: List[str]):
+        """Stage 4: write embedded chunks to the vector store"""
+        vectorstore = await get_resources().aget_vectorstore(job.collection)
+        while (item := await embedded.get()) is not _DONE:
+            batch, vectors = item
+            ids = [id_ for _, id_ in batch]
+            with INGEST_STAGE_SECONDS.labels("insert").time():
+                await self._call(
+                    vectorstore.add_vectors,
+                    [doc.page_content for doc, _ in batch],
+                    vectors,
+                    [doc.metadata for doc, _ in batch],
+                    ids
+                )
+            inserted.extend(ids)
+            job.chunks_inserted += len(batch)
+            INGESTED_CHUNKS.inc(len(batch))
+
+def _corpus_changed(collection: str):
+    """Bump the collection's corpus version and drop its cached answers"""
+    get_document_registry().bump_version(collection)
+    cache = get_answer_cache(collection)
+    if cache is not None:
+        cache.invalidate()
+
+_ingestion_queue = None
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Return the process-wide ingestion queue"""
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        _ingestion_queue = IngestionQueue(
+            workers=settings.ingest_workers,
+            batch_size=settings.ingest_batch_size,
+            stage_queue_size=settings.ingest_stage_queue_size,
+            history=settings.ingest_job_history
+        )
+    return _ingestion_queue
@@ -0,0 +1,110 @@
+import math
+import re
+import threading
+from array import array
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Words plus identifiers joined by . _ - / such as "ERR-1001" or "config.yaml"
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:[._\-/][A-Za-z0-9]+)*")
+PART_PATTERN = re.compile(r"[._\-/]")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms; compound identifiers are indexed whole and by part"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if PART_PATTERN.search(token):
+            tokens.extend(part for part in PART_PATTERN.split(token) if part)
+    return tokens
+
+class KeywordIndex:
+    """Incremental in-memory BM25 index.
+
+    Rows are numbered in insertion order. Each term maps to a pair of
+    compact arrays: the rows containing it (uint32) and the term frequency
+    in each row (uint16). Removed rows are only masked out, so scores stay
+    cheap to compute with a few vectorized numpy operations per query term.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._lengths = array("I")
+        self._live = bytearray()
+        self._live_count = 0
+        self._live_length = 0
+
+    def __len__(self):
+        return self._live_count
+
+    def add(self, text: str) -> int:
+        """Index a chunk and return its row number"""
+        counts = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        
+        with self._lock:
+            row = len(self._lengths)
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("H"))
+                postings[0].append(row)
+                postings[1].append(min(count, 65535))
+            self._lengths.append(len(tokens))
+            self._live.append(1)
+            self._live_count += 1
+            self._live_length += len(tokens)
+        return row
+
+    def remove(self, row: int):
+        """Exclude a row from future results"""
+        with self._lock:
+            if self._live[row]:
+                self._live[row] = 0
+                self._live_count -= 1
+                self._live_length -= self._lengths[row]
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to k (row, BM25 score) pairs, best first.
+
+        ``mask`` optionally restricts the result to rows where it is True.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._live_count:
+                return []
+            
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+            average_length = self._live_length / self._live_count or 1.0
+            live = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+            scores = np.zeros(len(lengths), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                rows = np.frombuffer(postings[0], dtype=np.uint32)
+                frequencies = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                # Removed rows keep their postings but must not make the term look common
+                document_frequency = int(live[rows].sum())
+                if not document_frequency:
+                    continue
+                idf = math.log(1 + (self._live_count - document_frequency + 0.5) / (document_frequency + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[rows] / average_length)
+                scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+            
+            scores[~live] = 0
+            if mask is not None:
+                scores[~mask[:len(scores)]] = 0
+        
+        matches = int((scores > 0).sum())
+        k = min(k, matches)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
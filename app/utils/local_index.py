@@ -0,0 +1,327 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+from uuid import uuid4
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.utils.keyword_index import KeywordIndex
+from app.utils.filters import SearchFilter
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store backed by files in ``directory``.
+
+    ``vectors.f32`` is an append-only float32 matrix of normalized
+    embeddings, memory-mapped for search. ``records.jsonl`` is the metadata
+    sidecar: one ``add`` record per matrix row (id, text, metadata) and
+    ``delete`` records for tombstoned ids. Rows are written before their
+    records so an interrupted append never leaves a record without a vector.
+
+    In ``exact`` mode every query is a single matrix-vector product. In
+    ``ivf`` mode rows are clustered with k-means into ``nlist`` inverted
+    lists and a query only scores the rows of its ``nprobe`` nearest
+    clusters; small corpora (below ``ivf_min_rows``) are still searched
+    exactly.
+
+    A BM25 keyword index over the same rows is kept in memory, updated on
+    every add/delete and rebuilt from the sidecar on open.
+
+    The document id, page and upload time of each row are also kept as
+    arrays, so a filtered query builds a row mask and only scores the rows
+    that pass it.
+    """
+
+    def __init__(self, directory: str, embedding: Embeddings, mode: str = "exact",
+                 nlist: int = 256, nprobe: int = 8, ivf_min_rows: int = 10000,
+                 bm25_k1: float = 1.2, bm25_b: float = 0.75):
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unsupported local index mode: {mode}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._embedding = embedding
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ivf_min_rows = ivf_min_rows
+        self._vectors_path = self.directory / "vectors.f32"
+        self._records_path = self.directory / "records.jsonl"
+        self._meta_path = self.directory / "index.json"
+        self._lock = threading.RLock()
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._rows = {}
+        self._live = np.zeros(0, dtype=bool)
+        # Filterable metadata per row: document code, page (-1 if none), upload time (NaN if none)
+        self._document_codes = {}
+        self._row_documents = np.zeros(0, dtype=np.int32)
+        self._row_pages = np.zeros(0, dtype=np.int32)
+        self._row_uploaded = np.zeros(0, dtype=np.float64)
+        self._dim = None
+        self._matrix = None
+        # IVF state: centroids, the list of each row, and rows trained on
+        self._centroids = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_rows = 0
+        self._keywords = KeywordIndex(k1=bm25_k1, b=bm25_b)
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def __len__(self):
+        return int(self._live.sum())
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(texts, vectors, metadatas, ids=ids)
+
+    def add_vectors(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None,
+                    ids: Optional[List[str]] = None) -> List[str]:
+        """Store texts with embeddings that were computed beforehand"""
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid4()) for _ in texts]
+        array = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        
+        with self._lock:
+            if self._dim is None:
+                self._dim = array.shape[1]
+                self._meta_path.write_text(json.dumps({"dim": self._dim}))
+            elif array.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match index dimension {self._dim}")
+            
+            # Re-adding an id replaces the previous row
+            self._tombstone([id_ for id_ in ids if id_ in self._rows])
+            
+            with open(self._vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                for id_, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"op": "add", "id": id_, "text": text, "metadata": metadata}, default=str) + "\n")
+            
+            self._append_rows(ids, texts, metadatas)
+            self._map()
+            if self._centroids is not None:
+                self._assignments = np.concatenate([self._assignments, self._nearest_centroids(array)])
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        with self._lock:
+            ids = [id_ for id_ in ids if id_ in self._rows]
+            if ids:
+                with open(self._records_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"op": "delete", "ids": ids}) + "\n")
+                self._tombstone(ids)
+        return True
+
+    def delete_document(self, document_id: str) -> int:
+        """Delete every chunk of a document"""
+        with self._lock:
+            ids = [id_ for id_, row in self._rows.items() if self._metadatas[row].get("document_id") == document_id]
+            self.delete(ids)
+        return len(ids)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, vector: Optional[List[float]] = None,
+                                     filters: Optional[SearchFilter] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        """Return the k most similar documents with their cosine similarity.
+
+        ``vector`` may carry a precomputed query embedding, matching the
+        keyword accepted by the Weaviate store.
+        """
+        if vector is None:
+            vector = self._embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(vector, k, filters)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        query = _normalize_rows(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            if self._matrix is None or k <= 0:
+                return []
+            mask = self._live if filters is None else self._filter_mask(filters)
+            candidates = self._candidates(query, mask)
+            if candidates is None:
+                scores = self._matrix @ query
+                scores[~mask] = -np.inf
+                rows = np.arange(len(scores))
+            else:
+                scores = self._matrix[candidates] @ query
+                rows = candidates
+            
+            k = min(k, int(np.isfinite(scores).sum()))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._document(int(rows[i])), float(scores[i])) for i in top]
+
+    def keyword_search(self, query: str, k: int = 4,
+                       filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        """Return the k best BM25 matches with their scores"""
+        with self._lock:
+            mask = None if filters is None else self._filter_mask(filters)
+        return [(self._document(row), score) for row, score in self._keywords.search(query, k, mask)]
+
+    def drop(self):
+        """Delete the index files and forget every row"""
+        with self._lock:
+            self._matrix = None
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   *, directory: str = "data/local_index", **kwargs: Any) -> "LocalVectorStore":
+        store = cls(directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas)
+        return store
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self._texts[row], metadata=dict(self._metadatas[row]), id=self._ids[row])
+
+    def _candidates(self, query: np.ndarray, mask: np.ndarray) -> Optional[np.ndarray]:
+        """Rows to score among those allowed by ``mask``, or None to score every row"""
+        if self.mode != "ivf" or mask.sum() < self.ivf_min_rows:
+            # A filtered query scores only the rows that pass the filter
+            return None if mask is self._live else np.flatnonzero(mask)
+        # Retrain once the index has doubled since the last training
+        if self._centroids is None or len(self._ids) >= 2 * self._trained_rows:
+            self._train()
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        return np.flatnonzero(np.isin(self._assignments, probes) & mask)
+
+    def _filter_mask(self, filters: SearchFilter) -> np.ndarray:
+        """Live rows whose metadata passes the filter"""
+        mask = self._live.copy()
+        if filters.document_ids is not None:
+            codes = [self._document_codes[id_] for id_ in filters.document_ids if id_ in self._document_codes]
+            mask &= np.isin(self._row_documents, codes)
+        if filters.page_from is not None:
+            mask &= self._row_pages >= filters.page_from
+        if filters.page_to is not None:
+            mask &= (self._row_pages >= 0) & (self._row_pages <= filters.page_to)
+        # Comparisons with NaN are False, so rows without an upload time never match
+        if filters.uploaded_after is not None:
+            mask &= self._row_uploaded >= filters.uploaded_after
+        if filters.uploaded_before is not None:
+            mask &= self._row_uploaded <= filters.uploaded_before
+        return mask
+
+    def _filter_columns(self, metadatas):
+        """Filterable metadata of new rows as arrays"""
+        documents = np.array([
+            self._document_codes.setdefault(metadata.get("document_id"), len(self._document_codes))
+            for metadata in metadatas
+        ], dtype=np.int32)
+        pages = np.array([metadata.get("page", -1) for metadata in metadatas], dtype=np.int32)
+        uploaded = np.array([metadata.get("uploaded_at", np.nan) for metadata in metadatas], dtype=np.float64)
+        return documents, pages, uploaded
+
+    def _train(self, iterations: int = 10):
+        """Cluster the stored vectors with k-means to build the inverted lists"""
+        rng = np.random.default_rng(0)
+        live = np.flatnonzero(self._live)
+        sample = self._matrix[rng.choice(live, size=min(len(live), self.nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(self.nlist, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = sample[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+        self._centroids = centroids
+        self._assignments = self._nearest_centroids(self._matrix)
+        self._trained_rows = len(self._ids)
+
+    def _nearest_centroids(self, vectors: np.ndarray, batch: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[i:i + batch] @ self._centroids.T, axis=1).astype(np.int32)
+            for i in range(0, len(vectors), batch)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int32)
+
+    def _append_rows(self, ids, texts, metadatas):
+        start = len(self._ids)
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        for offset, id_ in enumerate(ids):
+            self._rows[id_] = start + offset
+        for text in texts:
+            self._keywords.add(text)
+        self._live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+        documents, pages, uploaded = self._filter_columns(metadatas)
+        self._row_documents = np.concatenate([self._row_documents, documents])
+        self._row_pages = np.concatenate([self._row_pages, pages])
+        self._row_uploaded = np.concatenate([self._row_uploaded, uploaded])
+
+    def _tombstone(self, ids):
+        for id_ in ids:
+            row = self._rows.pop(id_)
+            self._live[row] = False
+            self._keywords.remove(row)
+
+    def _map(self):
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self._dim))
+
+    def _load(self):
+        if not self._meta_path.exists() or not self._records_path.exists():
+            return
+        self._dim = json.loads(self._meta_path.read_text())["dim"]
+        raw = self._records_path.read_bytes()
+        complete = raw.rfind(b"\n") + 1
+        if complete < len(raw):
+            # A crash mid-append left a partial last record; later appends must start on a new line
+            _truncate(self._records_path, complete)
+        records = [json.loads(line) for line in raw[:complete].decode("utf-8").splitlines() if line.strip()]
+
+        live = []
+        for record in records:
+            if record["op"] == "add":
+                if record["id"] in self._rows:
+                    live[self._rows[record["id"]]] = False
+                self._rows[record["id"]] = len(self._ids)
+                self._ids.append(record["id"])
+                self._texts.append(record["text"])
+                self._metadatas.append(record["metadata"])
+                live.append(True)
+            else:
+                for id_ in record["ids"]:
+                    if id_ in self._rows:
+                        live[self._rows.pop(id_)] = False
+        self._live = np.array(live, dtype=bool)
+        self._row_documents, self._row_pages, self._row_uploaded = self._filter_columns(self._metadatas)
+        for row, text in enumerate(self._texts):
+            self._keywords.add(text)
+            if not live[row]:
+                self._keywords.remove(row)
+        _truncate(self._vectors_path, len(self._ids) * self._dim * 4)
+        if self._ids:
+            self._map()
+
+def _truncate(path: Path, size: int):
+    """Cut a file back to ``size`` bytes, dropping the tail of an interrupted append"""
+    if path.exists() and path.stat().st_size > size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
@@ -0,0 +1,91 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from prometheus_client import Counter, Histogram
+
+# Latency buckets from 5 ms to 2 minutes, covering searches up to long generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+REQUEST_SECONDS = Histogram(
+    "docqa_http_request_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+NODE_SECONDS = Histogram(
+    "docqa_node_seconds", "Latency of each LangGraph node", ["node"], buckets=LATENCY_BUCKETS
+)
+NODE_ERRORS = Counter("docqa_node_errors_total", "LangGraph node failures", ["node"])
+OPERATION_SECONDS = Histogram(
+    "docqa_operation_seconds", "Latency of embedding and search calls", ["operation"], buckets=LATENCY_BUCKETS
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "docqa_ingest_stage_seconds", "Time per page or batch in each ingestion stage", ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+INGEST_ERRORS = Counter("docqa_ingest_errors_total", "Ingestion stage failures", ["stage"])
+INGESTED_CHUNKS = Counter("docqa_ingested_chunks_total", "Chunks written to the vector store")
+PROMPT_TOKENS = Histogram(
+    "docqa_prompt_tokens", "Estimated prompt size sent to the LLM", ["node"], buckets=SIZE_BUCKETS
+)
+GENERATED_TOKENS = Counter("docqa_generated_tokens_total", "Tokens streamed back by the LLM", ["node"])
+CACHE_LOOKUPS = Counter("docqa_cache_lookups_total", "Cache lookups by outcome", ["cache", "result"])
+COALESCED_REQUESTS = Counter(
+    "docqa_coalesced_requests_total", "Questions answered by joining an identical in-flight request"
+)
+
+# (name, seconds) pairs recorded while handling the current request, for the Server-Timing header
+_server_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+def start_server_timing() -> List[Tuple[str, float]]:
+    """Collect timings for the current request and return the list they are added to"""
+    timings = []
+    _server_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format timings as a Server-Timing header value (durations in milliseconds)"""
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+def _record_timing(name: str, seconds: float):
+    timings = _server_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def track(operation: str):
+    """Time a block as an operation in the histogram and the Server-Timing header"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        OPERATION_SECONDS.labels(operation).observe(elapsed)
+        _record_timing(operation, elapsed)
+
+def instrument_node(node: str):
+    """Decorator timing an async graph node and counting its failures"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(state):
+            start = time.perf_counter()
+            try:
+                return await func(state)
+            except Exception:
+                NODE_ERRORS.labels(node).inc()
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                NODE_SECONDS.labels(node).observe(elapsed)
+                _record_timing(node, elapsed)
+        return wrapper
+    return decorator
+
+def record_cache_lookups(cache: str, hits: int, misses: int):
+    """Count cache hits and misses"""
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
@@ -0,0 +1,159 @@
+import threading
+from pathlib import Path
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+def onnx_model_dir(root: str, model_name: str) -> Path:
+    """Directory holding the exported ONNX files of a sentence-transformers model"""
+    return Path(root) / model_name.replace("/", "__")
+
+def export_onnx_model(model_name: str, directory: str, quantize: bool = True, max_seq_length: int = 256) -> Path:
+    """Export a sentence-transformers model's transformer to ONNX.
+
+    Writes ``model.onnx`` and ``tokenizer.json`` into ``directory`` and, with
+    ``quantize``, an int8 dynamically quantized ``model.int8.onnx``. Needs
+    PyTorch, so it runs once at build time; serving only needs ONNX Runtime
+    and ``tokenizers``. Returns the path of the model the engine will load.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(str(directory))
+
+    sample = tokenizer(["warmup"], padding="max_length", max_length=max_seq_length, return_tensors="pt")
+    inputs = ("input_ids", "attention_mask", "token_type_ids")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in inputs}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in inputs),
+            str(directory / MODEL_FILE),
+            input_names=list(inputs),
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            # The TorchScript exporter honours dynamic_axes; the dynamo exporter is the default from torch 2.9
+            dynamo=False
+        )
+
+    if not quantize:
+        return directory / MODEL_FILE
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(directory / MODEL_FILE), str(directory / QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+    return directory / QUANTIZED_MODEL_FILE
+
+class OnnxEmbeddingEngine(Embeddings):
+    """Sentence-transformers embeddings computed with ONNX Runtime on the CPU.
+
+    Runs the exported transformer and reproduces the model's mean pooling
+    and normalization in numpy, so neither PyTorch nor sentence-transformers
+    is imported at serving time. One tokenizer and one inference session are
+    shared by every thread. Like ``EmbeddingEngine``, texts are sorted by
+    length so each batch is padded only to its own longest text.
+    """
+
+    def __init__(self, model_name: str, model_dir: str, quantized: bool = True, batch_size: int = 64,
+                 bucket_by_length: bool = True, max_seq_length: int = 256, intra_op_threads: int = 0,
+                 normalize: bool = True):
+        self.model_name = model_name
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.batch_size = batch_size
+        self.bucket_by_length = bucket_by_length
+        self.max_seq_length = max_seq_length
+        self.intra_op_threads = intra_op_threads
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._session = None
+        self._tokenizer = None
+        self._input_names = None
+
+    @property
+    def model_path(self) -> Path:
+        return self.model_dir / (QUANTIZED_MODEL_FILE if self.quantized else MODEL_FILE)
+
+    def _load(self):
+        with self._lock:
+            if self._session is None:
+                import onnxruntime
+                from tokenizers import Tokenizer
+
+                if not self.model_path.exists():
+                    export_onnx_model(self.model_name, str(self.model_dir), self.quantized, self.max_seq_length)
+
+                tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER_FILE))
+                tokenizer.enable_truncation(max_length=self.max_seq_length)
+                tokenizer.enable_padding()
+
+                options = onnxruntime.SessionOptions()
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if self.intra_op_threads > 0:
+                    options.intra_op_num_threads = self.intra_op_threads
+                session = onnxruntime.InferenceSession(
+                    str(self.model_path), options, providers=["CPUExecutionProvider"]
+                )
+                self._input_names = {i.name for i in session.get_inputs()}
+                self._tokenizer = tokenizer
+                self._session = session
+            return self._session, self._tokenizer
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        session, tokenizer = self._load()
+        encodings = tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+        hidden = session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, as in the model's Pooling module
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        order = np.arange(len(texts))
+        if self.bucket_by_length:
+            order = np.argsort([len(text) for text in texts], kind="stable")
+
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batches.append(self._encode([texts[i] for i in order[start:start + self.batch_size]]))
+        vectors = np.concatenate(batches)
+
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many questions in one batched pass"""
+        return self.embed_documents(texts)
+
+    def close(self):
+        """Release the inference session"""
+        with self._lock:
+            self._session = None
+            self._tokenizer = None
@@ -0,0 +1,29 @@
+from typing import List
+import numpy as np
+
+def similarity_relevance(similarities: List[float], floor: float, ceiling: float) -> float:
+    """Map the best question/chunk cosine similarity linearly onto [0, 1].
+
+    Similarities at or below ``floor`` score 0 and at or above ``ceiling``
+    score 1, which turns raw bi-encoder similarities into a score that can
+    share the threshold used by the other relevance modes.
+    """
+    if not similarities:
+        return 0.0
+    return float(np.clip((max(similarities) - floor) / (ceiling - floor), 0.0, 1.0))
+
+def cross_encoder_scores(model, question: str, chunks: List[str], batch_size: int = 32) -> List[float]:
+    """Score every (question, chunk) pair in one batched cross-encoder pass"""
+    if not chunks:
+        return []
+    import torch
+
+    # ms-marco models are configured to return raw logits; the sigmoid puts them on the
+    # same [0, 1] scale as the relevance threshold
+    scores = model.predict(
+        [(question, chunk) for chunk in chunks],
+        batch_size=batch_size,
+        show_progress_bar=False,
+        activation_fct=torch.nn.Sigmoid()
+    )
+    return [float(score) for score in np.atleast_1d(scores)]
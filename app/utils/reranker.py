@@ -0,0 +1,63 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from langchain_core.documents import Document
+from app.utils.relevance import cross_encoder_scores
+from app.utils.metrics import record_cache_lookups
+
+class Reranker:
+    """Cross-encoder reranker with an LRU cache of scored (question, chunk) pairs.
+
+    Only pairs missing from the cache are sent to the model, in batches of
+    ``batch_size``. A ``deadline`` is checked between batches, since a
+    running ``predict`` cannot be interrupted.
+    """
+
+    def __init__(self, model, cache_size: int = 10000, batch_size: int = 32):
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def rerank(self, question: str, documents: List[Document], top_n: int,
+               deadline: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """Return the top_n documents by cross-encoder score, best first.
+
+        Raises TimeoutError once ``time.monotonic()`` passes ``deadline``
+        with pairs left to score; the batches scored so far stay cached.
+        """
+        keys = [_pair_key(question, doc.page_content) for doc in documents]
+        with self._lock:
+            scores = [self._cache.get(key) for key in keys]
+            for key, score in zip(keys, scores):
+                if score is not None:
+                    self._cache.move_to_end(key)
+        
+        missing = [i for i, score in enumerate(scores) if score is None]
+        record_cache_lookups("rerank", len(keys) - len(missing), len(missing))
+        for start in range(0, len(missing), self.batch_size):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Reranking stopped with {len(missing) - start} pairs left to score")
+            batch = missing[start:start + self.batch_size]
+            computed = cross_encoder_scores(
+                self.model, question, [documents[i].page_content for i in batch], self.batch_size
+            )
+            with self._lock:
+                for i, score in zip(batch, computed):
+                    scores[i] = score
+                    self._cache[keys[i]] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)
+        return ranked[:top_n]
+
+def _pair_key(question: str, text: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(question.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
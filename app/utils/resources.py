@@ -0,0 +1,230 @@
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+from pathlib import Path
+from app.config import get_settings
+from app.utils.executor import run_in_executor
+from app.utils.vectorstore import (
+    get_embeddings, embedding_model_id, create_weaviate_client, create_vectorstore, create_local_vectorstore, DEFAULT_COLLECTION
+)
+from app.utils.embedding_cache import CachedEmbeddings, EmbeddingStore
+from app.utils.reranker import Reranker
+
+settings = get_settings()
+
+class ResourceRegistry:
+    """Clients that are expensive to create and are shared by every request.
+
+    Each resource is created on first access (or by ``warmup``) and reused
+    for the lifetime of the worker process. ``close`` releases the network
+    connections and is called from the FastAPI lifespan on shutdown.
+
+    Every resource has its own lock, held only while that resource is
+    being created, so loading one model never blocks access to another.
+    Async code uses ``aget``/``aget_vectorstore``, which run a first load
+    on the executor instead of the event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = defaultdict(threading.Lock)
+        self._embeddings = None
+        self._client = None
+        self._vectorstores = {}
+        self._llm = None
+        self._relevance_llm = None
+        self._cross_encoder = None
+        self._reranker = None
+        self._tokenizer = None
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks[name]
+
+    def _get_or_create(self, name: str, factory):
+        """Return ``self._<name>``, creating it under its own lock on first use"""
+        attribute = f"_{name}"
+        value = getattr(self, attribute)
+        if value is None:
+            with self._lock_for(name):
+                value = getattr(self, attribute)
+                if value is None:
+                    value = factory()
+                    setattr(self, attribute, value)
+        return value
+
+    async def aget(self, name: str):
+        """Return a resource, creating it on the executor if it does not exist yet"""
+        value = getattr(self, f"_{name}")
+        if value is not None:
+            return value
+        return await run_in_executor(getattr, self, name)
+
+    async def aget_vectorstore(self, collection: str):
+        """Async ``get_vectorstore`` that opens a new store on the executor"""
+        vectorstore = self._vectorstores.get(collection)
+        if vectorstore is not None:
+            return vectorstore
+        return await run_in_executor(self.get_vectorstore, collection)
+
+    @property
+    def embeddings(self):
+        def create():
+            embeddings = get_embeddings()
+            if settings.embedding_cache_enabled:
+                # One store per model since vector dimensions differ between models
+                model_id = embedding_model_id()
+                store = EmbeddingStore(Path(settings.embedding_cache_dir) / model_id.replace("/", "__"))
+                embeddings = CachedEmbeddings(embeddings, store, model_id)
+            return embeddings
+
+        return self._get_or_create("embeddings", create)
+
+    @property
+    def tokenizer(self):
+        """Tokenizer of the embedding model, used to size chunks in tokens"""
+        def create():
+            from tokenizers import Tokenizer
+
+            name = settings.embedding_model
+            tokenizer = Tokenizer.from_pretrained(name if "/" in name else f"sentence-transformers/{name}")
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+            return tokenizer
+
+        return self._get_or_create("tokenizer", create)
+
+    @property
+    def client(self):
+        return self._get_or_create("client", create_weaviate_client)
+
+    @property
+    def vectorstore(self):
+        """Vector store of the default collection"""
+        return self.get_vectorstore(DEFAULT_COLLECTION)
+
+    def get_vectorstore(self, collection: str):
+        """Vector store of a named collection"""
+        vectorstore = self._vectorstores.get(collection)
+        if vectorstore is not None:
+            return vectorstore
+        with self._lock_for(f"vectorstore:{collection}"):
+            if collection not in self._vectorstores:
+                if settings.vector_backend == "local":
+                    vectorstore = create_local_vectorstore(self.embeddings, collection)
+                elif settings.vector_backend == "weaviate":
+                    vectorstore = create_vectorstore(self.client, self.embeddings, collection)
+                else:
+                    raise ValueError(f"Unsupported vector backend: {settings.vector_backend}")
+                self._vectorstores[collection] = vectorstore
+            return self._vectorstores[collection]
+
+    def drop_vectorstore(self, collection: str):
+        """Delete a collection's stored chunks and forget its vector store"""
+        vectorstore = self.get_vectorstore(collection)
+        with self._lock_for(f"vectorstore:{collection}"):
+            vectorstore.drop()
+            self._vectorstores.pop(collection, None)
+
+    @property
+    def llm(self):
+        """LLM used to generate answers"""
+        def create():
+            from langchain_ollama import OllamaLLM
+
+            return OllamaLLM(
+                model=settings.llm_model,
+                base_url=settings.ollama_base_url
+            )
+
+        return self._get_or_create("llm", create)
+
+    @property
+    def relevance_llm(self):
+        """LLM used to score relevance; it only needs to emit a number"""
+        def create():
+            from langchain_ollama import OllamaLLM
+
+            return OllamaLLM(
+                model=settings.llm_model,
+                base_url=settings.ollama_base_url,
+                temperature=0,
+                num_predict=settings.relevance_max_tokens
+            )
+
+        return self._get_or_create("relevance_llm", create)
+
+    @property
+    def cross_encoder(self):
+        """Cross-encoder that scores (question, chunk) pairs on the CPU"""
+        def create():
+            from sentence_transformers import CrossEncoder
+
+            return CrossEncoder(settings.relevance_cross_encoder_model, device="cpu")
+
+        return self._get_or_create("cross_encoder", create)
+
+    @property
+    def reranker(self):
+        """Reranker sharing the relevance cross-encoder"""
+        return self._get_or_create("reranker", lambda: Reranker(
+            self.cross_encoder,
+            cache_size=settings.rerank_cache_size,
+            batch_size=settings.rerank_batch_size
+        ))
+
+    def warmup(self, phase=lambda name: nullcontext()):
+        """Load the embedding model, open the vector store and load the LLM.
+
+        ``phase(name)`` returns a context manager wrapped around each step,
+        which the startup phase uses to time them.
+        """
+        with phase("embeddings"):
+            self.embeddings.embed_query("warmup")
+        with phase("vectorstore"):
+            self.vectorstore
+        if settings.text_splitter == "offset" and settings.chunk_length_unit == "tokens":
+            with phase("tokenizer"):
+                self.tokenizer
+        if settings.relevance_mode == "cross_encoder" or settings.rerank_enabled:
+            with phase("cross_encoder"):
+                self.cross_encoder.predict([("warmup", "warmup")])
+        # A one-token completion makes Ollama load the model into memory
+        with phase("llm"):
+            self.relevance_llm.invoke("Reply with 1.")
+
+    def close(self):
+        """Close open connections and drop every cached resource"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            if self._embeddings is not None:
+                self._embeddings.close()
+            for llm in (self._llm, self._relevance_llm):
+                if llm is not None:
+                    _close_llm(llm)
+            self._embeddings = None
+            self._client = None
+            self._vectorstores = {}
+            self._llm = None
+            self._relevance_llm = None
+            self._cross_encoder = None
+            self._reranker = None
+            self._tokenizer = None
+
+    async def aclose(self):
+        """Async variant of ``close`` that also closes async HTTP clients"""
+        for llm in (self._llm, self._relevance_llm):
+            if llm is not None:
+                await llm._async_client._client.aclose()
+        self.close()
+
+def _close_llm(llm):
+    """Close the HTTP connection pool held by an OllamaLLM"""
+    llm._client._client.close()
+
+_registry = ResourceRegistry()
+
+def get_resources():
+    """Return the process-wide resource registry"""
+    return _registry
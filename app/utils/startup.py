@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class StartupCancelled(Exception):
+    """Raised at the next startup step once the worker is shutting down"""
+
+class StartupState:
+    """Progress of the worker's startup phase.
+
+    The phase compiles the workflow and loads models after the server is
+    already accepting connections, so liveness is answered immediately and
+    readiness flips once ``run_startup`` has finished. Each step is timed
+    for the startup profile reported by ``/health/ready``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created_at = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.ready = False
+        self.ready_after: Optional[float] = None
+        self.error: Optional[str] = None
+        self.warmup_error: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time one startup step"""
+        if self._cancelled.is_set():
+            raise StartupCancelled(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def cancel(self):
+        """Skip the remaining startup steps; the step already running still finishes"""
+        self._cancelled.set()
+
+    def mark_ready(self):
+        with self._lock:
+            self.ready = True
+            self.ready_after = time.perf_counter() - self.created_at
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "ready_after_seconds": self.ready_after,
+                "phases": [{"name": name, "seconds": seconds} for name, seconds in self.phases],
+                "error": self.error,
+                "warmup_error": self.warmup_error
+            }
+
+def run_startup(state: StartupState):
+    """Compile the workflow and warm up models, then mark the worker ready.
+
+    A failed warmup is not fatal (resources are created on first use), but
+    a workflow that cannot be compiled leaves the worker unready.
+    """
+    from app.agents.graph import get_app_graph
+    from app.utils.resources import get_resources
+
+    try:
+        with state.phase("compile_graph"):
+            get_app_graph()
+    except StartupCancelled:
+        return
+    except Exception as e:
+        state.error = str(e)
+        logger.exception("Startup failed, worker stays unready")
+        return
+
+    if settings.warmup_on_startup:
+        try:
+            get_resources().warmup(state.phase)
+        except StartupCancelled:
+            return
+        except Exception as e:
+            state.warmup_error = str(e)
+            logger.warning("Warmup failed, resources will be created on first use: %s", e)
+    state.mark_ready()
+
+def start_startup(state: StartupState) -> threading.Thread:
+    """Run the startup phase on its own daemon thread.
+
+    It stays off the shared executor so shutting that down never waits for
+    a model that is still loading; ``state.cancel()`` skips the steps that
+    have not started yet.
+    """
+    thread = threading.Thread(target=run_startup, args=(state,), name="docqa-startup", daemon=True)
+    thread.start()
+    return thread
+
+_state = StartupState()
+
+def get_startup_state():
+    """Return the startup state of this worker process"""
+    return _state
@@ -0,0 +1,173 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional, Sequence
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ")
+PAGE_SEPARATOR = "\n\n"
+_WHITESPACE = re.compile(r"\s")
+
+class OffsetTextSplitter:
+    """Splits a document in one pass over its text, without re-splitting and re-joining strings.
+
+    Pages are appended to one buffer, separated by a blank line, and each
+    chunk is a ``(start, end)`` span of that buffer: a window of
+    ``chunk_size`` units is cut at the last separator in its second half,
+    trying separators in order, and the next window starts ``chunk_overlap``
+    units before the cut, at a word boundary. Only the chunk texts are
+    copied out of the buffer.
+
+    Units are characters, or tokens when a ``tokenizers.Tokenizer`` is
+    given, so chunks can be sized for the embedding model. Chunks may cross
+    pages; their metadata is that of the page they start on, plus
+    ``page_end`` for PDFs and the ``start_index``/``end_index`` character
+    span in the document.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, tokenizer=None,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
+        self.separators = separators
+
+    def stream(self) -> "SplitStream":
+        """Start splitting a document whose pages arrive one at a time"""
+        return SplitStream(self)
+
+    def split_pages(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Split the pages of one document, yielding chunks as soon as they are complete"""
+        stream = self.stream()
+        for page in pages:
+            yield from stream.add(page)
+        yield from stream.finish()
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Split each document on its own, like LangChain's splitters"""
+        return [chunk for document in documents for chunk in self.split_pages([document])]
+
+    def token_starts(self, text: str) -> List[int]:
+        """Character offset of every token of ``text``"""
+        return [start for start, _ in self.tokenizer.encode(text, add_special_tokens=False).offsets]
+
+class SplitStream:
+    """Split state of one document.
+
+    Positions are absolute offsets into the document text; only the part
+    of the text after the start of the next chunk is kept in memory.
+    """
+
+    def __init__(self, splitter: OffsetTextSplitter):
+        self.splitter = splitter
+        self._text = ""
+        self._base = 0
+        self._length = 0
+        self._start = 0
+        self._emitted_end = 0
+        self._page_starts: List[int] = []
+        self._page_metadata: List[dict] = []
+        self._tokens: Optional[List[int]] = [] if splitter.tokenizer is not None else None
+
+    def add(self, page: Document) -> List[Document]:
+        """Append a page and return the chunks that can no longer change"""
+        separator = PAGE_SEPARATOR if self._length else ""
+        page_start = self._length + len(separator)
+        self._text += separator + page.page_content
+        self._length = page_start + len(page.page_content)
+        self._page_starts.append(page_start)
+        self._page_metadata.append(page.metadata)
+        if self._tokens is not None:
+            self._tokens.extend(page_start + start for start in self.splitter.token_starts(page.page_content))
+        return self._emit(final=False)
+
+    def finish(self) -> List[Document]:
+        """Return the remaining chunks once every page was added"""
+        return self._emit(final=True)
+
+    def _emit(self, final: bool) -> List[Document]:
+        splitter = self.splitter
+        chunks = []
+        while self._start < self._length:
+            window_end = self._advance(self._start, splitter.chunk_size)
+            if window_end is None:
+                # Less than a full window is left; more pages may still extend it
+                if not final:
+                    break
+                end = next_start = self._length
+            else:
+                end = self._cut(self._start, window_end)
+                next_start = self._overlap_start(self._start, end)
+            if end > self._emitted_end:
+                chunk = self._chunk(self._start, end)
+                if chunk is not None:
+                    chunks.append(chunk)
+                self._emitted_end = end
+            self._start = next_start
+        self._trim()
+        return chunks
+
+    def _advance(self, position: int, units: int) -> Optional[int]:
+        """Offset ``units`` after ``position``, or None if the text ends before"""
+        if self._tokens is None:
+            return position + units if self._length - position > units else None
+        index = bisect_left(self._tokens, position)
+        return self._tokens[index + units] if len(self._tokens) - index > units else None
+
+    def _retreat(self, position: int, units: int) -> int:
+        """Offset ``units`` before ``position``"""
+        if self._tokens is None:
+            return position - units
+        index = bisect_left(self._tokens, position)
+        return self._tokens[max(index - units, 0)]
+
+    def _cut(self, start: int, window_end: int) -> int:
+        """End of the chunk: just after the best separator in the second half of the window"""
+        low = start + (window_end - start) // 2
+        for separator in self.splitter.separators:
+            index = self._text.rfind(separator, low - self._base, window_end - self._base)
+            if index != -1:
+                return self._base + index + len(separator)
+        return window_end
+
+    def _overlap_start(self, start: int, end: int) -> int:
+        """Start of the next chunk: the overlap before ``end``, moved to the next word"""
+        if not self.splitter.chunk_overlap:
+            return end
+        position = self._retreat(end, self.splitter.chunk_overlap)
+        if position <= start:
+            return end
+        match = _WHITESPACE.search(self._text, position - self._base, end - self._base)
+        return self._base + match.end() if match else position
+
+    def _chunk(self, start: int, end: int) -> Optional[Document]:
+        text = self._text
+        while start < end and text[start - self._base].isspace():
+            start += 1
+        while end > start and text[end - 1 - self._base].isspace():
+            end -= 1
+        if start == end:
+            return None
+        first_page = bisect_right(self._page_starts, start) - 1
+        metadata = dict(self._page_metadata[first_page])
+        if "page" in metadata:
+            last_page = bisect_right(self._page_starts, end - 1) - 1
+            metadata["page_end"] = self._page_metadata[last_page].get("page", metadata["page"])
+        metadata["start_index"] = start
+        metadata["end_index"] = end
+        return Document(page_content=text[start - self._base:end - self._base], metadata=metadata)
+
+    def _trim(self):
+        """Drop text and pages that no future chunk can reach"""
+        drop = self._start - self._base
+        if drop <= 0:
+            return
+        self._text = self._text[drop:]
+        self._base = self._start
+        # Keep the page the next chunk starts on
+        pages = max(bisect_right(self._page_starts, self._start) - 1, 0)
+        del self._page_starts[:pages]
+        del self._page_metadata[:pages]
+        if self._tokens is not None:
+            del self._tokens[:bisect_left(self._tokens, self._start)]
@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from app.config import get_settings
+from app.utils.executor import run_in_executor
+
+settings = get_settings()
+
+# Size of the reads used to hash and stream the staging file
+READ_BLOCK_SIZE = 1024 * 1024
+
+class PartWriter:
+    """Writes one part of an upload straight into its slot of the staging file.
+
+    The part is only recorded as received by ``commit``, once its length and
+    checksum have been verified. A part that was already received is
+    hashed but not written again, so a retried request can never change the
+    bytes of a file that is already being ingested.
+    """
+
+    def __init__(self, upload: "UploadSession", index: int):
+        self.upload = upload
+        self.index = index
+        self.offset, self.length = upload.part_range(index)
+        self.written = 0
+        self._digest = hashlib.sha256()
+        self._fd = None if index in upload.received else os.open(upload.path, os.O_WRONLY)
+
+    def write(self, data: bytes):
+        if self.written + len(data) > self.length:
+            raise ValueError(f"Part {self.index} is larger than its {self.length} bytes")
+        if self._fd is not None:
+            os.pwrite(self._fd, data, self.offset + self.written)
+        self._digest.update(data)
+        self.written += len(data)
+
+    def commit(self, expected_sha256: Optional[str] = None) -> str:
+        """Verify the part and mark it received; returns its SHA-256"""
+        self.close()
+        if self.written != self.length:
+            raise ValueError(f"Part {self.index} has {self.written} bytes, expected {self.length}")
+        sha256 = self._digest.hexdigest()
+        if expected_sha256 is not None and sha256 != expected_sha256.lower():
+            raise ValueError(f"Part {self.index} checksum mismatch")
+        self.upload.mark_received(self.index, sha256)
+        return sha256
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class UploadSession:
+    """A resumable upload assembled from fixed-size parts in a staging file.
+
+    Parts may arrive in any order and be retried. The SHA-256 of the whole
+    file is computed as the contiguous prefix of received parts grows, so it
+    is ready as soon as the last part arrives, and ``iter_blocks`` lets an
+    ingestion job read that prefix while later parts are still in flight.
+    """
+
+    def __init__(self, id: str, filename: str, document_id: str, collection: str, size: int,
+                 part_size: int, path: Path, sha256: Optional[str] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.id = id
+        self.filename = filename
+        self.document_id = document_id
+        self.collection = collection
+        self.size = size
+        self.part_size = part_size
+        self.path = path
+        self.expected_sha256 = sha256.lower() if sha256 else None
+        self.ttl_seconds = ttl_seconds
+        self.status = "receiving"
+        self.received: Dict[int, str] = {}
+        self.content_hash: Optional[str] = None
+        self.job_id: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._condition = threading.Condition()
+        self._digest = hashlib.sha256()
+        self._contiguous = 0
+
+    @property
+    def num_parts(self) -> int:
+        return max(1, -(-self.size // self.part_size))
+
+    def part_range(self, index: int):
+        """Offset and length of a part in the file"""
+        if not 0 <= index < self.num_parts:
+            raise ValueError(f"Part index must be between 0 and {self.num_parts - 1}")
+        offset = index * self.part_size
+        return offset, min(self.part_size, self.size - offset)
+
+    def missing_parts(self) -> List[int]:
+        with self._condition:
+            return [index for index in range(self.num_parts) if index not in self.received]
+
+    def open_part(self, index: int) -> PartWriter:
+        if self.status != "receiving":
+            raise ValueError(f"Upload is {self.status}")
+        return PartWriter(self, index)
+
+    def mark_received(self, index: int, sha256: str):
+        with self._condition:
+            previous = self.received.get(index)
+            if previous is not None and previous != sha256:
+                raise ValueError(f"Part {index} was already received with different content")
+            self.received[index] = sha256
+            self.updated_at = time.time()
+            self._advance()
+            self._condition.notify_all()
+
+    def complete(self, sha256: Optional[str] = None) -> str:
+        """Check that every part arrived and the file checksum matches; returns it"""
+        with self._condition:
+            if self.status != "receiving":
+                raise ValueError(f"Upload is {self.status}")
+            missing = [index for index in range(self.num_parts) if index not in self.received]
+            if missing:
+                raise ValueError(f"{len(missing)} parts are missing, first is {missing[0]}")
+            content_hash = self._digest.hexdigest()
+            expected = (sha256 or "").lower() or self.expected_sha256
+            if expected is not None and content_hash != expected:
+                raise ValueError("File checksum mismatch")
+            self.content_hash = content_hash
+            self.status = "completed"
+            self._condition.notify_all()
+            return content_hash
+
+    def abort(self):
+        with self._condition:
+            if self.status == "receiving":
+                self.status = "aborted"
+            self._condition.notify_all()
+
+    def expired(self, now: float) -> bool:
+        """Whether no part has arrived for longer than the session TTL"""
+        return self.ttl_seconds is not None and now - self.updated_at > self.ttl_seconds
+
+    def iter_blocks(self, stop: threading.Event) -> Iterator[bytes]:
+        """Yield the file from the start as its contiguous prefix arrives.
+
+        Ends once the upload is completed and fully read, or when ``stop`` is
+        set; raises if the upload is aborted first or no part arrives within
+        the session TTL, so an abandoned upload never holds the reader.
+        """
+        offset = 0
+        with open(self.path, "rb") as f:
+            while True:
+                with self._condition:
+                    while self._contiguous <= offset and self.status == "receiving" and not stop.is_set():
+                        if self.expired(time.time()):
+                            self.status = "aborted"
+                            raise RuntimeError("Upload expired waiting for its next part")
+                        self._condition.wait(timeout=1.0)
+                    if self.status == "aborted":
+                        raise RuntimeError("Upload was aborted")
+                    available = self._contiguous
+                if stop.is_set() or (offset >= available and self.status == "completed"):
+                    return
+                f.seek(offset)
+                while offset < available:
+                    block = f.read(min(READ_BLOCK_SIZE, available - offset))
+                    offset += len(block)
+                    yield block
+
+    def to_dict(self) -> dict:
+        with self._condition:
+            return {
+                "upload_id": self.id,
+                "filename": self.filename,
+                "document_id": self.document_id,
+                "collection": self.collection,
+                "status": self.status,
+                "size": self.size,
+                "part_size": self.part_size,
+                "parts": self.num_parts,
+                "received_parts": sorted(self.received),
+                "bytes_contiguous": self._contiguous,
+                "content_hash": self.content_hash,
+                "job_id": self.job_id
+            }
+
+    def _advance(self):
+        """Hash the parts that just became part of the contiguous prefix"""
+        index = -(-self._contiguous // self.part_size)
+        end = self._contiguous
+        while index in self.received and end < self.size:
+            end = min(self.size, (index + 1) * self.part_size)
+            index += 1
+        if end == self._contiguous:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._contiguous)
+            remaining = end - self._contiguous
+            while remaining:
+                block = f.read(min(READ_BLOCK_SIZE, remaining))
+                self._digest.update(block)
+                remaining -= len(block)
+        self._contiguous = end
+
+class UploadManager:
+    """Open upload sessions of this process, with their staging files.
+
+    Sessions idle for longer than ``ttl_seconds`` are aborted and their
+    staging files deleted by a periodic sweep, started with ``start``.
+    """
+
+    def __init__(self, directory: str, part_size: int, ttl_seconds: float, expiry_interval: float):
+        self.directory = Path(directory)
+        self.part_size = part_size
+        self.ttl_seconds = ttl_seconds
+        self.expiry_interval = expiry_interval
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, UploadSession] = {}
+        self._expiry_task = None
+
+    async def start(self):
+        """Start sweeping expired sessions on the running event loop"""
+        self._expiry_task = asyncio.create_task(self._expire_periodically())
+
+    async def stop(self):
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            await asyncio.gather(self._expiry_task, return_exceptions=True)
+            self._expiry_task = None
+
+    def create(self, filename: str, size: int, document_id: str, collection: str,
+               sha256: Optional[str] = None) -> UploadSession:
+        """Start an upload and allocate its staging file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        upload_id = str(uuid.uuid4())
+        path = self.directory / f"{upload_id}{Path(filename).suffix.lower()}"
+        with open(path, "wb") as f:
+            f.truncate(size)
+        session = UploadSession(
+            upload_id, filename, document_id, collection, size, self.part_size, path, sha256, self.ttl_seconds
+        )
+        with self._lock:
+            self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def release(self, upload_id: str):
+        """Forget a completed session; its staging file now belongs to the ingestion job"""
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+
+    def abort(self, upload_id: str) -> bool:
+        """Abort a session and delete its staging file; False if it is unknown"""
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is None:
+            return False
+        session.abort()
+        # A streaming ingestion job deletes the file itself once it notices
+        if session.job_id is None:
+            session.path.unlink(missing_ok=True)
+        return True
+
+    def expire(self) -> int:
+        """Abort every session idle for longer than the TTL; returns how many"""
+        now = time.time()
+        with self._lock:
+            # Includes sessions a streaming job already gave up on
+            expired = [upload_id for upload_id, session in self._sessions.items() if session.expired(now)]
+        for upload_id in expired:
+            self.abort(upload_id)
+        return len(expired)
+
+    async def _expire_periodically(self):
+        while True:
+            await asyncio.sleep(self.expiry_interval)
+            await run_in_executor(self.expire)
+
+_upload_manager = None
+
+def get_upload_manager() -> UploadManager:
+    """Return the process-wide upload manager"""
+    global _upload_manager
+    if _upload_manager is None:
+        _upload_manager = UploadManager(
+            settings.upload_staging_dir,
+            settings.upload_part_size,
+            settings.upload_session_ttl_seconds,
+            settings.upload_expiry_interval_seconds
+        )
+    return _upload_manager
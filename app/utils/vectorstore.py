@@ -1,22 +1,66 @@
-import weaviate
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_weaviate import WeaviateVectorStore
+import re
+from pathlib import Path
+from app.utils.embedding_engine import EmbeddingEngine
+from app.utils.local_index import LocalVectorStore
 from app.config import get_settings
 
 settings = get_settings()
 
+INDEX_NAME = "DocumentQA"
+DEFAULT_COLLECTION = "default"
+COLLECTION_NAME_PATTERN = re.compile(r"^[a-z][a-z0-9_]{0,63}$")
+
+def collection_index_name(collection: str) -> str:
+    """Weaviate collection holding a named collection's chunks"""
+    return INDEX_NAME if collection == DEFAULT_COLLECTION else f"{INDEX_NAME}_{collection}"
+
+def collection_index_dir(collection: str) -> Path:
+    """Local index directory holding a named collection's chunks"""
+    root = Path(settings.local_index_dir)
+    return root if collection == DEFAULT_COLLECTION else root / "collections" / collection
+
+def embedding_model_id() -> str:
+    """Name of the configured embedding model including its backend.
+
+    Quantized ONNX vectors differ slightly from the PyTorch ones, so caches
+    keyed by this name never mix the two.
+    """
+    if settings.embedding_backend == "onnx":
+        return f"{settings.embedding_model}@onnx-{'int8' if settings.onnx_quantize else 'fp32'}"
+    return settings.embedding_model
+
 def get_embeddings():
     """Initialize embedding model"""
-    return HuggingFaceEmbeddings(
+    if settings.embedding_backend == "onnx":
+        from app.utils.onnx_embeddings import OnnxEmbeddingEngine, onnx_model_dir
+
+        return OnnxEmbeddingEngine(
+            model_name=settings.embedding_model,
+            model_dir=str(onnx_model_dir(settings.onnx_model_dir, settings.embedding_model)),
+            quantized=settings.onnx_quantize,
+            batch_size=settings.embedding_batch_size,
+            bucket_by_length=settings.embedding_bucket_by_length,
+            max_seq_length=settings.embedding_max_seq_length,
+            intra_op_threads=settings.onnx_intra_op_threads,
+            normalize=True
+        )
+    if settings.embedding_backend != "torch":
+        raise ValueError(f"Unsupported embedding backend: {settings.embedding_backend}")
+    return EmbeddingEngine(
         model_name=settings.embedding_model,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
+        batch_size=settings.embedding_batch_size,
+        bucket_by_length=settings.embedding_bucket_by_length,
+        num_processes=settings.embedding_processes,
+        device='cpu',
+        normalize=True
     )
 
-def get_vectorstore():
-    """Get or create vector store"""
+def create_weaviate_client():
+    """Open a new connection to Weaviate"""
+    import weaviate
+
     # Connect using simple URL
-    client = weaviate.connect_to_custom(
+    return weaviate.connect_to_custom(
         http_host=settings.weaviate_url.replace("http://", "").split(":")[0],
         http_port=int(settings.weaviate_url.split(":")[-1]) if ":" in settings.weaviate_url else 8080,
         http_secure=False,
@@ -24,15 +68,36 @@ def get_vectorstore():
         grpc_port=50051,
         grpc_secure=False
     )
-    
-    embeddings = get_embeddings()
-    
+
+def create_vectorstore(client, embeddings, collection: str = DEFAULT_COLLECTION):
+    """Wrap an existing client and embedding model in a vector store"""
+    from app.utils.weaviate_store import WeaviateDocumentStore, ensure_collection
+
+    index_name = collection_index_name(collection)
+    ensure_collection(client, index_name, text_key="text")
     # Use WeaviateVectorStore
-    vectorstore = WeaviateVectorStore(
+    return WeaviateDocumentStore(
         client=client,
-        index_name="DocumentQA",
+        index_name=index_name,
         text_key="text",
         embedding=embeddings
     )
-    
-    return vectorstore
+
+def create_local_vectorstore(embeddings, collection: str = DEFAULT_COLLECTION):
+    """Open the embedded vector index configured in settings"""
+    return LocalVectorStore(
+        directory=str(collection_index_dir(collection)),
+        embedding=embeddings,
+        mode=settings.local_index_mode,
+        nlist=settings.local_index_nlist,
+        nprobe=settings.local_index_nprobe,
+        ivf_min_rows=settings.local_index_ivf_min_rows,
+        bm25_k1=settings.bm25_k1,
+        bm25_b=settings.bm25_b
+    )
+
+def get_vectorstore(collection: str = DEFAULT_COLLECTION):
+    """Get the shared vector store of a collection for this process"""
+    from app.utils.resources import get_resources
+
+    return get_resources().get_vectorstore(collection)
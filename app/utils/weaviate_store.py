@@ -0,0 +1,162 @@
+from uuid import uuid4
+from typing import List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_weaviate import WeaviateVectorStore
+from app.utils.filters import SearchFilter
+
+class WeaviateDocumentStore(WeaviateVectorStore):
+    """WeaviateVectorStore with the extra operations shared with LocalVectorStore"""
+
+    def add_vectors(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None,
+                    ids: Optional[List[str]] = None) -> List[str]:
+        """Store texts with embeddings that were computed beforehand"""
+        from weaviate.classes.data import DataObject
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid4()) for _ in texts]
+        objects = [
+            DataObject(properties={self._text_key: text, **metadata}, vector=vector, uuid=id_)
+            for text, vector, metadata, id_ in zip(texts, vectors, metadatas, ids)
+        ]
+        result = self._collection.data.insert_many(objects)
+        if result.has_errors:
+            first_error = next(iter(result.errors.values()))
+            raise RuntimeError(f"Failed to insert {len(result.errors)} chunks: {first_error.message}")
+        return ids
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filters: Optional[SearchFilter] = None,
+                                     **kwargs) -> List[Tuple[Document, float]]:
+        """Hybrid search with the metadata filter applied inside the query.
+
+        A pure vector search (``alpha=1``) runs as a near-vector query and
+        scores each chunk by its cosine similarity, like LocalVectorStore,
+        rather than by the rank-normalized hybrid score.
+        """
+        if kwargs.get("alpha") == 1.0:
+            vector = kwargs.get("vector") or self._embedding.embed_query(query)
+            return self._near_vector(vector, k, filters)
+        if filters is not None:
+            kwargs["filters"] = filters.to_weaviate()
+        return super().similarity_search_with_score(query, k, **kwargs)
+
+    def _near_vector(self, vector: List[float], k: int,
+                     filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        from weaviate.classes.query import MetadataQuery
+
+        result = self._collection.query.near_vector(
+            near_vector=vector,
+            limit=k,
+            filters=filters.to_weaviate() if filters is not None else None,
+            return_metadata=MetadataQuery(distance=True)
+        )
+        # The collection uses the cosine distance, 1 - cosine similarity
+        return [
+            (Document(page_content=obj.properties.pop(self._text_key), metadata=obj.properties), 1 - obj.metadata.distance)
+            for obj in result.objects
+        ]
+
+    def delete_document(self, document_id: str) -> int:
+        """Delete every chunk of a document in one bulk request"""
+        from weaviate.classes.query import Filter
+
+        result = self._collection.data.delete_many(where=Filter.by_property("document_id").equal(document_id))
+        return result.successful
+
+    def keyword_search(self, query: str, k: int = 4,
+                       filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        """Return the k best BM25 matches from Weaviate's inverted index"""
+        from weaviate.classes.query import MetadataQuery
+
+        result = self._collection.query.bm25(
+            query=query,
+            limit=k,
+            filters=filters.to_weaviate() if filters is not None else None,
+            return_metadata=MetadataQuery(score=True)
+        )
+        return [
+            (Document(page_content=obj.properties.pop(self._text_key), metadata=obj.properties), obj.metadata.score)
+            for obj in result.objects
+        ]
+
+    def drop(self):
+        """Delete the whole Weaviate collection"""
+        self._client.collections.delete(self._index_name)
+
+def ensure_collection(client, index_name: str, text_key: str = "text"):
+    """Create a collection with the schema the filters rely on, migrating an older one.
+
+    ``document_id`` must be tokenized as a whole field: with the default
+    word tokenization that auto-schema applies, deleting or filtering
+    "report.pdf" would also match "annual report.pdf". Tokenization cannot
+    be changed in place, so a collection created before is copied to a
+    staging collection, recreated and copied back. A migration that was
+    interrupted resumes on the next start.
+    """
+    staging = f"{index_name}_Migrating"
+    if client.collections.exists(staging):
+        if client.collections.exists(index_name) and not _has_field_document_ids(client, index_name):
+            # Stopped while copying out: the original is intact, so start over
+            client.collections.delete(staging)
+        else:
+            # Stopped after the original was deleted: the staging copy is complete
+            _restore(client, staging, index_name, text_key)
+            return
+    
+    if not client.collections.exists(index_name):
+        _create_collection(client, index_name, text_key)
+        return
+    if _has_field_document_ids(client, index_name):
+        return
+    
+    _create_collection(client, staging, text_key)
+    _copy_objects(client, index_name, staging)
+    client.collections.delete(index_name)
+    _restore(client, staging, index_name, text_key)
+
+def _create_collection(client, index_name: str, text_key: str):
+    from weaviate.classes.config import Configure, DataType, Property, Tokenization, VectorDistances
+
+    # Other metadata is added by auto-schema on first insert
+    client.collections.create(
+        index_name,
+        vectorizer_config=Configure.Vectorizer.none(),
+        vector_index_config=Configure.VectorIndex.hnsw(distance_metric=VectorDistances.COSINE),
+        properties=[
+            Property(name=text_key, data_type=DataType.TEXT),
+            Property(name="document_id", data_type=DataType.TEXT, tokenization=Tokenization.FIELD),
+            Property(name="page", data_type=DataType.INT),
+            Property(name="uploaded_at", data_type=DataType.NUMBER)
+        ]
+    )
+
+def _has_field_document_ids(client, index_name: str) -> bool:
+    """Whether ``document_id`` matches whole values; adds it if no chunk has set it yet"""
+    from weaviate.classes.config import DataType, Property, Tokenization
+
+    collection = client.collections.get(index_name)
+    for prop in collection.config.get().properties:
+        if prop.name == "document_id":
+            return prop.tokenization == Tokenization.FIELD
+    collection.config.add_property(
+        Property(name="document_id", data_type=DataType.TEXT, tokenization=Tokenization.FIELD)
+    )
+    return True
+
+def _restore(client, staging: str, index_name: str, text_key: str):
+    """Recreate ``index_name`` from the staging copy and drop the copy"""
+    if client.collections.exists(index_name):
+        client.collections.delete(index_name)
+    _create_collection(client, index_name, text_key)
+    _copy_objects(client, staging, index_name)
+    client.collections.delete(staging)
+
+def _copy_objects(client, source: str, target: str):
+    """Copy every object with its id and vector"""
+    source_collection = client.collections.get(source)
+    target_collection = client.collections.get(target)
+    with target_collection.batch.dynamic() as batch:
+        for obj in source_collection.iterator(include_vector=True):
+            batch.add_object(properties=obj.properties, uuid=obj.uuid, vector=obj.vector["default"])
+    failed = target_collection.batch.failed_objects
+    if failed:
+        raise RuntimeError(f"Failed to copy {len(failed)} chunks from {source} to {target}: {failed[0].message}")
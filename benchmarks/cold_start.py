@@ -0,0 +1,109 @@
+"""
+Cold start profile
+Measures how long a new worker takes before it can serve: the import time of
+app.main (with the slowest top-level imports from ``python -X importtime``),
+the time until /health/live answers and the time until /health/ready reports
+the startup phase finished, with the duration of each startup step. Exits
+non-zero when time to liveness exceeds the target.
+
+Usage:
+    python -m benchmarks.cold_start [--target-seconds 2] [--no-warmup] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+import httpx
+from benchmarks.load_test import free_port, git_commit, wait_until_up
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+
+def profile_imports(top: int):
+    """Import app.main in a fresh interpreter; return its wall time and the slowest top-level imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            modules.append({"module": name.strip(), "seconds": int(cumulative) / 1e6})
+    modules.sort(key=lambda m: m["seconds"], reverse=True)
+    return float(result.stdout.strip().splitlines()[-1]), modules[:top]
+
+def profile_startup(warmup: bool):
+    """Start the API and time liveness and readiness"""
+    port = free_port()
+    env = {**os.environ, "WARMUP_ON_STARTUP": str(warmup).lower()}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/health/live", process)
+        live = time.perf_counter() - start
+        wait_until_up(f"http://127.0.0.1:{port}/health/ready", process)
+        ready = time.perf_counter() - start
+        report = httpx.get(f"http://127.0.0.1:{port}/health/ready").json()
+    finally:
+        process.terminate()
+        process.wait()
+    return live, ready, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile worker cold start")
+    parser.add_argument("--target-seconds", type=float, default=2.0, help="Maximum time until /health/live answers")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip model warmup during the startup phase")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to report")
+    parser.add_argument("--output", default="cold_start.json")
+    args = parser.parse_args()
+
+    import_seconds, modules = profile_imports(args.top)
+    live, ready, report = profile_startup(not args.no_warmup)
+
+    print("=" * 80)
+    print(f"Cold start of app.main ({'no warmup' if args.no_warmup else 'with warmup'})")
+    print("=" * 80)
+    print(f"{'import app.main':<40} {import_seconds:>8.3f} s")
+    print(f"{'time to /health/live':<40} {live:>8.3f} s")
+    print(f"{'time to /health/ready':<40} {ready:>8.3f} s")
+    print("-" * 80)
+    print("Startup phases:")
+    for phase in report["phases"]:
+        print(f"  {phase['name']:<38} {phase['seconds']:>8.3f} s")
+    if report["warmup_error"]:
+        print(f"  warmup failed: {report['warmup_error']}")
+    print("-" * 80)
+    print("Slowest top-level imports (cumulative):")
+    for module in modules:
+        print(f"  {module['module']:<38} {module['seconds']:>8.3f} s")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "import_seconds": import_seconds,
+            "live_seconds": live,
+            "ready_seconds": ready,
+            "target_seconds": args.target_seconds,
+            "startup": report,
+            "imports": modules
+        }, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+    if live > args.target_seconds:
+        print(f"❌ Time to liveness {live:.3f} s exceeds the {args.target_seconds:.3f} s target")
+        sys.exit(1)
+    print(f"✅ Time to liveness within the {args.target_seconds:.3f} s target")
+
+if __name__ == "__main__":
+    main()
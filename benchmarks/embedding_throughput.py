@@ -0,0 +1,99 @@
+"""
+Embedding throughput benchmark
+Measures chunks/second of the ingestion embedding engine for each combination
+of batch size, length bucketing and worker processes.
+
+Usage:
+    python -m benchmarks.embedding_throughput [document.pdf] [--processes 0,2,4] [--batch-sizes 16,32,64,128]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime
+from app.config import get_settings
+from app.utils.embedding_engine import EmbeddingEngine
+from app.utils.document_loader import load_and_split_document
+
+settings = get_settings()
+
+def synthetic_chunks(count: int):
+    """Chunks of varied length, similar to what the splitter produces"""
+    rng = random.Random(0)
+    words = "the quick brown fox jumps over a lazy dog while error code E42 reports overheating".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(20, 180))) for _ in range(count)]
+
+def parse_list(value: str):
+    return [int(item) for item in value.split(",") if item]
+
+def run(texts, batch_size: int, bucket_by_length: bool, processes: int, repeats: int):
+    """Embed texts ``repeats`` times and return the best chunks/second"""
+    engine = EmbeddingEngine(
+        model_name=settings.embedding_model,
+        batch_size=batch_size,
+        bucket_by_length=bucket_by_length,
+        num_processes=processes
+    )
+    try:
+        # Load the model (and start the pool) outside the timed region
+        engine.embed_documents(texts[:batch_size * max(processes, 1)])
+        best = 0.0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            engine.embed_documents(texts)
+            best = max(best, len(texts) / (time.perf_counter() - start))
+        return best
+    finally:
+        engine.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput")
+    parser.add_argument("document", nargs="?", help="PDF/TXT/MD file to chunk; synthetic chunks are used if omitted")
+    parser.add_argument("--chunks", type=int, default=2000, help="Number of synthetic chunks")
+    parser.add_argument("--batch-sizes", default="16,32,64,128")
+    parser.add_argument("--processes", default=f"0,{os.cpu_count() or 1}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="embedding_benchmark.json")
+    args = parser.parse_args()
+    
+    if args.document:
+        texts = [doc.page_content for doc in load_and_split_document(args.document)]
+    else:
+        texts = synthetic_chunks(args.chunks)
+    
+    print("=" * 80)
+    print(f"Embedding throughput: {settings.embedding_model}, {len(texts)} chunks, {os.cpu_count()} CPUs")
+    print("=" * 80)
+    print(f"{'processes':>10} {'batch':>8} {'bucketed':>10} {'chunks/s':>12}")
+    
+    results = []
+    for processes in parse_list(args.processes):
+        for batch_size in parse_list(args.batch_sizes):
+            for bucket_by_length in (False, True):
+                rate = run(texts, batch_size, bucket_by_length, processes, args.repeats)
+                results.append({
+                    "processes": processes,
+                    "batch_size": batch_size,
+                    "bucket_by_length": bucket_by_length,
+                    "chunks_per_second": rate
+                })
+                print(f"{processes:>10} {batch_size:>8} {str(bucket_by_length):>10} {rate:>12.1f}")
+    
+    best = max(results, key=lambda r: r["chunks_per_second"])
+    print("-" * 80)
+    print(f"Best: {best['chunks_per_second']:.1f} chunks/s with EMBEDDING_PROCESSES={best['processes']} "
+          f"EMBEDDING_BATCH_SIZE={best['batch_size']} EMBEDDING_BUCKET_BY_LENGTH={best['bucket_by_length']}")
+    
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(),
+            "model": settings.embedding_model,
+            "chunks": len(texts),
+            "cpus": os.cpu_count(),
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
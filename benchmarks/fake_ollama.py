@@ -0,0 +1,64 @@
+"""
+Fake Ollama server for load tests
+Implements the streaming /api/generate endpoint with a configurable time to
+first token and token rate, so the API can be benchmarked without a GPU.
+
+Usage:
+    python -m benchmarks.fake_ollama [--port 11435] [--first-token-ms 200] [--token-rate 50] [--answer-tokens 120]
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+def create_app(first_token_ms: float, token_rate: float, answer_tokens: int, relevance_reply: str) -> FastAPI:
+    """Build the fake server; relevance prompts get ``relevance_reply``, anything else a canned answer"""
+    app = FastAPI(title="Fake Ollama")
+
+    @app.get("/")
+    async def root():
+        return "Ollama is running"
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        if "Relevance score:" in body.get("prompt", ""):
+            tokens = [relevance_reply]
+        else:
+            tokens = [f"word{i} " for i in range(answer_tokens)]
+
+        def line(**fields) -> str:
+            created_at = datetime.now(timezone.utc).isoformat()
+            return json.dumps({"model": body.get("model"), "created_at": created_at, **fields}) + "\n"
+
+        async def stream():
+            await asyncio.sleep(first_token_ms / 1000)
+            for i, token in enumerate(tokens):
+                if i and token_rate > 0:
+                    await asyncio.sleep(1 / token_rate)
+                yield line(response=token, done=False)
+            yield line(response="", done=True, done_reason="stop", eval_count=len(tokens),
+                       prompt_eval_count=len(body.get("prompt", "")) // 4)
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=200, help="Latency before the first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="Tokens per second after the first")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Tokens per generated answer")
+    parser.add_argument("--relevance-reply", default="0.9", help="Reply to relevance-check prompts")
+    args = parser.parse_args()
+
+    app = create_app(args.first_token_ms, args.token_rate, args.answer_tokens, args.relevance_reply)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
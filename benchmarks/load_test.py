@@ -0,0 +1,247 @@
+"""
+End-to-end load test
+Starts a fake Ollama server and the FastAPI app (local vector index in a
+temporary directory), drives /upload-document/ and /ask/ at each concurrency
+level and reports throughput and p50/p95/p99 latency. Results are saved as
+JSON together with the git commit so runs can be compared.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,8,32] [--requests 200] [--token-rate 50] [--no-models]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "What does error code {n} mean?",
+    "How do I reset the widget after fault {n}?",
+    "Which component overheats when error {n} is reported?",
+    "What is the maintenance interval for unit {n}?",
+    "Who should be contacted about incident {n}?"
+]
+
+def synthetic_document(index: int, paragraphs: int = 40) -> str:
+    """A text document of maintenance notes with a distinct vocabulary per index"""
+    rng = random.Random(index)
+    words = "the widget controller reports overheating fan sensor reset firmware valve pressure manual".split()
+    return "\n\n".join(
+        f"Error E{rng.randint(1, 999)} on unit {index}: " + " ".join(rng.choice(words) for _ in range(120))
+        for _ in range(paragraphs)
+    )
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def summarize(name: str, concurrency: int, latencies, errors: int, elapsed: float) -> dict:
+    """Throughput and latency percentiles (milliseconds) of one scenario"""
+    completed = len(latencies)
+    latencies = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": completed + errors,
+        "errors": errors,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max())
+    }
+
+async def run_closed_loop(concurrency: int, total: int, send):
+    """Run ``total`` requests from ``concurrency`` workers, each sending back to back"""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await send(i)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+async def wait_for_job(client: httpx.AsyncClient, status_url: str, poll_interval: float = 0.05) -> dict:
+    while True:
+        job = (await client.get(status_url)).json()
+        if job["status"] not in ("queued", "receiving", "running"):
+            if job["status"] not in ("completed", "unchanged"):
+                raise RuntimeError(f"Job {job['status']}: " + "; ".join(job["errors"]))
+            return job
+        await asyncio.sleep(poll_interval)
+
+async def upload(client: httpx.AsyncClient, name: str, text: str) -> dict:
+    """Upload a document and wait until it is ingested"""
+    response = await client.post("/upload-document/", files={"file": (name, text.encode("utf-8"), "text/plain")})
+    response.raise_for_status()
+    return await wait_for_job(client, response.json()["status_url"])
+
+async def benchmark(base_url: str, concurrency_levels, requests: int, uploads: int) -> list:
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        # Seed the corpus every question scenario searches
+        await upload(client, "seed.txt", synthetic_document(0, paragraphs=200))
+
+        for concurrency in concurrency_levels:
+            offset = len(results) * uploads
+
+            async def send_upload(i):
+                await upload(client, f"doc_{offset + i}.txt", synthetic_document(offset + i + 1))
+
+            latencies, errors, elapsed = await run_closed_loop(concurrency, uploads, send_upload)
+            results.append(summarize("upload", concurrency, latencies, errors, elapsed))
+            print_result(results[-1])
+
+            async def send_question(i):
+                question = QUESTIONS[i % len(QUESTIONS)].format(n=i)
+                response = await client.post("/ask/", json={"question": question})
+                response.raise_for_status()
+
+            latencies, errors, elapsed = await run_closed_loop(concurrency, requests, send_question)
+            results.append(summarize("ask", concurrency, latencies, errors, elapsed))
+            print_result(results[-1])
+    return results
+
+def print_result(result: dict):
+    print(f"{result['scenario']:>8} {result['concurrency']:>6} {result['throughput_rps']:>10.2f} "
+          f"{result['p50_ms']:>10.0f} {result['p95_ms']:>10.0f} {result['p99_ms']:>10.0f} {result['errors']:>7}")
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} did not come up within {timeout} s")
+
+def serve_app(port: int, no_models: bool):
+    """Run the API in this process (started as a subprocess by ``main``)"""
+    import uvicorn
+    from app.main import app
+    from app.utils.resources import get_resources
+
+    if no_models:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        class HashEmbeddings(DeterministicFakeEmbedding):
+            """Stand-in for the embedding model, to measure the serving path alone"""
+
+            def embed_queries(self, texts):
+                return [self.embed_query(text) for text in texts]
+
+            def close(self):
+                pass
+
+        get_resources()._embeddings = HashEmbeddings(size=384)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Document QA API against a fake Ollama")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Questions per concurrency level")
+    parser.add_argument("--uploads", type=int, default=8, help="Uploads per concurrency level")
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-rate", type=float, default=50)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache enabled")
+    parser.add_argument("--no-models", action="store_true",
+                        help="Use hashed embeddings and skip cross-encoder stages instead of loading models")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--serve-app", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_app:
+        serve_app(args.serve_app, args.no_models)
+        return
+
+    concurrency_levels = [int(item) for item in args.concurrency.split(",") if item]
+    ollama_port, app_port = free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix="docqa-load-")
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_DIR": os.path.join(workdir, "index"),
+        "DOCUMENT_REGISTRY_PATH": os.path.join(workdir, "documents.json"),
+        "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower()
+    }
+    if args.no_models:
+        env.update(RELEVANCE_MODE="llm", RERANK_ENABLED="false", EMBEDDING_CACHE_ENABLED="false")
+
+    processes = []
+    try:
+        processes.append(subprocess.Popen([
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(ollama_port),
+            "--first-token-ms", str(args.first_token_ms), "--token-rate", str(args.token_rate),
+            "--answer-tokens", str(args.answer_tokens)
+        ], env=env))
+        wait_until_up(f"http://127.0.0.1:{ollama_port}/", processes[-1])
+        app_command = [sys.executable, "-m", "benchmarks.load_test", "--serve-app", str(app_port)]
+        processes.append(subprocess.Popen(app_command + (["--no-models"] if args.no_models else []), env=env))
+        wait_until_up(f"http://127.0.0.1:{app_port}/health/ready", processes[-1])
+
+        print("=" * 80)
+        print(f"Load test: {args.requests} questions and {args.uploads} uploads per level, "
+              f"fake LLM {args.first_token_ms:.0f} ms + {args.answer_tokens} tokens at {args.token_rate:.0f}/s")
+        print("=" * 80)
+        print(f"{'scenario':>8} {'conc.':>6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}")
+        results = asyncio.run(benchmark(
+            f"http://127.0.0.1:{app_port}", concurrency_levels, args.requests, args.uploads
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "cpus": os.cpu_count(),
+            "config": {
+                "requests": args.requests,
+                "uploads": args.uploads,
+                "first_token_ms": args.first_token_ms,
+                "token_rate": args.token_rate,
+                "answer_tokens": args.answer_tokens,
+                "answer_cache": args.answer_cache,
+                "no_models": args.no_models
+            },
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+ONNX embedding benchmark
+Checks that the ONNX Runtime embeddings (fp32 and int8) match the PyTorch
+sentence-transformers embeddings, and compares bulk throughput and
+single-query latency of the three.
+
+Usage:
+    python -m benchmarks.onnx_embeddings [document.pdf] [--chunks 2000] [--queries 200]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+from app.config import get_settings
+from app.utils.embedding_engine import EmbeddingEngine
+from app.utils.onnx_embeddings import OnnxEmbeddingEngine, onnx_model_dir
+from app.utils.document_loader import load_and_split_document
+from benchmarks.embedding_throughput import synthetic_chunks
+
+settings = get_settings()
+
+def parity(reference: np.ndarray, vectors: np.ndarray, k: int = 10):
+    """Cosine similarity to the reference vectors and overlap of nearest neighbours"""
+    cosine = (reference * vectors).sum(axis=1)
+    queries = min(k * 10, len(reference))
+    expected = np.argsort(-(reference[:queries] @ reference.T), axis=1)[:, :k]
+    actual = np.argsort(-(vectors[:queries] @ vectors.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(e) & set(a)) / k for e, a in zip(expected, actual)])
+    return {"mean_cosine": float(cosine.mean()), "min_cosine": float(cosine.min()), f"top{k}_overlap": float(overlap)}
+
+def measure(engine, texts, queries, repeats: int):
+    """Best chunks/second over ``repeats`` runs and per-query latency percentiles"""
+    engine.embed_documents(texts[:engine.batch_size])
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.embed_documents(texts)
+        best = max(best, len(texts) / (time.perf_counter() - start))
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        engine.embed_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "chunks_per_second": best,
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p95_ms": float(np.percentile(latencies, 95))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX Runtime embeddings")
+    parser.add_argument("document", nargs="?", help="PDF/TXT/MD file to chunk; synthetic chunks are used if omitted")
+    parser.add_argument("--chunks", type=int, default=2000, help="Number of synthetic chunks")
+    parser.add_argument("--queries", type=int, default=200, help="Number of single-query latency samples")
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="onnx_embedding_benchmark.json")
+    args = parser.parse_args()
+
+    if args.document:
+        texts = [doc.page_content for doc in load_and_split_document(args.document)]
+    else:
+        texts = synthetic_chunks(args.chunks)
+    queries = [" ".join(text.split()[:12]) for text in texts[:args.queries]]
+
+    model_dir = str(onnx_model_dir(settings.onnx_model_dir, settings.embedding_model))
+    engines = {
+        "torch": EmbeddingEngine(settings.embedding_model, batch_size=args.batch_size),
+        "onnx-fp32": OnnxEmbeddingEngine(settings.embedding_model, model_dir, quantized=False,
+                                         batch_size=args.batch_size, intra_op_threads=settings.onnx_intra_op_threads),
+        "onnx-int8": OnnxEmbeddingEngine(settings.embedding_model, model_dir, quantized=True,
+                                         batch_size=args.batch_size, intra_op_threads=settings.onnx_intra_op_threads)
+    }
+
+    print("=" * 80)
+    print(f"Embedding backends: {settings.embedding_model}, {len(texts)} chunks, {os.cpu_count()} CPUs")
+    print("=" * 80)
+    print(f"{'backend':>10} {'chunks/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'cosine':>8} {'min cos':>8} {'top10':>7}")
+
+    results = {}
+    reference = None
+    for name, engine in engines.items():
+        try:
+            vectors = np.asarray(engine.embed_documents(texts), dtype=np.float32)
+            if reference is None:
+                reference = vectors
+            result = {**measure(engine, texts, queries, args.repeats), **parity(reference, vectors)}
+        finally:
+            engine.close()
+        results[name] = result
+        print(f"{name:>10} {result['chunks_per_second']:>10.1f} {result['query_p50_ms']:>8.2f} "
+              f"{result['query_p95_ms']:>8.2f} {result['mean_cosine']:>8.4f} {result['min_cosine']:>8.4f} "
+              f"{result['top10_overlap']:>7.3f}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(),
+            "model": settings.embedding_model,
+            "chunks": len(texts),
+            "cpus": os.cpu_count(),
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
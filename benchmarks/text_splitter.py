@@ -0,0 +1,108 @@
+"""
+Text splitter benchmark
+Compares the single-pass offset splitter with LangChain's
+RecursiveCharacterTextSplitter on large inputs: split time, peak Python
+memory allocated while splitting, number of chunks and characters stored
+(chunk overlap included).
+
+Usage:
+    python -m benchmarks.text_splitter [document.pdf] [--pages 2000] [--tokens]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.config import get_settings
+from app.utils.document_loader import PerPageSplitter, iter_document_pages
+from app.utils.text_splitter import OffsetTextSplitter
+
+settings = get_settings()
+
+def synthetic_pages(count: int):
+    """Pages of paragraphs and lines of varied length, like extracted PDF text"""
+    rng = random.Random(0)
+    words = "the quick brown fox jumps over a lazy dog while error code E42 reports overheating".split()
+
+    def paragraph():
+        lines = [" ".join(rng.choice(words) for _ in range(rng.randint(4, 16))) for _ in range(rng.randint(1, 12))]
+        return "\n".join(lines) + "."
+
+    return [
+        Document(page_content="\n\n".join(paragraph() for _ in range(rng.randint(4, 12))),
+                 metadata={"source": "synthetic.pdf", "page": page})
+        for page in range(count)
+    ]
+
+def run(splitter, pages, repeats: int):
+    """Best split time over ``repeats`` runs, peak allocation and chunk statistics"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = list(splitter.split_pages(pages))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    list(splitter.split_pages(pages))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": best,
+        "peak_mib": peak / 2 ** 20,
+        "chunks": len(chunks),
+        "stored_chars": sum(len(chunk.page_content) for chunk in chunks)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the text splitters")
+    parser.add_argument("document", nargs="?", help="PDF/TXT/MD file to split; synthetic pages are used if omitted")
+    parser.add_argument("--pages", type=int, default=2000, help="Number of synthetic pages")
+    parser.add_argument("--tokens", action="store_true", help="Also time the offset splitter sized in model tokens")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="text_splitter_benchmark.json")
+    args = parser.parse_args()
+
+    pages = list(iter_document_pages(args.document)) if args.document else synthetic_pages(args.pages)
+    total_chars = sum(len(page.page_content) for page in pages)
+
+    splitters = {
+        "recursive": PerPageSplitter(RecursiveCharacterTextSplitter(
+            chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap, length_function=len
+        )),
+        "offset": OffsetTextSplitter(settings.chunk_size, settings.chunk_overlap)
+    }
+    if args.tokens:
+        from app.utils.resources import get_resources
+
+        splitters["offset-tokens"] = OffsetTextSplitter(
+            settings.chunk_size_tokens, settings.chunk_overlap_tokens, tokenizer=get_resources().tokenizer
+        )
+
+    print("=" * 80)
+    print(f"Text splitters: {len(pages)} pages, {total_chars / 1e6:.1f} M characters, "
+          f"chunk size {settings.chunk_size}, overlap {settings.chunk_overlap}")
+    print("=" * 80)
+    print(f"{'splitter':>14} {'seconds':>10} {'MB/s':>8} {'peak MiB':>10} {'chunks':>8} {'stored/input':>13}")
+
+    results = {}
+    for name, splitter in splitters.items():
+        result = run(splitter, pages, args.repeats)
+        results[name] = result
+        print(f"{name:>14} {result['seconds']:>10.3f} {total_chars / result['seconds'] / 1e6:>8.1f} "
+              f"{result['peak_mib']:>10.1f} {result['chunks']:>8} {result['stored_chars'] / total_chars:>13.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(),
+            "pages": len(pages),
+            "characters": total_chars,
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
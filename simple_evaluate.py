@@ -1,16 +1,29 @@
 """
 Simple Evaluation Script for Document QA - Python OOP PDF
 Metrics: Retrieval Precision, Retrieval Accuracy, Contextual Accuracy, Contextual Precision
+
+Questions run through the agent concurrently; the metrics reuse the chunks
+the agent retrieved and are computed from a single batched encode of every
+question, context, answer and ground truth.
+
+Usage:
+    python simple_evaluate.py [--questions questions.jsonl] [--concurrency 4] [--collection default]
 """
-from app.utils.vectorstore import get_vectorstore
-from app.agents.graph import app_graph
-from sklearn.metrics.pairwise import cosine_similarity
+from app.agents.graph import get_app_graph
+from app.agents.nodes import initial_state
+from app.utils.resources import get_resources
+from app.utils.vectorstore import DEFAULT_COLLECTION
 from sentence_transformers import SentenceTransformer
+import argparse
+import asyncio
 import json
+import time
 import pandas as pd
 from datetime import datetime
 import numpy as np
 
+RELEVANCE_THRESHOLD = 0.4
+
 # Load embedding model
 print("Loading embedding model...")
 embedder = SentenceTransformer('all-MiniLM-L6-v2')
@@ -52,52 +65,65 @@ def load_test_questions():
         },
     ]
 
-def calculate_retrieval_precision(retrieved_contexts, question):
+def read_questions(path):
+    """Load questions from a JSONL file with one {"question", "ground_truth"} object per line"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def calculate_metrics(questions, ground_truths, answers, contexts):
     """
+    All four metrics for every question as matrix operations over one batched encode.
+
     Retrieval Precision: Proportion of retrieved contexts that are relevant
+    Retrieval Accuracy: How well retrieved contexts cover the ground truth
+    Contextual Accuracy: How factually accurate the answer is
+    Contextual Precision: How relevant the answer is to the question
     """
-    question_emb = embedder.encode([question])
-    relevant_count = 0
+    n = len(questions)
+    joined_contexts = [" ".join(chunks) for chunks in contexts]
+    flat_contexts = [chunk for chunks in contexts for chunk in chunks]
+    owners = np.repeat(np.arange(n), [len(chunks) for chunks in contexts])
     
-    for context in retrieved_contexts:
-        context_emb = embedder.encode([context])
-        similarity = cosine_similarity(question_emb, context_emb)[0][0]
-        if similarity > 0.4:  # Relevance threshold
-            relevant_count += 1
+    # Encode each distinct text once; normalized embeddings make cosine similarity a dot product
+    texts = list(dict.fromkeys(questions + ground_truths + answers + joined_contexts + flat_contexts))
+    index = {text: i for i, text in enumerate(texts)}
+    embeddings = embedder.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
     
-    return relevant_count / len(retrieved_contexts) if retrieved_contexts else 0
-
-def calculate_retrieval_accuracy(retrieved_contexts, ground_truth):
-    """
-    Retrieval Accuracy: How well retrieved contexts cover the ground truth
-    """
-    if not retrieved_contexts:
-        return 0
+    def rows(items):
+        return embeddings[[index[item] for item in items]]
     
-    ground_truth_emb = embedder.encode([ground_truth])
-    context_text = " ".join(retrieved_contexts)
-    context_emb = embedder.encode([context_text])
+    question_emb = rows(questions)
+    truth_emb = rows(ground_truths)
+    answer_emb = rows(answers)
     
-    similarity = cosine_similarity(ground_truth_emb, context_emb)[0][0]
-    return similarity
-
-def calculate_contextual_accuracy(answer, ground_truth):
-    """
-    Contextual Accuracy: How factually accurate the answer is
-    """
-    answer_emb = embedder.encode([answer])
-    truth_emb = embedder.encode([ground_truth])
-    return cosine_similarity(answer_emb, truth_emb)[0][0]
+    context_similarity = np.einsum("ij,ij->i", rows(flat_contexts), question_emb[owners])
+    relevant = np.bincount(owners, weights=context_similarity > RELEVANCE_THRESHOLD, minlength=n)
+    retrieved = np.bincount(owners, minlength=n)
+    
+    return {
+        "retrieval_precision": relevant / np.maximum(retrieved, 1),
+        "retrieval_accuracy": np.einsum("ij,ij->i", truth_emb, rows(joined_contexts)),
+        "contextual_accuracy": np.einsum("ij,ij->i", answer_emb, truth_emb),
+        "contextual_precision": np.einsum("ij,ij->i", answer_emb, question_emb)
+    }
 
-def calculate_contextual_precision(answer, question):
-    """
-    Contextual Precision: How relevant the answer is to the question
-    """
-    answer_emb = embedder.encode([answer])
-    question_emb = embedder.encode([question])
-    return cosine_similarity(answer_emb, question_emb)[0][0]
+async def run_agent(test_questions, collection, concurrency):
+    """Answer every question with the agent, at most ``concurrency`` at a time"""
+    questions = [test["question"] for test in test_questions]
+    # Embed all questions in one pass; retrieval reuses these embeddings
+    question_embeddings = get_resources().embeddings.embed_queries(questions)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def answer(question, question_embedding):
+        async with semaphore:
+            try:
+                return await get_app_graph().ainvoke(initial_state(question, question_embedding, collection))
+            except Exception as e:
+                return e
+    
+    return await asyncio.gather(*(answer(q, e) for q, e in zip(questions, question_embeddings)))
 
-def evaluate():
+async def evaluate(questions_path=None, concurrency=4, collection=DEFAULT_COLLECTION):
     """Run evaluation"""
     print("\n" + "=" * 80)
     print(" " * 20 + "DOCUMENT QA EVALUATION - PYTHON OOP")
@@ -107,56 +133,53 @@ def evaluate():
     print("=" * 80)
     print()
     
-    test_questions = load_test_questions()
+    test_questions = read_questions(questions_path) if questions_path else load_test_questions()
     results = []
     
-    print("Connecting to vector database...")
-    vectorstore = get_vectorstore()
+    print(f"📋 Testing {len(test_questions)} questions ({concurrency} at a time)...\n")
+    start = time.perf_counter()
     
-    print(f"📋 Testing {len(test_questions)} questions...\n")
+    # The agent's own retrieval supplies the contexts, so nothing is retrieved twice
+    answered = []
+    for i, (test, result) in enumerate(zip(test_questions, await run_agent(test_questions, collection, concurrency)), 1):
+        if isinstance(result, Exception):
+            print(f"[{i}/{len(test_questions)}] {test['question'][:60]}...\n     ❌ Error: {result}\n")
+            continue
+        contexts = [doc.page_content for doc in result['documents']]
+        if not contexts:
+            print(f"[{i}/{len(test_questions)}] {test['question'][:60]}...\n     ⚠️ No contexts retrieved. Upload PDF first!\n")
+            continue
+        answered.append((test, result, contexts))
+    agent_seconds = time.perf_counter() - start
     
-    for i, test in enumerate(test_questions, 1):
-        print(f"[{i}/{len(test_questions)}] {test['question'][:60]}...")
-        
-        try:
-            # Retrieve contexts
-            docs = vectorstore.similarity_search(test['question'], k=4)
-            contexts = [doc.page_content for doc in docs]
-            
-            if not contexts:
-                print(f"     ⚠️ No contexts retrieved. Upload PDF first!\n")
-                continue
-            
-            # Get answer from agent
-            result = app_graph.invoke({
-                "question": test['question'],
-                "context": [],
-                "answer": "",
-                "relevance_score": 0.0
-            })
-            
-            # Calculate all metrics
-            retrieval_precision = calculate_retrieval_precision(contexts, test['question'])
-            retrieval_accuracy = calculate_retrieval_accuracy(contexts, test['ground_truth'])
-            contextual_accuracy = calculate_contextual_accuracy(result['answer'], test['ground_truth'])
-            contextual_precision = calculate_contextual_precision(result['answer'], test['question'])
-            
+    if answered:
+        # Calculate all metrics
+        metrics = calculate_metrics(
+            [test['question'] for test, _, _ in answered],
+            [test['ground_truth'] for test, _, _ in answered],
+            [result['answer'] for _, result, _ in answered],
+            [contexts for _, _, contexts in answered]
+        )
+        for j, (test, result, _) in enumerate(answered):
             results.append({
                 'question': test['question'],
                 'answer': result['answer'][:100] + '...',  # Truncate for CSV
                 'ground_truth': test['ground_truth'][:100] + '...',
-                'retrieval_precision': retrieval_precision,
-                'retrieval_accuracy': retrieval_accuracy,
-                'contextual_accuracy': contextual_accuracy,
-                'contextual_precision': contextual_precision,
+                'retrieval_precision': float(metrics['retrieval_precision'][j]),
+                'retrieval_accuracy': float(metrics['retrieval_accuracy'][j]),
+                'contextual_accuracy': float(metrics['contextual_accuracy'][j]),
+                'contextual_precision': float(metrics['contextual_precision'][j]),
                 'agent_relevance_score': result['relevance_score']
             })
-            
-            print(f"     ✓ RP:{retrieval_precision:.2f} RA:{retrieval_accuracy:.2f} CA:{contextual_accuracy:.2f} CP:{contextual_precision:.2f}\n")
-            
-        except Exception as e:
-            print(f"     ❌ Error: {e}\n")
-            continue
+        if len(results) <= 50:
+            for r in results:
+                print(f"✓ {r['question'][:60]}...")
+                print(f"     RP:{r['retrieval_precision']:.2f} RA:{r['retrieval_accuracy']:.2f} "
+                      f"CA:{r['contextual_accuracy']:.2f} CP:{r['contextual_precision']:.2f}\n")
+    
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ Agent: {agent_seconds:.1f}s, metrics: {elapsed - agent_seconds:.1f}s, "
+          f"{len(test_questions) / elapsed:.2f} questions/s\n")
     
     if not results:
         print("\n❌ No results generated. Make sure:")
@@ -259,4 +282,10 @@ if __name__ == "__main__":
     except:
         print("⚠️ Could not check Docker status. Proceeding anyway...\n")
     
-    evaluate()
+    parser = argparse.ArgumentParser(description="Evaluate the Document QA agent")
+    parser.add_argument("--questions", help="JSONL file of {\"question\", \"ground_truth\"} objects")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered at once")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    args = parser.parse_args()
+    
+    asyncio.run(evaluate(args.questions, args.concurrency, args.collection))
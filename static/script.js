@@ -7,6 +7,7 @@ const questionInput = document.getElementById('questionInput');
 const sendBtn = document.getElementById('sendBtn');
 
 let documentUploaded = false;
+let messageCounter = 0;
 
 // File upload handlers
 fileInput.addEventListener('change', handleFileUpload);
@@ -53,31 +54,60 @@ async function handleFileUpload() {
 
         const data = await response.json();
 
-        if (response.ok) {
-            uploadStatus.className = 'status-message success';
-            uploadStatus.textContent = `✅ ${data.message}`;
-            
-            documentInfo.className = 'document-info show';
-            documentInfo.innerHTML = `
-                <strong>📄 ${file.name}</strong><br>
-                <small>Processed into ${data.chunks} chunks</small>
-            `;
-
-            documentUploaded = true;
-            questionInput.disabled = false;
-            sendBtn.disabled = false;
-
-            // Clear welcome message
-            chatContainer.innerHTML = '';
-        } else {
+        if (!response.ok) {
             throw new Error(data.detail || 'Upload failed');
         }
+
+        const job = await waitForJob(data.job_id);
+
+        uploadStatus.className = 'status-message success';
+        uploadStatus.textContent = `✅ Document '${job.filename}' ingested successfully`;
+
+        documentInfo.className = 'document-info show';
+        documentInfo.innerHTML = `
+            <strong>📄 ${file.name}</strong><br>
+            <small>${job.status === 'unchanged'
+                ? 'Already up to date'
+                : `Processed into ${job.chunks_split} chunks (${job.chunks_inserted} new)`}</small>
+        `;
+
+        documentUploaded = true;
+        questionInput.disabled = false;
+        sendBtn.disabled = false;
+
+        // Clear welcome message
+        chatContainer.innerHTML = '';
     } catch (error) {
         uploadStatus.className = 'status-message error';
         uploadStatus.textContent = `❌ Error: ${error.message}`;
     }
 }
 
+const IN_PROGRESS_JOB_STATUSES = ['queued', 'receiving', 'running'];
+
+async function waitForJob(jobId) {
+    // Poll the ingestion job until it finishes, showing progress meanwhile
+    while (true) {
+        const response = await fetch(`http://localhost:8000/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok) {
+            throw new Error(job.detail || 'Failed to get ingestion status');
+        }
+        if (job.status === 'completed' || job.status === 'unchanged') {
+            return job;
+        }
+        // Any other status outside the in-progress ones is final (failed, cancelled, ...)
+        if (!IN_PROGRESS_JOB_STATUSES.includes(job.status)) {
+            const detail = job.errors.join('; ');
+            throw new Error(`Ingestion ${job.status}${detail ? `: ${detail}` : ''}`);
+        }
+
+        uploadStatus.textContent = `⏳ Processing document... ${job.pages_parsed} pages parsed, ${job.chunks_inserted} chunks stored`;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // Question handling
 questionInput.addEventListener('keypress', (e) => {
     if (e.key === 'Enter' && !sendBtn.disabled) {
@@ -97,9 +127,10 @@ async function askQuestion() {
 
     // Add loading message
     const loadingId = addMessage('Thinking...', 'loading');
+    let answerId = null;
 
     try {
-        const response = await fetch('http://localhost:8000/ask/', {
+        const response = await fetch('http://localhost:8000/ask/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -107,24 +138,74 @@ async function askQuestion() {
             body: JSON.stringify({ question })
         });
 
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.detail || 'Failed to get answer');
+        }
 
-        // Remove loading message
-        document.getElementById(loadingId).remove();
+        // Read Server-Sent Events from the response body as they arrive
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const raw of events) {
+                const event = parseServerSentEvent(raw);
+                if (!event) continue;
+
+                if (event.type === 'relevance') {
+                    document.getElementById(loadingId).textContent = event.data.relevant
+                        ? 'Writing answer...'
+                        : 'No relevant context found';
+                } else if (event.type === 'token') {
+                    if (!answerId) {
+                        document.getElementById(loadingId).remove();
+                        answerId = addMessage('', 'assistant');
+                    }
+                    const answerDiv = document.getElementById(answerId);
+                    answerDiv.textContent += event.data.text;
+                    chatContainer.scrollTop = chatContainer.scrollHeight;
+                } else if (event.type === 'error') {
+                    throw new Error(event.data.detail || 'Failed to get answer');
+                }
+            }
+        }
 
-        if (response.ok) {
-            addMessage(data.answer, 'assistant');
-        } else {
-            throw new Error(data.detail || 'Failed to get answer');
+        if (!answerId) {
+            document.getElementById(loadingId).remove();
         }
     } catch (error) {
-        document.getElementById(loadingId).remove();
+        const loading = document.getElementById(loadingId);
+        if (loading) loading.remove();
         addMessage(`❌ Error: ${error.message}`, 'assistant');
     }
 }
 
+function parseServerSentEvent(raw) {
+    let type = 'message';
+    const dataLines = [];
+
+    for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) {
+            type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    }
+
+    if (dataLines.length === 0) return null;
+    return { type, data: JSON.parse(dataLines.join('\n')) };
+}
+
 function addMessage(text, type) {
-    const messageId = 'msg-' + Date.now();
+    const messageId = 'msg-' + Date.now() + '-' + (messageCounter++);
     const messageDiv = document.createElement('div');
     messageDiv.id = messageId;
     messageDiv.className = `message ${type}`;
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+# Settings are read when app modules are imported, so point every data path at a scratch
+# directory and avoid network services before the first import
+_DATA_DIR = tempfile.mkdtemp(prefix="docqa-tests-")
+os.environ.update({
+    "VECTOR_BACKEND": "local",
+    "LOCAL_INDEX_DIR": os.path.join(_DATA_DIR, "local_index"),
+    "EMBEDDING_CACHE_DIR": os.path.join(_DATA_DIR, "embedding_cache"),
+    "DOCUMENT_REGISTRY_PATH": os.path.join(_DATA_DIR, "documents.json"),
+    "UPLOAD_STAGING_DIR": os.path.join(_DATA_DIR, "uploads"),
+    "WARMUP_ON_STARTUP": "false",
+})
+
+import numpy as np
+import pytest
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from app.config import get_settings
+
+settings = get_settings()
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings: texts sharing words are similar"""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN.findall(text.lower()):
+            vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def close(self):
+        pass
+
+class FakeLLM(LLM):
+    """Streams a canned answer word by word; relevance prompts get ``relevance``.
+
+    Like OllamaLLM, it reports every token to the callbacks even when it is
+    invoked rather than streamed.
+    """
+
+    answer: str = "The pump overheats when the filter is blocked."
+    relevance: str = "0.9"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _reply(self, prompt: str) -> str:
+        return self.relevance if "relevance checker" in prompt else self.answer
+
+    def _tokens(self, prompt: str) -> List[str]:
+        return re.findall(r"\S+\s*", self._reply(prompt))
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        for token in self._tokens(prompt):
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+        return self._reply(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        for token in self._tokens(prompt):
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+        return self._reply(prompt)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        for token in self._tokens(prompt):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+@pytest.fixture
+def embeddings():
+    return FakeEmbeddings()
+
+@pytest.fixture
+def resources(tmp_path, monkeypatch, embeddings):
+    """The process-wide registry backed by fakes, with fresh data directories and singletons"""
+    from app.agents import graph
+    from app.utils import answer_cache, coalescing, documents, jobs, startup, uploads
+    from app.utils.resources import get_resources
+
+    monkeypatch.setattr(settings, "local_index_dir", str(tmp_path / "local_index"))
+    monkeypatch.setattr(settings, "embedding_cache_dir", str(tmp_path / "embedding_cache"))
+    monkeypatch.setattr(settings, "document_registry_path", str(tmp_path / "documents.json"))
+    monkeypatch.setattr(settings, "upload_staging_dir", str(tmp_path / "uploads"))
+    # Models that are not installed in the test environment stay out of the graph
+    monkeypatch.setattr(settings, "rerank_enabled", False)
+    monkeypatch.setattr(settings, "relevance_mode", "llm")
+    monkeypatch.setattr(documents, "_document_registry", None)
+    monkeypatch.setattr(answer_cache, "_answer_caches", {})
+    monkeypatch.setattr(graph, "_app_graph", None)
+    monkeypatch.setattr(uploads, "_upload_manager", None)
+    monkeypatch.setattr(jobs, "_ingestion_queue", None)
+    monkeypatch.setattr(coalescing, "_question_flights", coalescing.SingleFlight())
+    monkeypatch.setattr(startup, "_state", startup.StartupState())
+
+    registry = get_resources()
+    registry._embeddings = embeddings
+    registry._llm = FakeLLM()
+    registry._relevance_llm = FakeLLM()
+    yield registry
+    for name in ("embeddings", "client", "llm", "relevance_llm", "cross_encoder", "reranker", "tokenizer"):
+        setattr(registry, f"_{name}", None)
+    registry._vectorstores = {}
+
+@pytest.fixture
+def client(resources):
+    """API client with the lifespan running (ingestion workers, startup phase)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+        # The fakes hold no connections for the shutdown path to close
+        resources._llm = resources._relevance_llm = None
+
+PUMP_MANUAL = """Pump maintenance
+
+The pump overheats when the intake filter is blocked. Clean the filter every month.
+
+Warranty
+
+The warranty covers the motor for five years and the housing for two years.
+"""
+
+def wait_for_job(client, job_id: str, timeout: float = 10) -> dict:
+    """Poll an ingestion job until it reaches a final status"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "receiving", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+def upload_text(client, filename: str = "manual.txt", text: str = PUMP_MANUAL, **form) -> dict:
+    """Upload a text document and wait for its ingestion job"""
+    response = client.post("/upload-document/", files={"file": (filename, text.encode())}, data=form)
+    assert response.status_code == 202, response.text
+    return wait_for_job(client, response.json()["job_id"])
+
+def parse_sse(body: str) -> List[Tuple[str, dict]]:
+    """Split a Server-Sent Events body into (event, data) pairs"""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
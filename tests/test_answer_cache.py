@@ -0,0 +1,74 @@
+import numpy as np
+from app.utils.answer_cache import SemanticAnswerCache
+from tests.conftest import FakeLLM, parse_sse, upload_text
+
+def make_cache(**overrides) -> SemanticAnswerCache:
+    options = {"similarity_threshold": 0.95, "max_entries": 10, "max_bytes": 1 << 20, "ttl_seconds": 60}
+    options.update(overrides)
+    return SemanticAnswerCache(**options)
+
+def test_lookup_returns_the_nearest_question_above_the_threshold():
+    cache = make_cache()
+    cache.store([1.0, 0.0], {"answer": "a"}, cache.version)
+    cache.store([0.0, 1.0], {"answer": "b"}, cache.version)
+
+    assert cache.lookup([0.1, 2.0]) == {"answer": "b"}
+    assert cache.lookup([1.0, 1.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_results_of_an_older_corpus_are_not_stored():
+    cache = make_cache()
+    version = cache.version
+    cache.store([1.0, 0.0], {"answer": "a"}, version)
+    cache.invalidate()
+    cache.store([1.0, 0.0], {"answer": "stale"}, version)
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted():
+    cache = make_cache(max_entries=2)
+    for i, vector in enumerate(np.eye(3)):
+        if i == 2:
+            # Touch the first entry so the second is the oldest
+            cache.lookup(np.eye(3)[0])
+        cache.store(vector, {"answer": str(i)}, cache.version)
+
+    assert cache.lookup(np.eye(3)[0]) == {"answer": "0"}
+    assert cache.lookup(np.eye(3)[1]) is None
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    cache = make_cache(ttl_seconds=10)
+    now = [100.0]
+    monkeypatch.setattr("app.utils.answer_cache.time.monotonic", lambda: now[0])
+    cache.store([1.0, 0.0], {"answer": "a"}, cache.version)
+
+    now[0] += 11
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.stats()["bytes"] == 0
+
+def test_repeated_question_is_answered_from_the_cache(client, resources):
+    upload_text(client)
+    question = {"question": "Why does the pump overheat?"}
+    first = client.post("/ask/", json=question).json()
+
+    resources._llm = FakeLLM(answer="A different answer.")
+    second = client.post("/ask/", json=question).json()
+    events = parse_sse(client.post("/ask/stream", json=question).text)
+
+    assert second == first
+    assert events[-1] == ("done", {"cached": True})
+    assert client.get("/cache/stats").json()["hits"] == 2
+
+def test_ingestion_invalidates_cached_answers(client, resources):
+    upload_text(client)
+    question = {"question": "Why does the pump overheat?"}
+    client.post("/ask/", json=question)
+
+    resources._llm = FakeLLM(answer="A different answer.")
+    upload_text(client, "notes.txt", "The pump has a thermal fuse.")
+
+    assert client.post("/ask/", json=question).json()["answer"] == "A different answer."
@@ -0,0 +1,55 @@
+import threading
+from app import main
+from tests.conftest import FakeLLM, upload_text
+
+def test_upload_is_ingested_in_the_background(client):
+    job = upload_text(client)
+
+    assert job["status"] == "completed"
+    assert job["chunks_inserted"] > 0
+    documents = client.get("/documents").json()["documents"]
+    assert [document["document_id"] for document in documents] == ["manual.txt"]
+
+def test_ask_answers_from_the_workflow(client):
+    upload_text(client)
+
+    response = client.post("/ask/", json={"question": "Why does the pump overheat?"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "question": "Why does the pump overheat?",
+        "answer": FakeLLM().answer,
+        "relevance_score": 0.9
+    }
+
+def test_ask_reports_irrelevant_context(client, resources):
+    upload_text(client)
+    resources._relevance_llm = FakeLLM(relevance="0.1")
+
+    response = client.post("/ask/", json={"question": "Who won the match?"})
+
+    assert response.json()["answer"] == main.NO_ANSWER_MESSAGE
+
+def test_ask_unknown_collection(client):
+    response = client.post("/ask/", json={"question": "Anything?", "collection": "missing"})
+
+    assert response.status_code == 404
+
+def test_blocking_work_stays_off_the_event_loop(client, resources, embeddings):
+    upload_text(client)
+    loop_threads = set()
+    embedding_threads = set()
+    embed_query = embeddings.embed_query
+
+    def record(text):
+        embedding_threads.add(threading.current_thread())
+        return embed_query(text)
+
+    async def ask():
+        loop_threads.add(threading.current_thread())
+        return await main._answer("Why does the pump overheat?", "default", None)
+
+    embeddings.embed_query = record
+    client.portal.call(ask)
+
+    assert embedding_threads and not embedding_threads & loop_threads
@@ -0,0 +1,45 @@
+import json
+from tests.conftest import FakeLLM, upload_text
+
+QUESTIONS = ["Why does the pump overheat?", "How long is the motor warranty?"]
+
+def test_batch_answers_in_input_order(client):
+    upload_text(client)
+
+    response = client.post("/ask/batch", json={"questions": QUESTIONS})
+
+    results = response.json()["results"]
+    assert [result["question"] for result in results] == QUESTIONS
+    assert all(result["answer"] == FakeLLM().answer and result["error"] is None for result in results)
+
+def test_batch_streams_ndjson(client):
+    upload_text(client)
+
+    response = client.post("/ask/batch", json={"questions": QUESTIONS, "stream": True})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["question"] for line in response.text.splitlines()] == QUESTIONS
+
+def test_failed_question_reports_its_own_error(client, resources):
+    upload_text(client)
+
+    class FailingLLM(FakeLLM):
+        async def _astream(self, prompt, stop=None, run_manager=None, **kwargs):
+            if "How long" in prompt:
+                raise RuntimeError("generation failed")
+            async for chunk in super()._astream(prompt, stop, run_manager, **kwargs):
+                yield chunk
+
+    resources._llm = FailingLLM()
+    results = client.post("/ask/batch", json={"questions": QUESTIONS}).json()["results"]
+
+    assert results[0]["answer"] == FakeLLM().answer
+    assert results[1] == {"question": QUESTIONS[1], "answer": None, "relevance_score": None,
+                          "error": "generation failed"}
+
+def test_batch_size_is_limited(client, monkeypatch):
+    from app.main import settings
+
+    monkeypatch.setattr(settings, "batch_max_questions", 1)
+
+    assert client.post("/ask/batch", json={"questions": QUESTIONS}).status_code == 413
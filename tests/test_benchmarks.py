@@ -0,0 +1,47 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fake_ollama import create_app
+from benchmarks.load_test import run_closed_loop, summarize, wait_for_job
+
+def generate(client, prompt: str):
+    response = client.post("/api/generate", json={"model": "llama3.2", "prompt": prompt})
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_fake_ollama_streams_answers_and_relevance_replies():
+    client = TestClient(create_app(first_token_ms=0, token_rate=0, answer_tokens=3, relevance_reply="0.7"))
+
+    answer = generate(client, "Answer the question.")
+    relevance = generate(client, "Rate relevance.\nRelevance score:")
+
+    assert [line["response"] for line in answer] == ["word0 ", "word1 ", "word2 ", ""]
+    assert answer[-1]["done"] and answer[-1]["eval_count"] == 3
+    assert [line["response"] for line in relevance] == ["0.7", ""]
+
+def test_closed_loop_counts_errors_and_latencies():
+    async def send(i):
+        if i % 4 == 0:
+            raise RuntimeError("failed")
+
+    latencies, errors, elapsed = asyncio.run(run_closed_loop(concurrency=3, total=10, send=send))
+    result = summarize("ask", 3, latencies, errors, elapsed)
+
+    assert (len(latencies), errors) == (7, 3)
+    assert result["requests"] == 10
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+
+@pytest.mark.parametrize("status", ["failed", "cancelled"])
+def test_unsuccessful_jobs_fail_the_upload(status):
+    statuses = iter(["queued", "running", status])
+
+    def handler(request):
+        return httpx.Response(200, json={"status": next(statuses), "errors": []})
+
+    async def wait():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://test") as client:
+            return await wait_for_job(client, "/jobs/1", poll_interval=0)
+
+    with pytest.raises(RuntimeError, match=status):
+        asyncio.run(wait())
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.coalescing import SingleFlight, question_key
+from app.utils.filters import SearchFilter
+from tests.conftest import FakeLLM, settings, upload_text
+
+def test_question_key_ignores_case_and_whitespace():
+    key = question_key("How long is the  warranty?", "default", 3)
+
+    assert question_key(" how long is the warranty? ", "default", 3) == key
+    assert question_key("How long is the warranty?", "default", 4) != key
+    assert question_key("How long is the warranty?", "manuals", 3) != key
+    assert question_key("How long is the warranty?", "default", 3, SearchFilter(page_from=2)) != key
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flights.run("key", work) for _ in range(3)), flights.run("other", work))
+
+    assert asyncio.run(main()) == ["answer"] * 4
+    assert len(runs) == 2
+    assert flights.stats() == {"in_flight": 0, "executions": 2, "coalesced": 2, "coalesced_rate": 0.5}
+
+def test_failures_reach_every_caller():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model unavailable")
+
+    async def main():
+        return await asyncio.gather(flights.run("key", work), flights.run("key", work), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert [str(result) for result in results] == ["model unavailable"] * 2
+    assert flights.stats()["in_flight"] == 0
+
+def test_work_is_cancelled_only_when_every_caller_left():
+    flights = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return len(started)
+
+    async def main():
+        first = asyncio.create_task(flights.run("key", work))
+        second = asyncio.create_task(flights.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        shared = await second
+
+        leaving = asyncio.create_task(flights.run("key", work))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.gather(leaving, return_exceptions=True)
+        return shared, await flights.run("key", work)
+
+    # The cancelled flight is not joined by the caller that comes after it
+    assert asyncio.run(main()) == (1, 3)
+
+def test_coalescing_is_off_by_default(client):
+    from app.config import Settings
+
+    assert Settings.model_fields["coalesce_requests"].default is False
+    client.post("/ask/", json={"question": "How long is the warranty?"})
+
+    assert client.get("/coalescing/stats").json()["executions"] == 0
+
+def test_identical_questions_share_one_workflow(client, resources, monkeypatch):
+    upload_text(client)
+    prompts = []
+
+    class SlowLLM(FakeLLM):
+        def _reply(self, prompt):
+            prompts.append(prompt)
+            return super()._reply(prompt)
+
+        async def _astream(self, prompt, *args, **kwargs):
+            await asyncio.sleep(0.2)
+            async for chunk in super()._astream(prompt, *args, **kwargs):
+                yield chunk
+
+    resources._llm = SlowLLM()
+    monkeypatch.setattr(settings, "coalesce_requests", True)
+    questions = ["How long is the warranty?", "how long is  the WARRANTY?"]
+
+    with ThreadPoolExecutor(2) as pool:
+        responses = list(pool.map(lambda q: client.post("/ask/", json={"question": q}), questions))
+
+    assert [response.json()["question"] for response in responses] == questions
+    assert responses[0].json()["answer"] == responses[1].json()["answer"]
+    assert len([prompt for prompt in prompts if "relevance checker" not in prompt]) == 1
+    stats = client.get("/coalescing/stats").json()
+    assert (stats["enabled"], stats["executions"], stats["coalesced"]) == (True, 1, 1)
@@ -0,0 +1,75 @@
+import pytest
+from app.utils.filters import SearchFilter
+from app.utils.local_index import LocalVectorStore
+from tests.conftest import FakeLLM, upload_text
+
+def add_document(store, document_id: str, text: str, page: int = 0, uploaded_at: float = 0.0):
+    store.add_texts([text], [{"document_id": document_id, "page": page, "uploaded_at": uploaded_at}])
+
+@pytest.fixture
+def store(tmp_path, embeddings):
+    store = LocalVectorStore(str(tmp_path), embeddings)
+    add_document(store, "report.pdf", "pump report", page=1, uploaded_at=100.0)
+    add_document(store, "annual report.pdf", "annual pump report", page=5, uploaded_at=200.0)
+    add_document(store, "notes.txt", "pump notes")
+    return store
+
+def document_ids(results):
+    return sorted(doc.metadata["document_id"] for doc, _ in results)
+
+def test_document_filter_matches_whole_ids(store):
+    only_report = SearchFilter(document_ids=["report.pdf"])
+
+    assert document_ids(store.similarity_search_with_score("pump report", k=10, filters=only_report)) == ["report.pdf"]
+    assert document_ids(store.keyword_search("pump report", k=10, filters=only_report)) == ["report.pdf"]
+
+def test_page_and_upload_time_filters(store):
+    assert document_ids(store.similarity_search_with_score(
+        "pump", k=10, filters=SearchFilter(page_from=2)
+    )) == ["annual report.pdf"]
+    assert document_ids(store.similarity_search_with_score(
+        "pump", k=10, filters=SearchFilter(uploaded_before=150.0)
+    )) == ["notes.txt", "report.pdf"]
+
+def test_weaviate_filter_lists_whole_ids():
+    pytest.importorskip("weaviate")
+
+    condition = SearchFilter(document_ids=["report.pdf", "annual report.pdf"]).to_weaviate()
+
+    assert condition.target == "document_id"
+    assert condition.value == ["report.pdf", "annual report.pdf"]
+
+def test_collections_are_searched_separately(client):
+    assert client.post("/collections", json={"name": "manuals"}).status_code == 201
+    assert client.post("/collections", json={"name": "manuals"}).status_code == 409
+    assert client.post("/collections", json={"name": "Bad-Name"}).status_code == 400
+    upload_text(client, "pump.txt", "The pump overheats when the filter is blocked.", collection="manuals")
+
+    collections = {c["name"]: c for c in client.get("/collections").json()["collections"]}
+
+    assert collections["manuals"]["documents"] == 1
+    assert collections["default"]["documents"] == 0
+    assert client.get("/documents", params={"collection": "manuals"}).json()["documents"][0]["document_id"] == "pump.txt"
+    assert client.delete("/collections/manuals").json() == {"name": "manuals", "dropped": True}
+    assert client.get("/documents", params={"collection": "manuals"}).status_code == 404
+    assert client.delete("/collections/default").status_code == 400
+
+def test_filtered_question_only_sees_selected_documents(client, resources):
+    upload_text(client, "report.pdf.txt", "The pump report says the seal leaks.")
+    upload_text(client, "annual report.pdf.txt", "The annual report says the motor is fine.")
+    contexts = []
+
+    class RecordingLLM(FakeLLM):
+        def _reply(self, prompt):
+            contexts.append(prompt)
+            return super()._reply(prompt)
+
+    resources._llm = RecordingLLM()
+    response = client.post("/ask/", json={
+        "question": "What does the report say?",
+        "filters": {"document_ids": ["report.pdf.txt"]}
+    })
+
+    assert response.status_code == 200
+    assert "seal leaks" in contexts[0]
+    assert "motor is fine" not in contexts[0]
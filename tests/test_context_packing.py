@@ -0,0 +1,55 @@
+import asyncio
+from langchain_core.documents import Document
+from app.agents import nodes
+from app.utils.context_packing import pack_documents
+
+TEXT = ("The pump overheats when the intake filter is blocked. Clean the filter every month. "
+        "The warranty covers the motor for five years. The housing is covered for two years.")
+
+def chunk(start: int, end: int, source: str = "manual.txt") -> Document:
+    return Document(page_content=TEXT[start:end], metadata={"source": source})
+
+def test_overlapping_neighbours_are_merged():
+    assert pack_documents([chunk(0, 90), chunk(60, len(TEXT))], token_budget=1000) == [TEXT]
+
+def test_contained_chunks_are_dropped():
+    assert pack_documents([chunk(0, len(TEXT)), chunk(20, 60)], token_budget=1000) == [TEXT]
+
+def test_chunks_of_different_sources_are_kept_apart():
+    packed = pack_documents([chunk(0, 90), chunk(60, len(TEXT), "other.txt")], token_budget=1000)
+
+    assert packed == [TEXT[0:90].strip(), TEXT[60:].strip()]
+
+def test_repeated_sentences_are_skipped():
+    sentence = "The warranty covers the motor for five years."
+    packed = pack_documents([
+        Document(page_content=f"Intro. {sentence}", metadata={"source": "a"}),
+        Document(page_content=f"{sentence} Outro.", metadata={"source": "b"})
+    ], token_budget=1000)
+
+    assert packed == [f"Intro. {sentence}", "Outro."]
+
+def test_last_passage_is_cut_at_a_sentence_boundary():
+    packed = pack_documents([chunk(0, len(TEXT))], token_budget=30)
+
+    assert packed == ["The pump overheats when the intake filter is blocked. Clean the filter every month."]
+
+def test_overlap_limit_follows_the_chunk_length_unit(resources, monkeypatch):
+    monkeypatch.setattr(nodes.settings, "text_splitter", "offset")
+    monkeypatch.setattr(nodes.settings, "chunk_overlap", 5)
+    monkeypatch.setattr(nodes.settings, "chunk_overlap_tokens", 10)
+    monkeypatch.setattr(nodes.settings, "context_chars_per_token", 4.0)
+    monkeypatch.setattr(nodes.settings, "context_token_budget", 1000)
+    state = {**nodes.initial_state("question"), "documents": [chunk(0, 90), chunk(60, len(TEXT))]}
+
+    monkeypatch.setattr(nodes.settings, "chunk_length_unit", "chars")
+    assert len(asyncio.run(nodes.assemble_context(state))["context"]) == 2
+
+    # Ten tokens overlap by about 40 characters, more than twice the character setting
+    monkeypatch.setattr(nodes.settings, "chunk_length_unit", "tokens")
+    assert asyncio.run(nodes.assemble_context(state))["context"] == [TEXT]
+
+def test_packing_is_off_by_default():
+    from app.config import Settings
+
+    assert Settings.model_fields["context_packing_enabled"].default is False
@@ -0,0 +1,36 @@
+from pathlib import Path
+import pytest
+from app.utils import document_loader
+from app.utils.document_loader import iter_document_pages, shutdown_pdf_pool
+
+SAMPLE_PDF = str(Path(__file__).resolve().parent.parent / "test_llm.pdf")
+
+def page_texts(pages):
+    return [(page.metadata["page"], page.page_content) for page in pages]
+
+def test_small_pdf_is_read_serially(monkeypatch):
+    monkeypatch.setattr(document_loader.settings, "pdf_parallel_min_pages", 1000)
+
+    pages = page_texts(iter_document_pages(SAMPLE_PDF))
+
+    assert [page for page, _ in pages] == [0, 1]
+    assert document_loader._pdf_pool is None
+
+def test_parallel_extraction_keeps_page_order(monkeypatch):
+    serial = page_texts(iter_document_pages(SAMPLE_PDF))
+    monkeypatch.setattr(document_loader.settings, "pdf_parse_workers", 2)
+    monkeypatch.setattr(document_loader.settings, "pdf_parallel_min_pages", 1)
+    monkeypatch.setattr(document_loader.settings, "pdf_pages_per_task", 1)
+    try:
+        parallel = page_texts(iter_document_pages(SAMPLE_PDF))
+    finally:
+        shutdown_pdf_pool()
+
+    assert parallel == serial
+
+def test_unsupported_extension(tmp_path):
+    path = tmp_path / "notes.docx"
+    path.write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        list(iter_document_pages(str(path)))
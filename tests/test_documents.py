@@ -0,0 +1,54 @@
+from langchain_core.documents import Document
+from app.utils.documents import DocumentRegistry, assign_chunk_ids, chunk_id
+from app.utils.resources import get_resources
+from tests.conftest import PUMP_MANUAL, settings, upload_text
+
+def test_chunk_ids_ignore_the_position_in_the_document():
+    moved = Document(page_content="text", metadata={"page": 1, "start_index": 900})
+    original = Document(page_content="text", metadata={"page": 1, "start_index": 0})
+
+    assert chunk_id("doc", moved) == chunk_id("doc", original)
+    assert chunk_id("doc", original) != chunk_id("other", original)
+
+def test_repeated_chunks_get_distinct_ids():
+    chunks = [Document(page_content="same"), Document(page_content="same")]
+
+    ids = assign_chunk_ids("doc", chunks, {})
+
+    assert len(set(ids)) == 2
+    assert all(chunk.metadata["document_id"] == "doc" for chunk in chunks)
+
+def test_registry_survives_a_restart(tmp_path):
+    registry = DocumentRegistry(str(tmp_path / "documents.json"))
+    registry.create_collection("manuals")
+    registry.put("manuals", "pump.txt", "pump.txt", "hash", ["a", "b"])
+
+    reopened = DocumentRegistry(str(tmp_path / "documents.json"))
+
+    assert reopened.get("manuals", "pump.txt")["chunk_ids"] == ["a", "b"]
+    assert reopened.has_collection("default")
+
+def test_reupload_only_embeds_changed_chunks(client, monkeypatch):
+    monkeypatch.setattr(settings, "chunk_size", 80)
+    monkeypatch.setattr(settings, "chunk_overlap", 0)
+    first = upload_text(client)
+    edited = PUMP_MANUAL.replace("five years", "ten years")
+
+    job = upload_text(client, text=edited)
+
+    assert first["chunks_inserted"] > 2
+    assert job["status"] == "completed"
+    assert job["chunks_unchanged"] == first["chunks_inserted"] - 1
+    assert job["chunks_inserted"] == job["chunks_deleted"] == 1
+    texts = [doc.page_content for doc, _ in get_resources().vectorstore.similarity_search_with_score("warranty", k=10)]
+    assert any("ten years" in text for text in texts)
+    assert not any("five years" in text for text in texts)
+
+def test_deleting_a_document_keeps_ids_that_share_words(client):
+    upload_text(client, "report.pdf.txt", "The pump report.")
+    upload_text(client, "annual report.pdf.txt", "The annual pump report.")
+
+    client.delete("/documents/report.pdf.txt")
+
+    remaining = get_resources().vectorstore.similarity_search_with_score("pump report", k=10)
+    assert [doc.metadata["document_id"] for doc, _ in remaining] == ["annual report.pdf.txt"]
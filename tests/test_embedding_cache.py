@@ -0,0 +1,67 @@
+import multiprocessing
+import pytest
+from app.utils.embedding_cache import CachedEmbeddings, EmbeddingStore, KEY_SIZE, cache_key
+
+def append_vectors(directory: str, start: int, count: int):
+    store = EmbeddingStore(directory)
+    for i in range(start, start + count):
+        store.put_many([cache_key("model", f"text {i}")], [[float(i), 1.0]])
+
+def test_only_missing_texts_are_embedded(tmp_path, embeddings):
+    cached = CachedEmbeddings(embeddings, EmbeddingStore(tmp_path), "model")
+    first = cached.embed_documents(["pump", "filter", "pump"])
+    second = cached.embed_documents(["filter", "  pump\n", "motor"])
+
+    assert embeddings.texts_embedded == 3
+    assert second[:2] == [first[1], first[0]]
+    assert (cached.hits, cached.misses) == (2, 3)
+
+def test_vectors_survive_a_restart(tmp_path, embeddings):
+    CachedEmbeddings(embeddings, EmbeddingStore(tmp_path), "model").embed_documents(["pump", "filter"])
+    store = EmbeddingStore(tmp_path)
+
+    assert len(store) == 2
+    assert store.get_many([cache_key("model", "filter")]) == [pytest.approx(embeddings.embed_query("filter"))]
+    assert store.get_many([cache_key("other-model", "filter")]) == [None]
+
+def test_stores_see_each_others_appends(tmp_path):
+    first, second = EmbeddingStore(tmp_path), EmbeddingStore(tmp_path)
+    first.put_many([cache_key("model", "a")], [[1.0, 0.0]])
+    second.put_many([cache_key("model", "b")], [[0.0, 1.0]])
+
+    assert first.get_many([cache_key("model", "b")]) == [[0.0, 1.0]]
+    assert second.get_many([cache_key("model", "a")]) == [[1.0, 0.0]]
+
+def test_concurrent_processes_append_consistently(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=append_vectors, args=(str(tmp_path), i * 50, 50)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = EmbeddingStore(tmp_path)
+    keys = [cache_key("model", f"text {i}") for i in range(200)]
+    assert all(process.exitcode == 0 for process in processes)
+    assert store.get_many(keys) == [[float(i), 1.0] for i in range(200)]
+
+def test_interrupted_append_is_repaired(tmp_path):
+    EmbeddingStore(tmp_path).put_many([cache_key("model", "a")], [[1.0, 2.0]])
+    # A crash after writing a row and half of its key
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\0" * 8)
+    with open(tmp_path / "keys.bin", "ab") as f:
+        f.write(b"\1" * (KEY_SIZE // 2))
+
+    store = EmbeddingStore(tmp_path)
+    store.put_many([cache_key("model", "b")], [[3.0, 4.0]])
+
+    assert (tmp_path / "keys.bin").stat().st_size == 2 * KEY_SIZE
+    assert store.get_many([cache_key("model", "a"), cache_key("model", "b")]) == [[1.0, 2.0], [3.0, 4.0]]
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    store = EmbeddingStore(tmp_path)
+    store.put_many([cache_key("model", "a")], [[1.0, 2.0]])
+
+    with pytest.raises(ValueError):
+        store.put_many([cache_key("model", "b")], [[1.0, 2.0, 3.0]])
@@ -0,0 +1,58 @@
+import numpy as np
+from app.utils.embedding_engine import EmbeddingEngine
+
+class FakeSentenceTransformer:
+    """Encodes each text as [len(text), position in the encoded list]"""
+
+    def __init__(self):
+        self.encoded = []
+        self.multi_process_calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded.append(list(texts))
+        return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+    def encode_multi_process(self, texts, pool, **kwargs):
+        self.multi_process_calls += 1
+        return self.encode(texts)
+
+    def start_multi_process_pool(self, devices):
+        return object()
+
+    def stop_multi_process_pool(self, pool):
+        pass
+
+def make_engine(**options) -> EmbeddingEngine:
+    engine = EmbeddingEngine("fake", **options)
+    engine._model = FakeSentenceTransformer()
+    return engine
+
+def test_texts_are_encoded_by_length_and_returned_in_input_order():
+    engine = make_engine()
+    texts = ["ccc", "a", "bb", "dddd", "a"]
+
+    vectors = engine.embed_documents(texts)
+
+    assert engine._model.encoded == [["a", "a", "bb", "ccc", "dddd"]]
+    assert [int(length) for length, _ in vectors] == [3, 1, 2, 4, 1]
+
+def test_input_order_is_kept_without_bucketing():
+    engine = make_engine(bucket_by_length=False)
+
+    engine.embed_documents(["ccc", "a"])
+
+    assert engine._model.encoded == [["ccc", "a"]]
+
+def test_worker_pool_is_only_used_for_large_inputs():
+    engine = make_engine(batch_size=2, num_processes=2)
+
+    engine.embed_documents(["a", "b", "c"])
+    assert engine._model.multi_process_calls == 0
+
+    engine.embed_documents(["a", "b", "c", "d"])
+    assert engine._model.multi_process_calls == 1
+    engine.close()
+    assert engine._pool is None
+
+def test_empty_input():
+    assert make_engine().embed_documents([]) == []
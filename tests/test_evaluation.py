@@ -0,0 +1,39 @@
+import importlib
+import sys
+import numpy as np
+import pytest
+
+class FakeEncoder:
+    """Normalized bag-of-letters vectors, enough to compare the vectorized metrics with a loop"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        vectors = np.array([[text.lower().count(c) for c in "abcdefghijklmnopqrstuvwxyz"] for text in texts], dtype=float)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+@pytest.fixture
+def evaluation(monkeypatch):
+    pytest.importorskip("pandas")
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", FakeEncoder)
+    monkeypatch.delitem(sys.modules, "simple_evaluate", raising=False)
+    return importlib.import_module("simple_evaluate")
+
+def test_metrics_match_a_per_question_loop(evaluation):
+    questions = ["What is a class?", "What is inheritance?"]
+    truths = ["A class is a blueprint.", "Inheritance reuses code."]
+    answers = ["A blueprint for objects.", "Reusing a parent class."]
+    contexts = [["Classes are blueprints.", "Objects are instances."], ["Inheritance lets classes reuse code."]]
+
+    metrics = evaluation.calculate_metrics(questions, truths, answers, contexts)
+
+    encode = lambda text: FakeEncoder().encode([text])[0]
+    for i, question in enumerate(questions):
+        similarities = [encode(chunk) @ encode(question) for chunk in contexts[i]]
+        expected_precision = sum(s > evaluation.RELEVANCE_THRESHOLD for s in similarities) / len(contexts[i])
+        assert metrics["retrieval_precision"][i] == pytest.approx(expected_precision)
+        assert metrics["retrieval_accuracy"][i] == pytest.approx(encode(truths[i]) @ encode(" ".join(contexts[i])))
+        assert metrics["contextual_accuracy"][i] == pytest.approx(encode(answers[i]) @ encode(truths[i]))
+        assert metrics["contextual_precision"][i] == pytest.approx(encode(answers[i]) @ encode(question))
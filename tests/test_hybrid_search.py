@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from app.utils.fusion import reciprocal_rank_fusion, weighted_fusion
+from app.utils.keyword_index import KeywordIndex, tokenize
+from app.utils.resources import get_resources
+from app.agents import nodes
+from tests.conftest import upload_text
+
+def test_identifiers_are_indexed_whole_and_by_part():
+    assert tokenize("See ERR-1001 in config.yaml") == ["see", "err-1001", "err", "1001", "in", "config.yaml", "config", "yaml"]
+
+def test_bm25_prefers_rare_terms_and_skips_removed_rows():
+    index = KeywordIndex()
+    rows = [index.add(text) for text in [
+        "the pump and the filter",
+        "the pump",
+        "error ERR-1001 means the pump stalled",
+        "the motor"
+    ]]
+
+    assert [row for row, _ in index.search("pump ERR-1001", 4)] == [rows[2], rows[1], rows[0]]
+
+    index.remove(rows[2])
+    assert [row for row, _ in index.search("ERR-1001", 4)] == []
+    assert len(index) == 3
+
+def test_bm25_mask_restricts_results():
+    index = KeywordIndex()
+    for text in ["pump one", "pump two", "pump three"]:
+        index.add(text)
+
+    results = index.search("pump", 3, mask=np.array([False, True, False]))
+
+    assert [row for row, _ in results] == [1]
+
+def doc(id_: str) -> Document:
+    return Document(page_content=id_, id=id_)
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[(doc("a"), 0.9), (doc("b"), 0.8)], [(doc("b"), 7.0), (doc("c"), 3.0)]], rrf_k=60)
+
+    assert [d.id for d, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+def test_weighted_fusion_normalizes_each_list():
+    fused = weighted_fusion([(doc("a"), 0.9), (doc("b"), 0.5)], [(doc("b"), 12.0), (doc("c"), 2.0)], vector_weight=0.7)
+
+    assert [(d.id, round(score, 6)) for d, score in fused] == [("a", 0.7), ("b", 0.3), ("c", 0.0)]
+
+def test_hybrid_search_finds_exact_identifiers(client, monkeypatch):
+    upload_text(client, "errors.txt", "Error ERR-1001 means the intake is blocked.\n\nThe pump needs oil yearly.")
+    monkeypatch.setattr(nodes.settings, "hybrid_search_enabled", True)
+    monkeypatch.setattr(nodes.settings, "hybrid_candidates", 5)
+
+    results, similarities = client.portal.call(nodes._search, "ERR-1001", 1)
+
+    assert "ERR-1001" in results[0][0].page_content
+    # Relevance is scored from the similarities of the vector leg
+    assert set(similarities) <= {doc.id for doc, _ in
+                                 get_resources().vectorstore.similarity_search_with_score("ERR-1001", k=5)}
+
+def test_hybrid_search_is_off_by_default():
+    from app.config import Settings
+
+    assert Settings.model_fields["hybrid_search_enabled"].default is False
@@ -0,0 +1,62 @@
+from app.utils.jobs import get_ingestion_queue
+from app.utils.resources import get_resources
+from tests.conftest import upload_text
+
+def long_text(paragraphs: int) -> str:
+    return "\n\n".join(f"Section {i}. The valve {i} opens at {i * 10} kPa." for i in range(paragraphs))
+
+def test_job_reports_progress_counters(client):
+    job = upload_text(client, "valves.txt", long_text(20))
+
+    assert job["status"] == "completed"
+    assert job["pages_parsed"] == 1
+    assert job["chunks_split"] == job["chunks_embedded"] == job["chunks_inserted"]
+    assert job["elapsed_seconds"] is not None
+
+def test_unsupported_file_fails_the_job(client):
+    job = upload_text(client, "manual.docx", "not really a docx")
+
+    assert job["status"] == "failed"
+    assert "Unsupported file type" in job["errors"][0]
+
+def test_identical_upload_is_skipped(client, embeddings):
+    upload_text(client)
+    calls = embeddings.calls
+
+    job = upload_text(client)
+
+    assert job["status"] == "unchanged"
+    assert embeddings.calls == calls
+
+def test_failed_insert_is_rolled_back(client, monkeypatch):
+    monkeypatch.setattr(get_ingestion_queue(), "batch_size", 2)
+    vectorstore = get_resources().vectorstore
+    add_vectors = vectorstore.add_vectors
+    batches = []
+
+    def fail_second_batch(*args):
+        batches.append(args)
+        if len(batches) == 2:
+            raise RuntimeError("disk full")
+        return add_vectors(*args)
+
+    monkeypatch.setattr(vectorstore, "add_vectors", fail_second_batch)
+    job = upload_text(client, "valves.txt", long_text(100))
+
+    assert job["status"] == "failed"
+    assert job["errors"] == ["disk full"]
+    assert len(vectorstore) == 0
+    assert client.get("/documents").json()["documents"] == []
+
+def test_unknown_job(client):
+    assert client.get("/jobs/missing").status_code == 404
+
+def test_document_can_be_deleted(client):
+    upload_text(client)
+
+    response = client.delete("/documents/manual.txt")
+
+    assert response.status_code == 200
+    assert response.json()["chunks_deleted"] > 0
+    assert len(get_resources().vectorstore) == 0
+    assert client.delete("/documents/manual.txt").status_code == 404
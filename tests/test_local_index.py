@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from app.utils.local_index import LocalVectorStore
+
+def random_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+def open_store(directory, embeddings, **options) -> LocalVectorStore:
+    return LocalVectorStore(str(directory), embeddings, **options)
+
+def add_rows(store, vectors, prefix="row"):
+    ids = [f"{prefix}{i}" for i in range(len(vectors))]
+    store.add_vectors(ids, vectors.tolist(), [{"document_id": f"doc{i % 3}"} for i in range(len(vectors))], ids)
+    return ids
+
+def test_exact_search_ranks_by_cosine_similarity(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings)
+    store.add_vectors(["x", "y", "xy"], [[1, 0], [0, 1], [1, 1]], ids=["x", "y", "xy"])
+
+    results = store.similarity_search_with_score_by_vector([1.0, 0.2], k=2)
+
+    assert [doc.id for doc, _ in results] == ["x", "xy"]
+    assert results[0][1] == pytest.approx(1 / np.sqrt(1.04))
+
+def test_ivf_with_every_list_probed_matches_exact_search(tmp_path, embeddings):
+    vectors = random_vectors(400)
+    exact = open_store(tmp_path / "exact", embeddings)
+    ivf = open_store(tmp_path / "ivf", embeddings, mode="ivf", nlist=8, nprobe=8, ivf_min_rows=100)
+    add_rows(exact, vectors)
+    add_rows(ivf, vectors)
+
+    for query in random_vectors(5, seed=1):
+        expected = [doc.id for doc, _ in exact.similarity_search_with_score_by_vector(query.tolist(), k=10)]
+        found = [doc.id for doc, _ in ivf.similarity_search_with_score_by_vector(query.tolist(), k=10)]
+        assert found == expected
+
+def test_ivf_probes_a_subset_of_rows(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings, mode="ivf", nlist=8, nprobe=1, ivf_min_rows=100)
+    add_rows(store, random_vectors(400))
+    query = random_vectors(1, seed=1)[0]
+
+    candidates = store._candidates(query, store._live)
+
+    assert 0 < len(candidates) < 400
+
+def test_readding_an_id_replaces_its_row(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings)
+    store.add_vectors(["old"], [[1, 0]], ids=["a"])
+    store.add_vectors(["new"], [[0, 1]], ids=["a"])
+
+    results = store.similarity_search_with_score_by_vector([1.0, 0.0], k=5)
+
+    assert len(store) == 1
+    assert [doc.page_content for doc, _ in results] == ["new"]
+
+def test_deletes_and_rows_survive_a_reopen(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings)
+    ids = add_rows(store, random_vectors(30))
+    store.delete(ids[:5])
+    assert store.delete_document("doc1") == 8
+
+    reopened = open_store(tmp_path, embeddings)
+    results = reopened.similarity_search_with_score_by_vector(random_vectors(1)[0].tolist(), k=50)
+
+    assert len(reopened) == 17
+    assert {doc.id for doc, _ in results} == {id_ for i, id_ in enumerate(ids) if i >= 5 and i % 3 != 1}
+    assert reopened.keyword_search("row7") == []
+
+def test_interrupted_append_is_dropped_on_open(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings)
+    store.add_vectors(["a"], [[1, 0]], ids=["a"])
+    # A crash after writing a row and part of its record
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.zeros(2, dtype=np.float32).tobytes())
+    with open(tmp_path / "records.jsonl", "a") as f:
+        f.write('{"op": "add", "id": "b", "te')
+
+    reopened = open_store(tmp_path, embeddings)
+    reopened.add_vectors(["c"], [[0, 1]], ids=["c"])
+
+    assert len(open_store(tmp_path, embeddings)) == 2
+    assert (tmp_path / "vectors.f32").stat().st_size == 2 * 2 * 4
+
+def test_dimension_mismatch_is_rejected(tmp_path, embeddings):
+    store = open_store(tmp_path, embeddings)
+    store.add_vectors(["a"], [[1, 0]])
+
+    with pytest.raises(ValueError):
+        store.add_vectors(["b"], [[1, 0, 0]])
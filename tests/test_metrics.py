@@ -0,0 +1,42 @@
+from prometheus_client import REGISTRY
+from app.utils.metrics import server_timing_header
+from tests.conftest import upload_text
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_server_timing_header_format():
+    assert server_timing_header([("retrieve", 0.0123)], 0.05) == "retrieve;dur=12.3, total;dur=50.0"
+
+def test_ask_reports_node_timings(client):
+    upload_text(client)
+    retrieved = sample("docqa_node_seconds_count", node="retrieve")
+
+    response = client.post("/ask/", json={"question": "Why does the pump overheat?"})
+
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert {"embed_question", "vector_search", "retrieve", "check_relevance", "generate"} <= set(names)
+    assert names[-1] == "total"
+    assert sample("docqa_node_seconds_count", node="retrieve") == retrieved + 1
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'docqa_http_request_seconds_count{method="GET",route="/health",status="200"}' in response.text
+
+def test_node_failures_are_counted(client, resources):
+    upload_text(client)
+    failures = sample("docqa_node_errors_total", node="generate")
+
+    class BrokenLLM(type(resources._llm)):
+        async def _astream(self, prompt, stop=None, run_manager=None, **kwargs):
+            raise RuntimeError("ollama is down")
+            yield
+
+    resources._llm = BrokenLLM()
+
+    assert client.post("/ask/", json={"question": "Why does the pump overheat?"}).status_code == 500
+    assert sample("docqa_node_errors_total", node="generate") == failures + 1
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.utils import vectorstore
+from app.utils.onnx_embeddings import OnnxEmbeddingEngine
+
+class FakeTokenizer:
+    """One token per word, padded to the longest text of the batch"""
+
+    def encode_batch(self, texts):
+        width = max(len(text.split()) for text in texts)
+        encodings = []
+        for text in texts:
+            ids = [len(word) for word in text.split()]
+            padding = width - len(ids)
+            encodings.append(SimpleNamespace(ids=ids + [0] * padding, attention_mask=[1] * len(ids) + [0] * padding,
+                                             type_ids=[0] * width))
+        return encodings
+
+class FakeSession:
+    """Hidden state of a token is [word length, 1]; padding tokens get large values"""
+
+    def __init__(self):
+        self.feeds = []
+
+    def run(self, outputs, feeds):
+        self.feeds.append(feeds)
+        ids = feeds["input_ids"].astype(np.float32)
+        hidden = np.stack([ids, np.ones_like(ids)], axis=-1)
+        hidden[feeds["attention_mask"] == 0] = 1000.0
+        return [hidden]
+
+def make_engine(**options) -> OnnxEmbeddingEngine:
+    engine = OnnxEmbeddingEngine("fake", "unused", normalize=False, **options)
+    engine._session = FakeSession()
+    engine._tokenizer = FakeTokenizer()
+    engine._input_names = {"input_ids", "attention_mask"}
+    return engine
+
+def test_mean_pooling_ignores_padding():
+    vectors = make_engine().embed_documents(["ab abcd", "abc", "a b c d"])
+
+    assert vectors == [pytest.approx([3.0, 1.0]), pytest.approx([3.0, 1.0]), pytest.approx([1.0, 1.0])]
+
+def test_only_inputs_of_the_model_are_fed():
+    engine = make_engine()
+
+    engine.embed_query("hello world")
+
+    assert set(engine._session.feeds[0]) == {"input_ids", "attention_mask"}
+
+def test_batches_hold_texts_of_similar_length():
+    engine = make_engine(batch_size=2)
+
+    engine.embed_documents(["a b c d", "a", "a b c", "a b"])
+
+    assert [feeds["input_ids"].shape for feeds in engine._session.feeds] == [(2, 2), (2, 4)]
+
+def test_onnx_vectors_are_cached_apart_from_torch_vectors(monkeypatch):
+    monkeypatch.setattr(vectorstore.settings, "embedding_backend", "onnx")
+    monkeypatch.setattr(vectorstore.settings, "onnx_quantize", True)
+
+    assert vectorstore.embedding_model_id() == f"{vectorstore.settings.embedding_model}@onnx-int8"
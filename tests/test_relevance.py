@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from langchain_core.documents import Document
+from app.agents import nodes
+from app.utils.relevance import cross_encoder_scores, similarity_relevance
+from tests.conftest import FakeLLM
+
+def state(**values):
+    return {**nodes.initial_state("Why does the pump overheat?"), **values}
+
+def test_similarity_relevance_maps_the_best_similarity_onto_the_unit_interval():
+    assert similarity_relevance([0.1, 0.4], floor=0.2, ceiling=0.6) == pytest.approx(0.5)
+    assert similarity_relevance([0.9], floor=0.2, ceiling=0.6) == 1.0
+    assert similarity_relevance([0.1], floor=0.2, ceiling=0.6) == 0.0
+    assert similarity_relevance([], floor=0.2, ceiling=0.6) == 0.0
+
+def test_score_relevance_uses_the_similarities_of_the_kept_chunks():
+    kept = Document(page_content="kept", id="a")
+    keyword_only = Document(page_content="keyword only", id="b")
+    checked = state(documents=[kept, keyword_only], similarities={"a": 0.4, "c": 0.9})
+
+    assert asyncio.run(nodes._score_relevance(checked)) == pytest.approx(0.5)
+
+def test_cross_encoder_relevance_reuses_rerank_scores(resources):
+    # No cross-encoder is loaded when the reranker already scored the chunks
+    assert asyncio.run(nodes._cross_encoder_relevance(state(rerank_scores=[0.2, 0.7]))) == 0.7
+    assert resources._cross_encoder is None
+
+@pytest.mark.parametrize("reply, score", [("0.8", 0.8), ("Score: .25 out of 1", 0.25), ("7", 1.0), ("unsure", 0.5)])
+def test_llm_relevance_parses_the_first_number(resources, reply, score):
+    resources._relevance_llm = FakeLLM(relevance=reply)
+
+    assert asyncio.run(nodes._llm_relevance(state(context=["The pump overheats."]))) == score
+
+def test_cross_encoder_scores_are_probabilities():
+    pytest.importorskip("torch")
+
+    class Model:
+        def predict(self, pairs, activation_fct, **kwargs):
+            import torch
+
+            return activation_fct(torch.tensor([4.0, -4.0])).numpy()
+
+    scores = cross_encoder_scores(Model(), "question", ["relevant", "irrelevant"])
+
+    assert scores[0] > 0.95 and scores[1] < 0.05
+
+def test_vector_search_requests_cosine_scores_without_hybrid(resources, monkeypatch):
+    monkeypatch.setattr(nodes.settings, "hybrid_search_enabled", False)
+    calls = []
+
+    class Store:
+        def similarity_search_with_score(self, query, k, **kwargs):
+            calls.append(kwargs)
+            return [(Document(page_content="chunk", id="a"), 0.42)]
+
+    resources._vectorstores = {"default": Store()}
+
+    results, similarities = asyncio.run(nodes._search("question", 4))
+
+    assert calls[0]["alpha"] == 1.0
+    assert similarities == {"a": 0.42}
+
+def test_relevance_defaults_to_the_llm():
+    from app.config import Settings
+
+    assert Settings.model_fields["relevance_mode"].default == "llm"
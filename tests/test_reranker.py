@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import pytest
+from langchain_core.documents import Document
+from app.agents import nodes
+from app.utils import reranker as reranker_module
+from app.utils.executor import StageLimit, run_limited
+from app.utils.reranker import Reranker
+
+def fake_scores(model, question, chunks, batch_size):
+    """Scores a chunk by its number, recording every scoring call"""
+    model.calls.append(list(chunks))
+    return [float(chunk.split()[-1]) / 100 for chunk in chunks]
+
+class FakeCrossEncoder:
+    def __init__(self):
+        self.calls = []
+
+@pytest.fixture(autouse=True)
+def scores(monkeypatch):
+    monkeypatch.setattr(reranker_module, "cross_encoder_scores", fake_scores)
+
+def documents(count: int):
+    return [Document(page_content=f"chunk {i}") for i in range(count)]
+
+def test_rerank_orders_by_score_and_caches_pairs():
+    model = FakeCrossEncoder()
+    reranker = Reranker(model, batch_size=4)
+
+    ranked = reranker.rerank("question", documents(6), top_n=2)
+    reranker.rerank("question", documents(8), top_n=2)
+
+    assert [(doc.page_content, score) for doc, score in ranked] == [("chunk 5", 0.05), ("chunk 4", 0.04)]
+    assert model.calls == [["chunk 0", "chunk 1", "chunk 2", "chunk 3"], ["chunk 4", "chunk 5"], ["chunk 6", "chunk 7"]]
+
+def test_deadline_stops_between_batches_and_keeps_scored_pairs(monkeypatch):
+    model = FakeCrossEncoder()
+    reranker = Reranker(model, batch_size=2)
+    now = [0.0]
+
+    def slow_scores(*args):
+        now[0] += 1
+        return fake_scores(*args)
+
+    monkeypatch.setattr(reranker_module, "cross_encoder_scores", slow_scores)
+    monkeypatch.setattr(reranker_module.time, "monotonic", lambda: now[0])
+
+    with pytest.raises(TimeoutError):
+        reranker.rerank("question", documents(6), top_n=2, deadline=1.5)
+
+    assert len(model.calls) == 2
+    reranker.rerank("question", documents(6), top_n=2)
+    assert model.calls[2] == ["chunk 4", "chunk 5"]
+
+def test_stage_limit_holds_slots_until_threads_return():
+    limit = StageLimit("test", 1)
+    release = threading.Event()
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(run_limited(limit, release.wait, 5), timeout=0.05)
+        # The abandoned call still runs, so the stage is saturated
+        assert limit.in_flight == 1
+        with pytest.raises(TimeoutError, match="Too many test calls"):
+            await run_limited(limit, lambda: None)
+        release.set()
+        while limit.in_flight:
+            await asyncio.sleep(0.01)
+        return await run_limited(limit, lambda: "ok")
+
+    assert asyncio.run(main()) == "ok"
+
+def test_rerank_node_keeps_retrieval_order_over_budget(resources, monkeypatch):
+    class SlowReranker:
+        def rerank(self, question, docs, top_n, deadline=None):
+            raise TimeoutError("over budget")
+
+    resources._reranker = SlowReranker()
+    monkeypatch.setattr(nodes.settings, "rerank_top_n", 2)
+    state = {**nodes.initial_state("question"), "documents": documents(4)}
+
+    reranked = asyncio.run(nodes.rerank_documents(state))
+
+    assert reranked["context"] == ["chunk 0", "chunk 1"]
+    assert reranked["rerank_scores"] is None
+
+def test_rerank_node_uses_cross_encoder_order(resources, monkeypatch):
+    resources._reranker = Reranker(FakeCrossEncoder())
+    monkeypatch.setattr(nodes.settings, "rerank_top_n", 2)
+    state = {**nodes.initial_state("question"), "documents": documents(4)}
+
+    reranked = asyncio.run(nodes.rerank_documents(state))
+
+    assert reranked["context"] == ["chunk 3", "chunk 2"]
+    assert reranked["rerank_scores"] == [0.03, 0.02]
+
+def test_rerank_is_off_by_default():
+    from app.config import Settings
+
+    assert Settings.model_fields["rerank_enabled"].default is False
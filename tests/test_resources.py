@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+from app.utils import resources as resources_module
+from app.utils.resources import ResourceRegistry
+
+def test_get_or_create_creates_once_under_concurrency():
+    registry = ResourceRegistry()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(registry._get_or_create("llm", factory)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(value is values[0] for value in values)
+
+def test_slow_resource_does_not_block_another():
+    registry = ResourceRegistry()
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        loading.set()
+        release.wait(5)
+        return "slow"
+
+    thread = threading.Thread(target=registry._get_or_create, args=("cross_encoder", slow))
+    thread.start()
+    try:
+        assert loading.wait(5)
+        start = time.perf_counter()
+        assert registry._get_or_create("llm", lambda: "fast") == "fast"
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+        thread.join()
+    assert registry._cross_encoder == "slow"
+
+def test_aget_creates_off_the_event_loop(monkeypatch, embeddings):
+    monkeypatch.setattr(resources_module.settings, "embedding_cache_enabled", False)
+    created_on = []
+
+    def get_embeddings():
+        created_on.append(threading.current_thread())
+        return embeddings
+
+    monkeypatch.setattr(resources_module, "get_embeddings", get_embeddings)
+    registry = ResourceRegistry()
+
+    async def main():
+        first = await registry.aget("embeddings")
+        second = await registry.aget("embeddings")
+        return first, second, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(main())
+    assert first is second is embeddings
+    assert created_on and created_on[0] is not loop_thread
@@ -0,0 +1,43 @@
+import time
+import pytest
+from app import main
+from app.agents import graph, nodes
+from app.utils.startup import get_startup_state
+from tests.conftest import FakeLLM, parse_sse, upload_text
+
+@pytest.fixture
+def speculative(client, monkeypatch):
+    """Client whose workflow checks relevance with the LLM while the answer is generated"""
+    deadline = time.monotonic() + 10
+    while not get_startup_state().ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    monkeypatch.setattr(nodes.settings, "speculative_generation", True)
+    monkeypatch.setattr(nodes.settings, "relevance_mode", "llm")
+    monkeypatch.setattr(graph, "_app_graph", None)
+    upload_text(client)
+    return client
+
+def test_only_answer_tokens_are_streamed(speculative, resources):
+    resources._relevance_llm = FakeLLM(relevance="0.9 relevant")
+
+    events = parse_sse(speculative.post("/ask/stream", json={"question": "Why does the pump overheat?"}).text)
+
+    assert events[0] == ("relevance", {"relevance_score": 0.9, "relevant": True})
+    assert "".join(data["text"] for event, data in events if event == "token") == FakeLLM().answer
+    # The cached answer holds the answer tokens only as well
+    cached = parse_sse(speculative.post("/ask/stream", json={"question": "Why does the pump overheat?"}).text)
+    assert cached[1] == ("token", {"text": FakeLLM().answer})
+
+def test_irrelevant_context_cancels_the_answer(speculative, resources):
+    resources._relevance_llm = FakeLLM(relevance="0.1")
+    before = nodes.speculation_stats.wasted
+
+    response = speculative.post("/ask/", json={"question": "Who won the match?"})
+
+    assert response.json()["answer"] == main.NO_ANSWER_MESSAGE
+    assert nodes.speculation_stats.wasted == before + 1
+
+def test_relevant_answer_matches_the_sequential_workflow(speculative):
+    response = speculative.post("/ask/", json={"question": "Why does the pump overheat?"})
+
+    assert response.json()["answer"] == FakeLLM().answer
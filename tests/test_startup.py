@@ -0,0 +1,60 @@
+import time
+from app.utils import startup
+from app.utils.startup import StartupState, run_startup
+
+def wait_until_ready(client, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.01)
+    raise AssertionError("Worker never became ready")
+
+def test_liveness_does_not_wait_for_startup(client):
+    assert client.get("/health/live").json() == {"status": "alive"}
+
+def test_readiness_reports_the_startup_profile(client):
+    ready = wait_until_ready(client)
+
+    assert ready["ready"] and ready["error"] is None
+    assert [phase["name"] for phase in ready["phases"]] == ["compile_graph"]
+
+def test_warmup_failure_still_marks_the_worker_ready(resources, monkeypatch):
+    monkeypatch.setattr(startup.settings, "warmup_on_startup", True)
+
+    def fail(phase):
+        raise RuntimeError("ollama unreachable")
+
+    monkeypatch.setattr(resources, "warmup", fail)
+    state = StartupState()
+
+    run_startup(state)
+
+    assert state.ready
+    assert state.warmup_error == "ollama unreachable"
+
+def test_graph_failure_keeps_the_worker_unready(resources, monkeypatch, caplog):
+    def fail():
+        raise RuntimeError("bad workflow")
+
+    monkeypatch.setattr("app.agents.graph.get_app_graph", fail)
+    state = StartupState()
+
+    run_startup(state)
+
+    assert not state.ready
+    assert state.error == "bad workflow"
+    assert "Startup failed" in caplog.text
+
+def test_cancelled_startup_skips_remaining_steps(resources, monkeypatch):
+    monkeypatch.setattr(startup.settings, "warmup_on_startup", True)
+    warmed = []
+    monkeypatch.setattr(resources, "warmup", lambda phase: warmed.append(phase))
+    state = StartupState()
+    state.cancel()
+
+    run_startup(state)
+
+    assert not state.ready
+    assert warmed == []
@@ -0,0 +1,40 @@
+from app import main
+from tests.conftest import FakeLLM, parse_sse, upload_text
+
+def test_stream_sends_verdict_then_tokens(client):
+    upload_text(client)
+
+    response = client.post("/ask/stream", json={"question": "Why does the pump overheat?"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0] == ("relevance", {"relevance_score": 0.9, "relevant": True})
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == FakeLLM().answer
+    assert events[-1] == ("done", {"cached": False})
+
+def test_stream_irrelevant_context_sends_no_answer(client, resources):
+    upload_text(client)
+    resources._relevance_llm = FakeLLM(relevance="0.1")
+
+    events = parse_sse(client.post("/ask/stream", json={"question": "Who won the match?"}).text)
+
+    assert events == [
+        ("relevance", {"relevance_score": 0.1, "relevant": False}),
+        ("token", {"text": main.NO_ANSWER_MESSAGE}),
+        ("done", {"cached": False})
+    ]
+
+def test_stream_reports_errors_as_events(client, resources):
+    upload_text(client)
+
+    class BrokenLLM(FakeLLM):
+        async def _astream(self, prompt, stop=None, run_manager=None, **kwargs):
+            raise RuntimeError("ollama is down")
+            yield
+
+    resources._llm = BrokenLLM()
+    events = parse_sse(client.post("/ask/stream", json={"question": "Why does the pump overheat?"}).text)
+
+    assert events[-1] == ("error", {"detail": "ollama is down"})
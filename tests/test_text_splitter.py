@@ -0,0 +1,92 @@
+import re
+import pytest
+from types import SimpleNamespace
+from langchain_core.documents import Document
+from app.utils import document_loader
+from app.utils.document_loader import PerPageSplitter, get_text_splitter
+from app.utils.text_splitter import PAGE_SEPARATOR, OffsetTextSplitter
+
+PAGES = [
+    "Pump maintenance\n\nThe pump overheats when the intake filter is blocked. Clean the filter every month. "
+    "Check the seals for leaks after every service.",
+    "Warranty\n\nThe warranty covers the motor for five years and the housing for two years. "
+    "Claims need the original receipt.",
+    "Contact\n\nCall the service line on weekdays between nine and five."
+]
+
+def pdf_pages():
+    return [Document(page_content=text, metadata={"source": "manual.pdf", "page": i}) for i, text in enumerate(PAGES)]
+
+class WhitespaceTokenizer:
+    """Tokenizer stand-in whose tokens are the words of the text"""
+
+    def encode(self, text, add_special_tokens=False):
+        return SimpleNamespace(offsets=[match.span() for match in re.finditer(r"\S+", text)])
+
+def test_chunks_are_spans_of_the_document_text():
+    document = PAGE_SEPARATOR.join(PAGES)
+
+    chunks = list(OffsetTextSplitter(80, 20).split_pages(pdf_pages()))
+
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert len(chunk.page_content) <= 80
+        assert document[chunk.metadata["start_index"]:chunk.metadata["end_index"]] == chunk.page_content
+
+def test_consecutive_chunks_overlap_at_word_boundaries():
+    chunks = list(OffsetTextSplitter(80, 20).split_pages(pdf_pages()))
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.metadata["start_index"] <= previous.metadata["end_index"]
+        assert previous.metadata["end_index"] - chunk.metadata["start_index"] <= 20
+        assert previous.page_content.endswith(chunk.page_content[:previous.metadata["end_index"] - chunk.metadata["start_index"]])
+
+def test_chunks_keep_the_pages_they_span():
+    chunks = list(OffsetTextSplitter(120, 0).split_pages(pdf_pages()))
+    page_starts = [0]
+    for text in PAGES[:-1]:
+        page_starts.append(page_starts[-1] + len(text) + len(PAGE_SEPARATOR))
+
+    for chunk in chunks:
+        first = max(i for i, start in enumerate(page_starts) if start <= chunk.metadata["start_index"])
+        last = max(i for i, start in enumerate(page_starts) if start < chunk.metadata["end_index"])
+        assert (chunk.metadata["page"], chunk.metadata["page_end"]) == (first, last)
+    assert any(chunk.metadata["page"] != chunk.metadata["page_end"] for chunk in chunks)
+
+def test_streaming_gives_the_same_chunks_as_one_pass():
+    splitter = OffsetTextSplitter(60, 15)
+    stream = splitter.stream()
+
+    streamed = []
+    for page in pdf_pages():
+        streamed.extend(stream.add(page))
+    streamed.extend(stream.finish())
+    whole = splitter.split_pages([Document(page_content=PAGE_SEPARATOR.join(PAGES), metadata={"source": "manual.pdf"})])
+
+    assert [chunk.page_content for chunk in streamed] == [chunk.page_content for chunk in whole]
+    # Chunks are returned as soon as later text can no longer change them
+    assert OffsetTextSplitter(60, 15).stream().add(pdf_pages()[0])
+
+def test_token_units_size_chunks_in_words():
+    chunks = list(OffsetTextSplitter(12, 3, tokenizer=WhitespaceTokenizer()).split_pages(pdf_pages()))
+
+    assert all(len(chunk.page_content.split()) <= 12 for chunk in chunks)
+    assert {word for text in PAGES for word in text.split()} == {
+        word for chunk in chunks for word in chunk.page_content.split()
+    }
+
+def test_overlap_must_be_smaller_than_the_chunk():
+    with pytest.raises(ValueError):
+        OffsetTextSplitter(50, 50)
+
+def test_recursive_splitter_is_the_default(monkeypatch):
+    from app.config import Settings
+
+    assert Settings.model_fields["text_splitter"].default == "recursive"
+    monkeypatch.setattr(document_loader.settings, "text_splitter", "recursive")
+    assert isinstance(get_text_splitter(), PerPageSplitter)
+    monkeypatch.setattr(document_loader.settings, "text_splitter", "offset")
+    assert isinstance(get_text_splitter(), OffsetTextSplitter)
+    monkeypatch.setattr(document_loader.settings, "text_splitter", "sentences")
+    with pytest.raises(ValueError):
+        get_text_splitter()
@@ -0,0 +1,120 @@
+import hashlib
+import pytest
+from app.utils.document_loader import iter_text_segments
+from app.utils.uploads import UploadManager, get_upload_manager
+from tests.conftest import PUMP_MANUAL, wait_for_job
+
+def segments(data: bytes, segment_bytes: int, block_size: int):
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)]
+    return [doc.page_content for doc in iter_text_segments(blocks, "notes.txt", segment_bytes)]
+
+def test_segments_end_at_blank_lines():
+    text = "first paragraph here\n\nsecond paragraph here\n\nthird"
+
+    assert segments(text.encode(), 16, 4) == ["first paragraph here\n\n", "second paragraph here\n\n", "third"]
+
+def test_text_without_blank_lines_keeps_the_buffer_bounded():
+    words = " ".join(f"word{i}" for i in range(2000)).encode()
+    seen = []
+
+    def blocks():
+        for i in range(0, len(words), 7):
+            seen.append(i)
+            yield words[i:i + 7]
+
+    cut = []
+    for doc in iter_text_segments(blocks(), "notes.txt", 64):
+        # Every segment is emitted long before the stream ends
+        cut.append((doc.page_content, seen[-1]))
+
+    assert "".join(text for text, _ in cut) == words.decode()
+    assert all(len(text.encode()) <= 128 for text, _ in cut)
+    assert all(text.endswith(" ") for text, _ in cut[:-1])
+    assert cut[0][1] < 200
+
+@pytest.mark.parametrize("block_size", [1, 3, 50, 4096])
+def test_cuts_do_not_depend_on_block_size(block_size):
+    text = ("line one\nline two\n" * 30 + "\n\n" + "x" * 300 + "\nend").encode()
+
+    assert segments(text, 40, block_size) == segments(text, 40, len(text))
+
+def test_long_words_are_not_cut_inside_a_character():
+    text = "ü" * 500
+
+    parts = segments(text.encode(), 33, 5)
+
+    assert "".join(parts) == text
+    assert len(parts) > 1
+
+def start_upload(client, text: bytes, **fields):
+    response = client.post("/uploads", json={"filename": "manual.txt", "size": len(text), **fields})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def put_part(client, upload_id: str, index: int, data: bytes, **headers):
+    return client.put(f"/uploads/{upload_id}/parts/{index}", content=data, headers=headers)
+
+@pytest.fixture
+def small_parts(client, monkeypatch):
+    monkeypatch.setattr(get_upload_manager(), "part_size", 64)
+
+def test_parts_in_any_order_are_ingested(client, small_parts):
+    text = PUMP_MANUAL.encode()
+    upload = start_upload(client, text, sha256=hashlib.sha256(text).hexdigest())
+    parts = [text[i:i + 64] for i in range(0, len(text), 64)]
+
+    for index in reversed(range(len(parts))):
+        assert put_part(client, upload["upload_id"], index, parts[index]).status_code == 200
+    response = client.post(f"/uploads/{upload['upload_id']}/complete")
+
+    assert response.status_code == 202
+    assert response.json()["content_hash"] == hashlib.sha256(text).hexdigest()
+    assert wait_for_job(client, response.json()["job_id"])["status"] == "completed"
+    answer = client.post("/ask/", json={"question": "How long is the warranty?"})
+    assert answer.status_code == 200
+
+def test_interrupted_upload_reports_missing_parts(client, small_parts):
+    text = PUMP_MANUAL.encode()
+    upload_id = start_upload(client, text)["upload_id"]
+    put_part(client, upload_id, 1, text[64:128])
+
+    status = client.get(f"/uploads/{upload_id}").json()
+    incomplete = client.post(f"/uploads/{upload_id}/complete")
+
+    assert status["received_parts"] == [1]
+    assert status["missing_parts"] == [0] + list(range(2, status["parts"]))
+    assert status["parts"] > 2
+    assert incomplete.status_code == 400
+    assert "missing" in incomplete.json()["detail"]
+
+def test_checksum_mismatches_are_rejected(client, small_parts):
+    text = PUMP_MANUAL.encode()
+    upload_id = start_upload(client, text, sha256="0" * 64)["upload_id"]
+
+    bad_part = put_part(client, upload_id, 0, text[:64], **{"X-Part-SHA256": "0" * 64})
+    for index in range(0, len(text), 64):
+        put_part(client, upload_id, index // 64, text[index:index + 64])
+    bad_file = client.post(f"/uploads/{upload_id}/complete")
+
+    assert bad_part.status_code == 400
+    assert bad_file.status_code == 400
+    assert bad_file.json()["detail"] == "File checksum mismatch"
+
+def test_aborted_upload_is_forgotten(client, small_parts):
+    upload_id = start_upload(client, b"some text")["upload_id"]
+
+    assert client.delete(f"/uploads/{upload_id}").json() == {"upload_id": upload_id, "aborted": True}
+    assert client.get(f"/uploads/{upload_id}").status_code == 404
+    assert client.delete(f"/uploads/{upload_id}").status_code == 404
+
+def test_idle_sessions_expire(tmp_path):
+    manager = UploadManager(str(tmp_path), part_size=4, ttl_seconds=60, expiry_interval=1)
+    idle = manager.create("old.txt", 8, "old.txt", "default")
+    active = manager.create("new.txt", 8, "new.txt", "default")
+    idle.updated_at -= 120
+
+    assert manager.expire() == 1
+    assert manager.get(idle.id) is None
+    assert idle.status == "aborted"
+    assert not idle.path.exists()
+    assert manager.get(active.id) is active
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("weaviate")
+
+from weaviate.classes.config import Tokenization
+from app.utils.weaviate_store import ensure_collection
+
+class FakeBatch:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_object(self, properties, uuid, vector):
+        self.collection.objects[uuid] = (properties, vector)
+
+class FakeCollection:
+    def __init__(self, properties):
+        self.properties = properties
+        self.objects = {}
+        self.config = SimpleNamespace(get=lambda: SimpleNamespace(properties=self.properties),
+                                      add_property=self.properties.append)
+        self.batch = SimpleNamespace(dynamic=lambda: FakeBatch(self), failed_objects=[])
+
+    def iterator(self, include_vector):
+        for uuid, (properties, vector) in list(self.objects.items()):
+            yield SimpleNamespace(uuid=uuid, properties=dict(properties), vector={"default": vector})
+
+class FakeCollections:
+    def __init__(self):
+        self.collections = {}
+        self.log = []
+
+    def exists(self, name):
+        return name in self.collections
+
+    def get(self, name):
+        return self.collections[name]
+
+    def create(self, name, properties, **config):
+        self.log.append(("create", name))
+        self.collections[name] = FakeCollection(list(properties))
+
+    def delete(self, name):
+        self.log.append(("delete", name))
+        del self.collections[name]
+
+def word_tokenized_collection():
+    collection = FakeCollection([SimpleNamespace(name="document_id", tokenization=Tokenization.WORD)])
+    collection.objects["id-1"] = ({"text": "chunk", "document_id": "annual report.pdf"}, [1.0, 0.0])
+    return collection
+
+def document_id_tokenization(collections, name):
+    return next(p.tokenization for p in collections.get(name).properties if p.name == "document_id")
+
+def test_new_collection_matches_whole_document_ids():
+    client = SimpleNamespace(collections=FakeCollections())
+
+    ensure_collection(client, "DocumentQA")
+
+    assert document_id_tokenization(client.collections, "DocumentQA") == Tokenization.FIELD
+
+def test_word_tokenized_collection_is_migrated_with_its_chunks():
+    client = SimpleNamespace(collections=FakeCollections())
+    client.collections.collections["DocumentQA"] = word_tokenized_collection()
+
+    ensure_collection(client, "DocumentQA")
+
+    assert set(client.collections.collections) == {"DocumentQA"}
+    assert document_id_tokenization(client.collections, "DocumentQA") == Tokenization.FIELD
+    assert client.collections.get("DocumentQA").objects == {
+        "id-1": ({"text": "chunk", "document_id": "annual report.pdf"}, [1.0, 0.0])
+    }
+
+def test_interrupted_migration_resumes_from_the_staging_copy():
+    client = SimpleNamespace(collections=FakeCollections())
+    # The original was deleted after its chunks were copied out
+    staging = FakeCollection([SimpleNamespace(name="document_id", tokenization=Tokenization.FIELD)])
+    staging.objects["id-1"] = ({"text": "chunk"}, [1.0])
+    client.collections.collections["DocumentQA_Migrating"] = staging
+
+    ensure_collection(client, "DocumentQA")
+
+    assert set(client.collections.collections) == {"DocumentQA"}
+    assert list(client.collections.get("DocumentQA").objects) == ["id-1"]